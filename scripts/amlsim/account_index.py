@@ -0,0 +1,170 @@
+"""
+Sidecar index of output CSV files (e.g. transactions.csv) by account, so that the rows of an account
+are read by seeking to their byte offsets instead of scanning the whole file.
+
+AccountIndexBuilder records the originator and beneficiary of each row while the converter writes the rows.
+After the file is complete (and de-duplicated), the byte offset of each line is found with a vectorized
+newline scan, and the index is written as NumPy arrays in the "<csv>.idx" directory:
+- accounts.npy: Sorted account IDs
+- pointers.npy: Start position of each account in offsets.npy (one more element than accounts)
+- offsets.npy: Byte offsets of rows where the account is the originator or the beneficiary, sorted by row
+AccountIndex memory-maps these arrays and reads the rows of an account.
+"""
+
+import csv
+import os
+import shutil
+
+import numpy as np
+
+
+INDEX_SUFFIX = ".idx"
+SCAN_BYTES = 1 << 26  # Bytes scanned for newlines at once
+
+
+def index_dir(csv_file):
+    """Get the index directory of a CSV file
+    :param csv_file: CSV file path (e.g. outputs/sample/transactions.csv)
+    :return: Index directory path (e.g. outputs/sample/transactions.csv.idx)
+    """
+    return csv_file + INDEX_SUFFIX
+
+
+def line_offsets(csv_file):
+    """Get byte offsets of data rows of a CSV file whose rows are single lines
+    :param csv_file: CSV file path (the first line is the header)
+    :return: NumPy int64 array of the byte offset of each data row
+    """
+    file_size = os.path.getsize(csv_file)
+    if file_size == 0:
+        return np.zeros(0, dtype=np.int64)
+    data = np.memmap(csv_file, dtype=np.uint8, mode="r")
+    starts = [np.flatnonzero(data[pos:pos + SCAN_BYTES] == ord("\n")) + (pos + 1)
+              for pos in range(0, file_size, SCAN_BYTES)]
+    starts = np.concatenate(starts)
+    return starts[starts < file_size]  # Lines after the header (not the end of the file)
+
+
+class AccountIndexBuilder:
+    """Originator and beneficiary accounts of rows in the order they are written
+    """
+
+    def __init__(self):
+        self.accounts = dict()  # Account ID --> Dense index (in the order of appearance)
+        self.origs = list()  # Arrays of dense indices of originators
+        self.dests = list()
+        self.num_rows = 0
+
+    def _index(self, acct_ids):
+        accounts = self.accounts
+        return np.fromiter((accounts.setdefault(acct_id, len(accounts)) for acct_id in acct_ids),
+                           dtype=np.int32, count=len(acct_ids))
+
+    def add_rows(self, orig_ids, dest_ids):
+        """Add rows which have been written
+        :param orig_ids: List of originator account IDs of the rows
+        :param dest_ids: List of beneficiary account IDs of the rows (same length)
+        """
+        if len(orig_ids) == 0:
+            return
+        self.origs.append(self._index(orig_ids))
+        self.dests.append(self._index(dest_ids))
+        self.num_rows += len(orig_ids)
+
+    def _columns(self):
+        if not self.origs:
+            return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.int32)
+        self.origs = [np.concatenate(self.origs)]
+        self.dests = [np.concatenate(self.dests)]
+        return self.origs[0], self.dests[0]
+
+    def merge(self, other, flags=None):
+        """Add rows of another builder (e.g. of a chunk converted by a worker process)
+        :param other: AccountIndexBuilder object
+        :param flags: Boolean flags of the rows of the other builder which have been written (None: all rows)
+        """
+        remap = self._index(list(other.accounts))
+        origs, dests = other._columns()
+        if flags is not None:
+            flags = np.asarray(flags, dtype=bool)
+            origs, dests = origs[flags], dests[flags]
+        if len(origs) > 0:
+            self.origs.append(remap[origs])
+            self.dests.append(remap[dests])
+            self.num_rows += len(origs)
+
+    def write(self, csv_file, removed_rows=None):
+        """Write the index of a complete CSV file
+        :param csv_file: CSV file path whose data rows are the rows added to this builder
+        :param removed_rows: Sorted row numbers removed from the file after they were added (e.g. duplicates)
+        :return: Index directory path
+        """
+        origs, dests = self._columns()
+        if removed_rows is not None and len(removed_rows) > 0:
+            kept = np.ones(len(origs), dtype=bool)
+            kept[removed_rows] = False
+            origs, dests = origs[kept], dests[kept]
+        offsets = line_offsets(csv_file)
+        if len(offsets) != len(origs):
+            raise ValueError("%s has %d rows but %d rows were indexed" % (csv_file, len(offsets), len(origs)))
+
+        # Sort account IDs, then (account, row) entries for both originators and beneficiaries
+        ids = np.array(list(self.accounts), dtype=str) if self.accounts else np.zeros(0, dtype="U1")
+        order = np.argsort(ids, kind="stable")
+        rank = np.empty(len(ids), dtype=np.int64)
+        rank[order] = np.arange(len(ids))
+        rows = np.arange(len(origs), dtype=np.int64)
+        keys = np.concatenate([rank[origs], rank[dests]])
+        rows = np.concatenate([rows, rows])
+        entries = np.unique(keys * max(len(origs), 1) + rows)  # One entry per account and row (self-transfers)
+        keys, rows = entries // max(len(origs), 1), entries % max(len(origs), 1)
+        pointers = np.searchsorted(keys, np.arange(len(ids) + 1))
+
+        out_dir = index_dir(csv_file)
+        shutil.rmtree(out_dir, ignore_errors=True)
+        os.makedirs(out_dir)
+        np.save(os.path.join(out_dir, "accounts.npy"), ids[order])
+        np.save(os.path.join(out_dir, "pointers.npy"), pointers.astype(np.int64))
+        np.save(os.path.join(out_dir, "offsets.npy"), offsets[rows])
+        return out_dir
+
+
+class AccountIndex:
+    """Memory-mapped sidecar index of a CSV file by account
+    """
+
+    def __init__(self, csv_file):
+        """
+        :param csv_file: CSV file path with the index directory
+        """
+        self.csv_file = csv_file
+        idx_dir = index_dir(csv_file)
+        self.accounts = np.load(os.path.join(idx_dir, "accounts.npy"), mmap_mode="r")
+        self.pointers = np.load(os.path.join(idx_dir, "pointers.npy"), mmap_mode="r")
+        self.offsets = np.load(os.path.join(idx_dir, "offsets.npy"), mmap_mode="r")
+        with open(csv_file, "r", newline="") as rf:
+            self.header = next(csv.reader(rf))
+
+    def row_offsets(self, acct_id):
+        """Get byte offsets of rows of an account
+        :param acct_id: Account ID (as in the CSV file)
+        :return: NumPy int64 array of byte offsets (empty if the account is not found)
+        """
+        acct_id = str(acct_id)
+        pos = int(np.searchsorted(self.accounts, acct_id))
+        if pos >= len(self.accounts) or self.accounts[pos] != acct_id:
+            return np.zeros(0, dtype=np.int64)
+        return np.asarray(self.offsets[self.pointers[pos]:self.pointers[pos + 1]])
+
+    def rows(self, acct_id):
+        """Read rows where an account is the originator or the beneficiary
+        :param acct_id: Account ID
+        :return: List of rows (lists of strings) in the order of the file
+        """
+        offsets = self.row_offsets(acct_id)
+        lines = list()
+        with open(self.csv_file, "rb") as rf:
+            for offset in offsets.tolist():
+                rf.seek(offset)
+                lines.append(rf.readline().decode())
+        return list(csv.reader(lines))
@@ -0,0 +1,161 @@
+"""
+Transaction amount distributions for AML typologies.
+
+Each distribution is compiled once from a parameter row (alertPatterns.csv) and draws
+whole arrays of amounts with NumPy, so that a typology asks for all of its amounts at once.
+"""
+
+import csv
+import os
+import numpy as np
+
+from amlsim.rounded_amount import RoundedAmount
+
+
+class UniformDistribution:
+    """Uniform amounts within [min_amount, max_amount]
+    """
+
+    def __init__(self, min_amount, max_amount):
+        self.min = min_amount
+        self.max = max_amount
+
+    def sample(self, size):
+        return np.random.uniform(self.min, self.max, size)
+
+
+class RoundedDistribution:
+    """Rounded amounts (e.g. 100, 200, 300...) within [min_amount, max_amount].
+    The step size is chosen by RoundedAmount.
+    """
+
+    def __init__(self, min_amount, max_amount):
+        start, stop, step = RoundedAmount(min_amount, max_amount).getRange()
+        self.start = start
+        self.step = max(step, 1)
+        self.num_slots = max((stop - 1 - start) // self.step + 1, 1)
+
+    def sample(self, size):
+        slots = np.random.randint(0, self.num_slots, size)
+        return (self.start + slots * self.step).astype(np.float64)
+
+
+class LogNormalDistribution:
+    """Log-normal amounts truncated to [min_amount, max_amount].
+    If "mu" and "sigma" are not given, the median is the geometric mean of the range
+    and the range covers about 95% of the untruncated distribution.
+    """
+
+    def __init__(self, min_amount, max_amount, mu=None, sigma=None):
+        if min_amount <= 0.0:
+            raise ValueError("Minimum amount of the log-normal distribution must be positive: %f" % min_amount)
+        self.min = min_amount
+        self.max = max_amount
+        log_min, log_max = np.log(min_amount), np.log(max_amount)
+        self.mu = float(mu) if mu is not None else (log_min + log_max) / 2
+        self.sigma = float(sigma) if sigma is not None else max((log_max - log_min) / (2 * 1.96), 1e-6)
+
+    def sample(self, size):
+        amounts = np.random.lognormal(self.mu, self.sigma, size)
+        invalid = (amounts < self.min) | (amounts > self.max)
+        num_invalid = np.count_nonzero(invalid)
+        while num_invalid > 0:  # Redraw amounts out of the range
+            amounts[invalid] = np.random.lognormal(self.mu, self.sigma, num_invalid)
+            invalid = (amounts < self.min) | (amounts > self.max)
+            num_invalid = np.count_nonzero(invalid)
+        return amounts
+
+
+class StructuringDistribution:
+    """Amounts just below a reporting threshold (structuring / smurfing).
+    Amounts are drawn from [threshold * (1 - ratio), threshold) and never below min_amount.
+    The threshold is max_amount unless given.
+    """
+
+    def __init__(self, min_amount, max_amount, threshold=None, ratio=0.1):
+        self.threshold = float(threshold) if threshold is not None else max_amount
+        self.ratio = float(ratio)
+        if not 0.0 < self.ratio <= 1.0:
+            raise ValueError("Ratio below the threshold (%f) must be within (0.0, 1.0]" % self.ratio)
+        self.low = max(min_amount, self.threshold * (1.0 - self.ratio))
+        if self.low >= self.threshold:
+            raise ValueError("Threshold (%f) must be larger than the minimum amount (%f)"
+                             % (self.threshold, min_amount))
+
+    def sample(self, size):
+        return np.random.uniform(self.low, self.threshold, size)
+
+
+class HistogramDistribution:
+    """Empirical amount histogram loaded from a CSV file with "min", "max" and "weight" columns.
+    Each amount is drawn uniformly within a bin chosen with the bin weight.
+    """
+
+    def __init__(self, min_amount, max_amount, file, base_dir=""):
+        lows, highs, weights = list(), list(), list()
+        with open(os.path.join(base_dir, file), "r") as rf:
+            reader = csv.reader(rf)
+            header = next(reader)
+            name2idx = {n: i for i, n in enumerate(header)}
+            for row in reader:
+                if len(row) == 0 or row[0].startswith("#"):
+                    continue
+                lows.append(float(row[name2idx["min"]]))
+                highs.append(float(row[name2idx["max"]]))
+                weights.append(float(row[name2idx["weight"]]))
+
+        weights = np.array(weights)
+        if len(weights) == 0 or weights.sum() <= 0.0:
+            raise ValueError("Amount histogram %s has no positive weights" % file)
+        self.lows = np.array(lows)
+        self.widths = np.array(highs) - self.lows
+        self.cum_weights = np.cumsum(weights) / weights.sum()
+
+    def sample(self, size):
+        bins = np.searchsorted(self.cum_weights, np.random.random_sample(size), side="right")
+        bins = np.minimum(bins, len(self.cum_weights) - 1)
+        return self.lows[bins] + self.widths[bins] * np.random.random_sample(size)
+
+
+AMOUNT_DISTRIBUTIONS = {
+    "uniform": UniformDistribution,
+    "rounded": RoundedDistribution,
+    "lognormal": LogNormalDistribution,
+    "structuring": StructuringDistribution,
+    "histogram": HistogramDistribution,
+}
+
+
+def parse_params(params_str):
+    """Parse distribution parameters like "mu=5.0;sigma=0.5"
+    :param params_str: Parameter string from the alert parameter file
+    :return: dict of parameter names and values
+    """
+    params = dict()
+    if not params_str:
+        return params
+    for item in params_str.split(";"):
+        if not item.strip():
+            continue
+        key, _, value = item.partition("=")
+        if not value:
+            raise ValueError("Invalid amount distribution parameter: %s" % item)
+        params[key.strip()] = value.strip()
+    return params
+
+
+def compile_distribution(name, min_amount, max_amount, params_str="", base_dir=""):
+    """Compile an amount distribution from a parameter row
+    :param name: Distribution name (one of AMOUNT_DISTRIBUTIONS)
+    :param min_amount: Minimum amount
+    :param max_amount: Maximum amount
+    :param params_str: Additional distribution parameters like "mu=5.0;sigma=0.5"
+    :param base_dir: Base directory of files referred from parameters (e.g. histogram CSV file)
+    :return: Distribution object which has sample(size) method
+    """
+    if name not in AMOUNT_DISTRIBUTIONS:
+        raise KeyError("Amount distribution name (%s) must be one of %s" % (name, str(list(AMOUNT_DISTRIBUTIONS))))
+    params = parse_params(params_str)
+    if name == "histogram":
+        params["base_dir"] = base_dir
+    return AMOUNT_DISTRIBUTIONS[name](min_amount, max_amount, **params)
@@ -0,0 +1,121 @@
+"""
+CSV writers for converter output files.
+
+AsyncCSVWriter formats rows into large buffers and hands them to a dedicated writer thread through a bounded queue,
+so that parsing and formatting rows overlap with disk writes. The caller blocks when the queue is full
+(backpressure), so at most (queue_size + 2) buffers are kept in memory for each file.
+"""
+
+import csv
+import io
+import queue
+import threading
+
+
+DEFAULT_BUFFER_SIZE = 1 << 20  # Characters of formatted rows handed to the writer thread at once
+DEFAULT_QUEUE_SIZE = 4  # Maximum number of pending buffers
+
+
+class CSVWriter:
+    """Synchronous CSV writer with the same interface as AsyncCSVWriter
+    """
+
+    def __init__(self, file_obj):
+        """
+        :param file_obj: Output file object
+        """
+        self.writer = csv.writer(file_obj)
+
+    def writerow(self, row):
+        self.writer.writerow(row)
+
+    def writerows(self, rows):
+        self.writer.writerows(rows)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class AsyncCSVWriter:
+    """CSV writer whose formatted rows are written to the file by a background thread.
+    Rows are formatted into an in-memory buffer by the caller thread, and the thread only writes
+    the filled buffers, so the slow disk writes (which release the GIL) overlap with parsing.
+    """
+
+    def __init__(self, file_obj, buffer_size=DEFAULT_BUFFER_SIZE, queue_size=DEFAULT_QUEUE_SIZE):
+        """
+        :param file_obj: Output file object (the caller closes it after this writer is closed)
+        :param buffer_size: Size of each buffer handed to the writer thread in characters
+        :param queue_size: Maximum number of pending buffers
+        """
+        self.file_obj = file_obj
+        self.buffer_size = buffer_size
+        self.buffer = io.StringIO()
+        self.writer = csv.writer(self.buffer)
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.error = None  # Exception raised in the writer thread
+        self.thread = threading.Thread(target=self._write_buffers, daemon=True)
+        self.thread.start()
+
+    def _write_buffers(self):
+        while True:
+            data = self.queue.get()
+            if data is None:
+                self.queue.task_done()
+                return
+            if self.error is None:  # Otherwise drain the queue so that the caller thread is not blocked
+                try:
+                    self.file_obj.write(data)
+                except Exception as e:
+                    self.error = e
+            self.queue.task_done()
+
+    def _flush_buffer(self):
+        if self.error is not None:
+            raise self.error
+        self.queue.put(self.buffer.getvalue())  # Block while the queue is full
+        self.buffer = io.StringIO()
+        self.writer = csv.writer(self.buffer)
+
+    def writerow(self, row):
+        self.writer.writerow(row)
+        if self.buffer.tell() >= self.buffer_size:
+            self._flush_buffer()
+
+    def writerows(self, rows):
+        for row in rows:
+            self.writerow(row)
+
+    def flush(self):
+        """Wait until all rows written so far have been passed to the file object
+        """
+        if self.buffer.tell() > 0:
+            self._flush_buffer()
+        self.queue.join()
+        if self.error is not None:
+            raise self.error
+
+    def close(self):
+        """Write the remaining rows and wait for the writer thread
+        """
+        if self.buffer.tell() > 0:
+            self._flush_buffer()
+        self.queue.put(None)
+        self.thread.join()
+        if self.error is not None:
+            raise self.error
+
+
+def create_csv_writer(file_obj, async_write=False, queue_size=DEFAULT_QUEUE_SIZE):
+    """Create a CSV writer for an output file
+    :param file_obj: Output file object
+    :param async_write: If True, rows are written by a background thread
+    :param queue_size: Maximum number of pending buffers of the background thread
+    :return: CSVWriter or AsyncCSVWriter object
+    """
+    if async_write:
+        return AsyncCSVWriter(file_obj, queue_size=queue_size)
+    return CSVWriter(file_obj)
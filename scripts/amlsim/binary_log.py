@@ -0,0 +1,222 @@
+"""
+Binary transaction log of the Java simulator ("log_format": "binary" in the "simulator" section).
+
+TransactionRepository writes a 16-byte header (magic "AMLTXLOG", version and record size)
+followed by fixed-width little-endian records, and a string table of transaction type names (one per line)
+to "<log>.types". The records are read with a memory-mapped NumPy structured array, so that numbers are
+neither formatted as strings by the simulator nor parsed again by the converter.
+"""
+
+import os
+from operator import length_hint
+
+import numpy as np
+
+from amlsim.tx_log_reader import TX_LOG_COLUMNS, TX_LOG_DTYPE, read_blocks
+
+
+MAGIC = b"AMLTXLOG"
+VERSION = 1
+HEADER_DTYPE = np.dtype([("magic", "S8"), ("version", "<u4"), ("record_size", "<u4")])
+RECORD_DTYPE = np.dtype([
+    ("nameOrig", "<i8"),
+    ("nameDest", "<i8"),
+    ("amount", "<f8"),
+    ("step", "<i8"),
+    ("oldbalanceOrig", "<f4"),
+    ("newbalanceOrig", "<f4"),
+    ("oldbalanceDest", "<f4"),
+    ("newbalanceDest", "<f4"),
+    ("alertID", "<i4"),
+    ("type", "<u2"),  # Index of the string table
+    ("isSAR", "u1"),
+    ("padding", "u1"),
+])  # Same layout as TransactionRepository.flushBinaryLog (56 bytes)
+HEADER_SIZE = HEADER_DTYPE.itemsize
+RECORD_SIZE = RECORD_DTYPE.itemsize
+ROWS_BATCH_SIZE = 65536  # Number of records formatted as rows at once
+
+
+def binary_log_path(csv_log):
+    """Get the binary log file path of a CSV log file path (same rule as TransactionRepository.getBinaryLogFile)
+    :param csv_log: CSV log file path (e.g. outputs/sample/tx_log.csv)
+    :return: Binary log file path (e.g. outputs/sample/tx_log.bin)
+    """
+    base = csv_log[:-len(".csv")] if csv_log.endswith(".csv") else csv_log
+    return base + ".bin"
+
+
+def type_table_path(bin_log):
+    """Get the string table file path of transaction types
+    :param bin_log: Binary log file path
+    :return: String table file path
+    """
+    return bin_log + ".types"
+
+
+def is_binary_log(log_file):
+    """Check whether a file is a binary transaction log
+    :param log_file: Log file path
+    :return: True if the file begins with the magic bytes
+    """
+    with open(log_file, "rb") as rf:
+        return rf.read(len(MAGIC)) == MAGIC
+
+
+def read_type_table(bin_log):
+    """Read the string table of transaction types
+    :param bin_log: Binary log file path
+    :return: List of transaction type names (index: type ID)
+    """
+    with open(type_table_path(bin_log), "r") as rf:
+        return rf.read().splitlines()
+
+
+def open_binary_log(bin_log):
+    """Open a binary transaction log as a memory-mapped array of records
+    :param bin_log: Binary log file path
+    :return: NumPy memmap of records (a trailing incomplete record is ignored)
+    """
+    header = np.fromfile(bin_log, dtype=HEADER_DTYPE, count=1)
+    if len(header) == 0 or header["magic"][0] != MAGIC:
+        raise ValueError("Not a binary transaction log: %s" % bin_log)
+    if header["version"][0] != VERSION or header["record_size"][0] != RECORD_SIZE:
+        raise ValueError("Unsupported binary transaction log (version %d, record size %d): %s" % (
+            header["version"][0], header["record_size"][0], bin_log))
+    num_records = (os.path.getsize(bin_log) - HEADER_SIZE) // RECORD_SIZE
+    if num_records == 0:
+        return np.zeros(0, dtype=RECORD_DTYPE)
+    return np.memmap(bin_log, dtype=RECORD_DTYPE, mode="r", offset=HEADER_SIZE, shape=(num_records,))
+
+
+def record_range(start, end):
+    """Get the record indices of a byte range of a binary log
+    :param start: Start byte offset (None: the first record)
+    :param end: End byte offset (exclusive; None: the end of the file)
+    :return: Start and end record indices (end is None if the range reaches the end)
+    """
+    first = 0 if start is None else (start - HEADER_SIZE) // RECORD_SIZE
+    last = None if end is None else (end - HEADER_SIZE) // RECORD_SIZE
+    return first, last
+
+
+def split_record_chunks(bin_log, chunk_bytes, start=None):
+    """Split records of a binary log into byte ranges aligned on records
+    :param bin_log: Binary log file path
+    :param chunk_bytes: Approximate size of each chunk in bytes
+    :param start: Byte offset of the first record to split (None: the first record)
+    :return: List of (start, end) byte offsets (end is exclusive)
+    """
+    end = HEADER_SIZE + len(open_binary_log(bin_log)) * RECORD_SIZE
+    step = max(chunk_bytes // RECORD_SIZE, 1) * RECORD_SIZE
+    offsets = list(range(HEADER_SIZE if start is None else start, end, step)) + [end]
+    return list(zip(offsets[:-1], offsets[1:]))
+
+
+def read_binary_blocks(bin_log, columns=None, block_records=ROWS_BATCH_SIZE * 4, start=None, end=None):
+    """Read a binary log as blocks with the typed columns of the CSV log (see tx_log_reader.read_blocks)
+    :param bin_log: Binary log file path
+    :param columns: Column names (None: all columns)
+    :param block_records: Number of records in each block
+    :param start: Start byte offset (None: the first record)
+    :param end: End byte offset (exclusive; None: the end of the file)
+    :return: Generator of NumPy structured arrays
+    """
+    records = open_binary_log(bin_log)
+    type_names = read_type_table(bin_log)
+    first, last = record_range(start, end)
+    last = len(records) if last is None else min(last, len(records))
+    for i in range(first, last, block_records):
+        yield to_tx_log_rows(records[i:min(i + block_records, last)], type_names, columns)
+
+
+def to_tx_log_rows(records, type_names, columns=None):
+    """Convert records to typed columns of the CSV transaction log (tx_log_reader.TX_LOG_DTYPE)
+    :param records: Array of records
+    :param type_names: List of transaction type names
+    :param columns: Column names (None: all columns)
+    :return: NumPy structured array with the columns of the CSV log
+    """
+    names = TX_LOG_COLUMNS if columns is None else columns
+    rows = np.zeros(len(records), dtype=np.dtype([(name, TX_LOG_DTYPE[name]) for name in names]))
+    for name in names:
+        if name == "type":
+            rows[name] = np.array([t.encode() for t in type_names], dtype="S16")[records[name]]
+        elif records.dtype[name] == np.float32:  # Balances truncated to two digits
+            rows[name] = np.round(records[name].astype(np.float64), 2)
+        else:
+            rows[name] = records[name]
+    return rows
+
+
+def format_column(values, type_names):
+    """Format a column of records as strings of the CSV log (Double.toString of the simulator below 10^7)
+    :param values: NumPy array of a record field
+    :param type_names: List of transaction type names
+    :return: List of strings
+    """
+    if values.dtype == np.uint16:  # Transaction type IDs
+        return [type_names[t] for t in values.tolist()]
+    if values.dtype == np.float32:  # Balances truncated to two digits and stored as float
+        return list(map(repr, np.round(values.astype(np.float64), 2).tolist()))
+    if values.dtype.kind == "f":
+        return list(map(repr, values.tolist()))
+    # Steps, account IDs and flags have few distinct values in a batch, so each value is formatted once
+    unique, inverse = np.unique(values, return_inverse=True)
+    return np.array(list(map(str, unique.tolist())), dtype=object)[inverse].tolist()
+
+
+class BinaryLogRows:
+    """Iterate records of a binary log as rows (tuples of strings) in the CSV column order,
+    keeping the byte offset of the next record (for checkpoints)
+    """
+
+    def __init__(self, bin_log, start=None, end=None):
+        """
+        :param bin_log: Binary log file path
+        :param start: Start byte offset (None: the first record)
+        :param end: End byte offset (exclusive; None: the end of the file)
+        """
+        self.records = open_binary_log(bin_log)
+        self.type_names = read_type_table(bin_log)
+        self.first, last = record_range(start, end)
+        self.last = len(self.records) if last is None else min(last, len(self.records))
+        self._batch_end = self.first  # Record index after the current batch
+        self._batch = iter(())  # Rows of the current batch not yet consumed
+
+    @property
+    def offset(self):
+        """Byte offset of the next record which has not been consumed"""
+        return HEADER_SIZE + (self._batch_end - length_hint(self._batch)) * RECORD_SIZE
+
+    def __iter__(self):
+        for i in range(self.first, self.last, ROWS_BATCH_SIZE):
+            batch = np.array(self.records[i:min(i + ROWS_BATCH_SIZE, self.last)])
+            rows = list(zip(*[format_column(batch[name], self.type_names) for name in TX_LOG_COLUMNS]))
+            self._batch_end = i + len(rows)
+            self._batch = iter(rows)
+            yield from self._batch
+
+
+def csv_to_binary_log(csv_log, bin_log):
+    """Convert a CSV transaction log into a binary log (e.g. for logs of older simulators)
+    :param csv_log: CSV transaction log file path
+    :param bin_log: Binary log file path
+    :return: Number of records
+    """
+    type_ids = dict()  # Type name -> string table index
+    num_records = 0
+    with open(bin_log, "wb") as wf:
+        np.array([(MAGIC, VERSION, RECORD_SIZE)], dtype=HEADER_DTYPE).tofile(wf)
+        for block in read_blocks(csv_log):
+            records = np.zeros(len(block), dtype=RECORD_DTYPE)
+            for name in TX_LOG_COLUMNS:
+                if name == "type":
+                    records[name] = [type_ids.setdefault(t.decode(), len(type_ids)) for t in block[name].tolist()]
+                else:
+                    records[name] = block[name]
+            records.tofile(wf)
+            num_records += len(records)
+    with open(type_table_path(bin_log), "w") as wf:
+        wf.writelines(name + "\n" for name in type_ids)
+    return num_records
@@ -0,0 +1,183 @@
+"""
+Checkpoints of the transaction log conversion, so that an interrupted conversion resumes where it stopped.
+
+A checkpoint consists of a JSON manifest and a pickled state file in the checkpoint directory.
+The manifest records the byte offset of the next unread row of the transaction log, the next transaction ID,
+the sizes of the output files and the SHA-256 digest of the state file (de-duplication state, SAR typologies...).
+Output files are flushed to disk before the manifest is replaced atomically, so the manifest never refers to
+rows which have not been written. On restart, the output files are truncated to the recorded sizes
+and the conversion continues from the recorded offset, with the same results as an uninterrupted run.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import shutil
+
+
+MANIFEST_FILE = "checkpoint.json"
+DEFAULT_CHECKPOINT_MB = 0  # Input bytes between checkpoints in MiB (0: no checkpoint)
+TAIL_BYTES = 4096  # Bytes of the log before the offset whose digest identifies the log file
+
+
+class OffsetLineReader:
+    """Iterate lines of a binary file as strings while counting the bytes consumed,
+    so that the offset of the next unread line is known at any time (e.g. for csv.reader)
+    """
+
+    def __init__(self, file_obj, offset=0):
+        """
+        :param file_obj: File object opened in binary mode and positioned at the offset
+        :param offset: Byte offset of the current position
+        """
+        self.file_obj = file_obj
+        self.offset = offset
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        line = self.file_obj.readline()
+        if not line:
+            raise StopIteration
+        self.offset += len(line)
+        return line.decode()
+
+
+def file_digest(file_path, chunk_size=1 << 20):
+    """Compute the SHA-256 digest of a file
+    :param file_path: File path
+    :param chunk_size: Bytes read at once
+    :return: Hex digest
+    """
+    sha256 = hashlib.sha256()
+    with open(file_path, "rb") as rf:
+        for data in iter(lambda: rf.read(chunk_size), b""):
+            sha256.update(data)
+    return sha256.hexdigest()
+
+
+def tail_digest(log_file, offset):
+    """Compute the digest of the bytes right before an offset to check that the log file has not been replaced
+    :param log_file: Transaction log file path
+    :param offset: Byte offset
+    :return: Hex digest
+    """
+    start = max(offset - TAIL_BYTES, 0)
+    with open(log_file, "rb") as rf:
+        rf.seek(start)
+        return hashlib.sha256(rf.read(offset - start)).hexdigest()
+
+
+def _fsync_dir(path):
+    """Flush a directory entry (e.g. a renamed file) to disk
+    """
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class Checkpoint:
+    """Checkpoint directory of a conversion
+    """
+
+    def __init__(self, checkpoint_dir, log_file, settings):
+        """
+        :param checkpoint_dir: Directory of the manifest and state files
+        :param log_file: Transaction log file path
+        :param settings: dict of conversion settings which must not change across restarts (e.g. dedupe strategy)
+        """
+        self.checkpoint_dir = checkpoint_dir
+        self.log_file = log_file
+        self.settings = settings
+        self.seq = 0  # Sequence number of the last saved checkpoint
+
+    def save(self, offset, tx_id, output_files, state, synced_sizes=None):
+        """Save a checkpoint. Output files must have been flushed (writers and file objects).
+        :param offset: Byte offset of the next unread row of the transaction log
+        :param tx_id: Next transaction ID
+        :param output_files: dict of output file paths and their file objects
+        :param state: Picklable conversion state
+        :param synced_sizes: dict of paths and sizes of other output files synced to disk by the caller
+        """
+        os.makedirs(self.checkpoint_dir, exist_ok=True)
+        sizes = dict(synced_sizes or {})
+        for path, out_f in output_files.items():
+            os.fsync(out_f.fileno())
+            sizes[path] = os.fstat(out_f.fileno()).st_size
+
+        self.seq += 1
+        state_name = "state_%d.pkl" % self.seq
+        state_file = os.path.join(self.checkpoint_dir, state_name)
+        with open(state_file, "wb") as wf:
+            pickle.dump(state, wf, protocol=pickle.HIGHEST_PROTOCOL)
+            wf.flush()
+            os.fsync(wf.fileno())
+
+        manifest = {
+            "log_file": os.path.abspath(self.log_file),
+            "log_digest": tail_digest(self.log_file, offset),
+            "offset": offset,
+            "tx_id": tx_id,
+            "outputs": sizes,
+            "state_file": state_name,
+            "state_digest": file_digest(state_file),
+            "settings": self.settings,
+        }
+        manifest_file = os.path.join(self.checkpoint_dir, MANIFEST_FILE)
+        with open(manifest_file + ".tmp", "w") as wf:
+            json.dump(manifest, wf, indent=2)
+            wf.flush()
+            os.fsync(wf.fileno())
+        os.replace(manifest_file + ".tmp", manifest_file)  # Atomic switch to the new checkpoint
+        _fsync_dir(self.checkpoint_dir)
+
+        for name in os.listdir(self.checkpoint_dir):  # Remove state files of older checkpoints
+            if name.startswith("state_") and name != state_name:
+                os.remove(os.path.join(self.checkpoint_dir, name))
+
+    def load(self):
+        """Load the last checkpoint if it is consistent with the log file, settings and output files
+        :return: Manifest dict and the conversion state, or None if there is no valid checkpoint
+        """
+        manifest_file = os.path.join(self.checkpoint_dir, MANIFEST_FILE)
+        if not os.path.exists(manifest_file):
+            return None
+        with open(manifest_file, "r") as rf:
+            manifest = json.load(rf)
+        self.seq = int(manifest["state_file"][len("state_"):-len(".pkl")])
+
+        offset = manifest["offset"]
+        if manifest["log_file"] != os.path.abspath(self.log_file) or manifest["settings"] != self.settings:
+            print("Checkpoint %s was saved with another log file or settings" % manifest_file)
+            return None
+        if os.path.getsize(self.log_file) < offset or tail_digest(self.log_file, offset) != manifest["log_digest"]:
+            print("Transaction log %s has changed since checkpoint %s" % (self.log_file, manifest_file))
+            return None
+        for path, size in manifest["outputs"].items():
+            if not os.path.exists(path) or os.path.getsize(path) < size:
+                print("Output file %s is shorter than its checkpoint" % path)
+                return None
+        state_file = os.path.join(self.checkpoint_dir, manifest["state_file"])
+        if not os.path.exists(state_file) or file_digest(state_file) != manifest["state_digest"]:
+            print("State file %s of checkpoint %s is corrupted" % (state_file, manifest_file))
+            return None
+        with open(state_file, "rb") as rf:
+            state = pickle.load(rf)
+        return manifest, state
+
+    def truncate_outputs(self, manifest):
+        """Truncate output files to their sizes at the checkpoint
+        :param manifest: Manifest dict from load()
+        """
+        for path, size in manifest["outputs"].items():
+            with open(path, "r+b") as f:
+                f.truncate(size)
+
+    def clear(self):
+        """Remove the checkpoint directory after the conversion has finished
+        """
+        shutil.rmtree(self.checkpoint_dir, ignore_errors=True)
@@ -0,0 +1,183 @@
+"""
+Columnar (Parquet) output of converted datasets.
+
+Converted CSV files are streamed into typed and compressed Parquet files row group by row group,
+following the "valueType" of each column in schema.json, so the memory usage does not depend on the number of rows.
+Columns whose values cannot be parsed as their value type (e.g. "bank0" in an "int" column) are found by a pre-scan
+of the typed columns and stored as strings, so the file is converted only once.
+read_rows and open_rows read either format as rows of strings, so that downstream scripts work with both of them.
+"""
+
+import csv
+import os
+from contextlib import contextmanager
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+except ImportError:  # Optional dependency only for the Parquet format
+    pa = None
+
+
+DEFAULT_ROW_GROUP_SIZE = 1 << 17  # Number of rows in each row group
+DEFAULT_COMPRESSION = "snappy"
+READ_BLOCK_SIZE = 1 << 24  # Bytes of CSV data parsed at once
+DATE_FORMAT = "%Y-%m-%dT%H:%M:%SZ"  # Same format as Schema.days2date
+
+
+def require_pyarrow():
+    if pa is None:
+        raise ImportError("pyarrow is required for the Parquet output format: pip install pyarrow")
+
+
+def parquet_path(csv_file):
+    """Get the Parquet file path of a CSV file
+    :param csv_file: CSV file path (e.g. outputs/sample/transactions.csv)
+    :return: Parquet file path (e.g. outputs/sample/transactions.parquet)
+    """
+    return os.path.splitext(csv_file)[0] + ".parquet"
+
+
+def arrow_type(value_type):
+    """Get the Arrow type of a schema.json value type
+    :param value_type: "string", "int", "float", "boolean" or "date"
+    :return: Arrow data type
+    """
+    require_pyarrow()
+    types = {"int": pa.int64(), "float": pa.float64(), "boolean": pa.bool_(), "date": pa.timestamp("s", tz="UTC")}
+    return types.get(value_type, pa.string())
+
+
+def cast_column(array, value_type):
+    """Cast a string array to the Arrow type of the value type
+    :param array: Arrow string array
+    :param value_type: schema.json value type
+    :return: Arrow array (pyarrow.ArrowInvalid is raised if a value cannot be parsed)
+    """
+    if value_type == "date":  # Both "2017-01-01T00:00:00Z" and "2017-01-01" in UTC
+        array = pc.cast(pc.replace_substring_regex(array, "Z$", ""), pa.timestamp("s"))
+    return pc.cast(array, arrow_type(value_type))
+
+
+def _open_csv(csv_file, names):
+    """Open a CSV file as a stream of record batches of string columns
+    :param csv_file: CSV file path
+    :param names: Names of the columns to be read
+    :return: pyarrow.csv.CSVStreamingReader
+    """
+    return pa_csv.open_csv(csv_file, read_options=pa_csv.ReadOptions(block_size=READ_BLOCK_SIZE),
+                           convert_options=pa_csv.ConvertOptions(column_types={name: pa.string() for name in names},
+                                                                 include_columns=names, null_values=[""],
+                                                                 strings_can_be_null=True))
+
+
+def find_string_columns(csv_file, header, value_types):
+    """Find typed columns whose values cannot be parsed as their value types, reading only the typed columns
+    :param csv_file: CSV file path
+    :param header: CSV header
+    :param value_types: dict of column names and schema.json value types
+    :return: Set of column names to be stored as strings
+    """
+    typed = [name for name in header if arrow_type(value_types.get(name)) != pa.string()]
+    failed = set()
+    if not typed:
+        return failed
+    for batch in _open_csv(csv_file, typed):
+        for name, array in zip(typed, batch.columns):
+            if name in failed:
+                continue
+            try:
+                cast_column(array, value_types.get(name))
+            except pa.ArrowInvalid:
+                failed.add(name)
+        if len(failed) == len(typed):
+            break
+    return failed
+
+
+def _write_parquet(csv_file, parquet_file, header, value_types, row_group_size, compression):
+    reader = _open_csv(csv_file, header)
+    schema = pa.schema([(name, arrow_type(value_types.get(name))) for name in header])
+    with pq.ParquetWriter(parquet_file, schema, compression=compression) as writer:
+        pending = list()  # Record batches of the next row group
+        num_pending = 0
+        for batch in reader:
+            columns = [cast_column(array, value_types.get(name)) for name, array in zip(header, batch.columns)]
+            pending.append(pa.RecordBatch.from_arrays(columns, schema=schema))
+            num_pending += batch.num_rows
+            if num_pending >= row_group_size:
+                table = pa.Table.from_batches(pending, schema)
+                num_full = num_pending - num_pending % row_group_size  # Keep the remainder for the next row group
+                writer.write_table(table.slice(0, num_full), row_group_size=row_group_size)
+                pending = table.slice(num_full).to_batches()
+                num_pending -= num_full
+        writer.write_table(pa.Table.from_batches(pending, schema), row_group_size=row_group_size)
+    return schema
+
+
+def csv_to_parquet(csv_file, parquet_file, value_types, row_group_size=DEFAULT_ROW_GROUP_SIZE,
+                   compression=DEFAULT_COMPRESSION):
+    """Convert a CSV file into a Parquet file in a streaming fashion
+    :param csv_file: Input CSV file path
+    :param parquet_file: Output Parquet file path
+    :param value_types: dict of column names and schema.json value types (other columns are strings)
+    :param row_group_size: Number of rows in each row group
+    :param compression: Compression codec (e.g. "snappy", "zstd" or "none")
+    :return: Arrow schema of the Parquet file
+    """
+    require_pyarrow()
+    with open(csv_file, "r") as rf:
+        header = next(csv.reader(rf))
+    value_types = dict(value_types)
+    for name in sorted(find_string_columns(csv_file, header, value_types)):  # Before writing any row group
+        print("Column %s of %s is stored as strings" % (name, csv_file))
+        value_types[name] = "string"
+    return _write_parquet(csv_file, parquet_file, header, value_types, row_group_size, compression)
+
+
+def _to_strings(array):
+    """Format an Arrow array as strings of the CSV output
+    """
+    if pa.types.is_timestamp(array.type):  # Parquet stores timestamps in milliseconds
+        array = pc.strftime(array.cast(pa.timestamp("s", tz=array.type.tz)), format=DATE_FORMAT)
+    elif pa.types.is_boolean(array.type):
+        array = pc.if_else(array, "true", "false")
+    else:
+        array = pc.cast(array, pa.string())
+    return pc.fill_null(array, "").to_pylist()
+
+
+def read_rows(file_path):
+    """Read a converted CSV or Parquet file as rows of strings (the header comes first) like csv.reader.
+    If the CSV file does not exist, the Parquet file with the same base name is read.
+    :param file_path: CSV or Parquet file path
+    :return: Generator of rows (lists of strings)
+    """
+    if not file_path.endswith(".parquet") and not os.path.exists(file_path) \
+            and os.path.exists(parquet_path(file_path)):
+        file_path = parquet_path(file_path)
+
+    if file_path.endswith(".parquet"):
+        require_pyarrow()
+        parquet_file = pq.ParquetFile(file_path)
+        yield parquet_file.schema_arrow.names
+        for batch in parquet_file.iter_batches():
+            for row in zip(*[_to_strings(array) for array in batch.columns]):
+                yield list(row)
+    else:
+        with open(file_path, "r") as rf:
+            yield from csv.reader(rf)
+
+
+@contextmanager
+def open_rows(file_path):
+    """Open a converted CSV or Parquet file as an iterator of rows of strings like csv.reader
+    :param file_path: CSV or Parquet file path
+    """
+    rows = read_rows(file_path)
+    try:
+        yield rows
+    finally:
+        rows.close()
@@ -0,0 +1,84 @@
+"""
+Lookup table of formatted dates for simulation steps (days from the base date).
+
+The simulator has only "total_steps" distinct steps, so formatting each date cell with int(), timedelta
+and isoformat() is repeated work. The table formats every step once and date cells become dict lookups.
+Out-of-range steps are formatted on demand and memoized.
+"""
+
+import datetime
+
+
+def iso_format(dt):
+    """Format a date as ISO 8601 in UTC (e.g. "2017-01-01T00:00:00Z")
+    :param dt: datetime object
+    :return: Date string
+    """
+    return dt.isoformat() + "Z"
+
+
+def compact_format(dt):
+    """Format a date as "YYYYMMDD"
+    :param dt: datetime object
+    :return: Date string
+    """
+    return dt.strftime("%Y%m%d")
+
+
+class DateTable:
+    """Precomputed mapping from steps to date strings
+    """
+
+    def __init__(self, base_date, num_steps=0, formatter=iso_format):
+        """
+        :param base_date: datetime of step 0
+        :param num_steps: Number of precomputed steps (e.g. total_steps of the simulation)
+        :param formatter: Function to format a datetime as a string
+        """
+        self.base_date = base_date
+        self.formatter = formatter
+        self.table = dict()  # Step (both int and str keys) -> date string
+        self.steps = dict()  # Date string -> step
+        for step in range(max(int(num_steps or 0), 0) + 1):
+            self._add(step)
+
+    def _add(self, step):
+        date_str = self.formatter(self.base_date + datetime.timedelta(step))
+        self.table[step] = date_str
+        self.table[str(step)] = date_str
+        self.steps[date_str] = step
+        return date_str
+
+    def lookup(self, days):
+        """Get the date string of a step. If the step is not an integer, return an empty string.
+        :param days: Step as an integer or a string
+        :return: Date string
+        """
+        try:
+            return self.table[days]
+        except (KeyError, TypeError):
+            pass
+        try:
+            num_days = int(days)
+        except ValueError:
+            return ""
+        return self._add(num_days)
+
+    def step_of(self, date_str):
+        """Get the step of a formatted date string (reverse lookup).
+        Raw steps and ISO 8601 dates not in the table are also accepted.
+        :param date_str: Date string
+        :return: Step as an integer, or None if it cannot be parsed
+        """
+        step = self.steps.get(date_str)
+        if step is not None:
+            return step
+        try:
+            return int(date_str)
+        except ValueError:
+            pass
+        try:
+            dt = datetime.datetime.fromisoformat(date_str.rstrip("Z"))
+        except ValueError:
+            return None
+        return (dt.replace(tzinfo=None) - self.base_date).days
@@ -0,0 +1,338 @@
+"""
+Transaction de-duplication strategies for the log converter.
+
+Each strategy takes batches of transaction keys (tuples of strings) and tells which of them appear
+for the first time, so that the converter writes each distinct transaction once.
+- "exact": Python set of key tuples (memory grows with the number of distinct transactions)
+- "fingerprint": 64-bit key fingerprints in a NumPy open-addressing hash table
+- "bloom": Bloom filter (approximate: a few distinct transactions may be dropped as false positives)
+- "external": Hash-partitioned fingerprints spilled to disk and de-duplicated after the conversion
+"""
+
+import hashlib
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+
+DEFAULT_MEMORY_MB = 1024  # Memory limit of the fingerprint table, Bloom filter or external buffer
+DEFAULT_BLOOM_HASHES = 7  # Number of hash functions of the Bloom filter
+EMPTY_SLOT = np.uint64(0)  # Fingerprint value of empty slots in the hash table
+MAX_LOAD_FACTOR = 0.5  # The fingerprint table grows when the load factor exceeds this
+NUM_PARTITIONS = 64  # Number of spill files of the external de-duplication
+
+
+def fingerprints(keys):
+    """Compute stable 64-bit fingerprints of transaction keys (same values across processes and runs)
+    :param keys: List of tuples of strings
+    :return: NumPy uint64 array of fingerprints (never zero)
+    """
+    blake2b = hashlib.blake2b
+    values = np.fromiter((int.from_bytes(blake2b("\x1f".join(key).encode(), digest_size=8).digest(), "little")
+                          for key in keys), dtype=np.uint64, count=len(keys))
+    values[values == EMPTY_SLOT] = 1  # Zero is reserved for empty slots
+    return values
+
+
+def first_occurrences(values):
+    """Find the first occurrence of each value in an array
+    :param values: NumPy array
+    :return: Boolean array whether each element is the first occurrence
+    """
+    _, first_idx = np.unique(values, return_index=True)
+    is_first = np.zeros(len(values), dtype=bool)
+    is_first[first_idx] = True
+    return is_first
+
+
+class ExactDedupe:
+    """Exact de-duplication with a set of key tuples
+    """
+
+    def __init__(self):
+        self.keys = set()
+
+    def filter(self, keys):
+        """Check whether transaction keys appear for the first time and remember them
+        :param keys: List of tuples of strings (or fingerprints)
+        :return: List of flags whether each key is new
+        """
+        flags = list()
+        for key in keys:
+            if key in self.keys:
+                flags.append(False)
+            else:
+                self.keys.add(key)
+                flags.append(True)
+        return flags
+
+    def filter_values(self, values):
+        """Check whether fingerprints of transaction keys appear for the first time and remember them
+        :param values: NumPy uint64 array of fingerprints
+        :return: List of flags whether each fingerprint is new
+        """
+        return self.filter(values.tolist())
+
+    def finalize(self, csv_file):
+        pass
+
+
+class FingerprintDedupe:
+    """De-duplication with 64-bit fingerprints in an open-addressing (linear probing) hash table.
+    Each transaction takes 8-16 bytes. Fingerprint collisions are practically negligible
+    (about n^2 / 2^65 for n distinct transactions).
+    """
+
+    def __init__(self, max_memory_mb=DEFAULT_MEMORY_MB, initial_capacity=2 ** 20):
+        self.max_capacity = 1 << max(int(max_memory_mb * 1024 * 1024 // 8).bit_length() - 1, 4)
+        self.table = np.zeros(min(initial_capacity, self.max_capacity), dtype=np.uint64)
+        self.num_keys = 0
+
+    def _insert(self, values):
+        """Insert distinct fingerprints into the table
+        :param values: Distinct fingerprints
+        :return: Boolean array whether each fingerprint is new
+        """
+        mask = np.uint64(len(self.table) - 1)
+        slots = values & mask
+        is_new = np.zeros(len(values), dtype=bool)
+        pending = np.arange(len(values))
+        while len(pending) > 0:
+            stored = self.table[slots[pending]]
+            found = stored == values[pending]  # Already in the table
+            empty = stored == EMPTY_SLOT
+            # Write fingerprints to empty slots; only one of fingerprints with the same slot wins
+            candidates = pending[empty]
+            self.table[slots[candidates]] = values[candidates]
+            won = self.table[slots[candidates]] == values[candidates]
+            is_new[candidates[won]] = True
+            done = found.copy()
+            done[np.flatnonzero(empty)[won]] = True
+            # Others go to the next slot (linear probing)
+            pending = pending[~done]
+            slots[pending] = (slots[pending] + np.uint64(1)) & mask
+        self.num_keys += int(is_new.sum())
+        return is_new
+
+    def _grow(self, num_new):
+        capacity = len(self.table)
+        while (self.num_keys + num_new) > capacity * MAX_LOAD_FACTOR:
+            capacity *= 2
+        if capacity == len(self.table):
+            return
+        if capacity > self.max_capacity:
+            raise MemoryError("Fingerprint table exceeds the memory limit (%d transactions). "
+                              "Increase the memory limit or use the external de-duplication." % self.num_keys)
+        old_values = self.table[self.table != EMPTY_SLOT]
+        self.table = np.zeros(capacity, dtype=np.uint64)
+        self.num_keys = 0
+        self._insert(old_values)
+
+    def filter(self, keys):
+        """Check whether transaction keys appear for the first time and remember them
+        :param keys: List of tuples of strings
+        :return: List of flags whether each key is new
+        """
+        return self.filter_values(fingerprints(keys))
+
+    def filter_values(self, values):
+        """Check whether fingerprints of transaction keys appear for the first time and remember them
+        :param values: NumPy uint64 array of fingerprints
+        :return: List of flags whether each fingerprint is new
+        """
+        if len(values) == 0:
+            return list()
+        is_first = first_occurrences(values)
+        self._grow(int(is_first.sum()))
+        is_new = np.zeros(len(values), dtype=bool)
+        is_new[is_first] = self._insert(values[is_first])
+        return is_new.tolist()
+
+    def finalize(self, csv_file):
+        pass
+
+
+class BloomDedupe:
+    """Approximate de-duplication with a Bloom filter of a fixed size.
+    A distinct transaction is dropped if all of its bits are already set (false positive).
+    """
+
+    def __init__(self, max_memory_mb=DEFAULT_MEMORY_MB, num_hashes=DEFAULT_BLOOM_HASHES):
+        self.num_bits = 1 << max(int(max_memory_mb * 1024 * 1024 * 8).bit_length() - 1, 6)
+        self.bits = np.zeros(self.num_bits // 8, dtype=np.uint8)
+        self.num_hashes = num_hashes
+
+    def _positions(self, values):
+        """Bit positions of fingerprints with double hashing
+        :return: 2-D array (fingerprints x hash functions) of bit positions
+        """
+        h1 = values & np.uint64(0xFFFFFFFF)
+        h2 = (values >> np.uint64(32)) | np.uint64(1)
+        steps = np.arange(self.num_hashes, dtype=np.uint64)
+        return (h1[:, None] + steps[None, :] * h2[:, None]) & np.uint64(self.num_bits - 1)
+
+    def filter(self, keys):
+        """Check whether transaction keys (probably) appear for the first time and remember them
+        :param keys: List of tuples of strings
+        :return: List of flags whether each key is new
+        """
+        return self.filter_values(fingerprints(keys))
+
+    def filter_values(self, values):
+        """Check whether fingerprints of transaction keys (probably) appear for the first time and remember them
+        :param values: NumPy uint64 array of fingerprints
+        :return: List of flags whether each fingerprint is new
+        """
+        if len(values) == 0:
+            return list()
+        positions = self._positions(values)
+        bytes_idx = (positions >> np.uint64(3)).astype(np.int64)
+        bit_masks = np.left_shift(1, (positions & np.uint64(7)).astype(np.uint8)).astype(np.uint8)
+        seen = np.all(self.bits[bytes_idx] & bit_masks, axis=1)
+        is_new = first_occurrences(values) & ~seen
+        np.bitwise_or.at(self.bits, bytes_idx[is_new].ravel(), bit_masks[is_new].ravel())
+        return is_new.tolist()
+
+    def finalize(self, csv_file):
+        pass
+
+
+class ExternalDedupe:
+    """Exact de-duplication which spills fingerprints to disk.
+    All rows are written first, and duplicated rows (except for the first occurrence) are removed
+    from the output CSV file in `finalize` by reading fingerprint partitions one by one.
+    Each output CSV row must be one line.
+    """
+
+    def __init__(self, max_memory_mb=DEFAULT_MEMORY_MB, tmp_dir=None):
+        self.buffer_size = max(int(max_memory_mb * 1024 * 1024 // 16), 1024)  # Fingerprint and row sequence
+        self.work_dir = tempfile.mkdtemp(prefix="dedupe_", dir=tmp_dir)
+        self.values = list()
+        self.num_buffered = 0
+        self.num_rows = 0
+
+    def _spill(self):
+        if self.num_buffered == 0:
+            return
+        values = np.concatenate(self.values)
+        seqs = np.arange(self.num_rows - len(values), self.num_rows, dtype=np.int64)
+        parts = (values >> np.uint64(58)).astype(np.int64) % NUM_PARTITIONS
+        order = np.argsort(parts, kind="stable")
+        bounds = np.searchsorted(parts[order], np.arange(NUM_PARTITIONS + 1))
+        for part in range(NUM_PARTITIONS):
+            idx = order[bounds[part]:bounds[part + 1]]
+            if len(idx) == 0:
+                continue
+            with open(os.path.join(self.work_dir, "part%d.bin" % part), "ab") as wf:
+                np.stack([values[idx], seqs[idx].astype(np.uint64)], axis=1).tofile(wf)
+        self.values = list()
+        self.num_buffered = 0
+
+    def filter(self, keys):
+        """Record transaction keys; all rows are kept until `finalize`
+        :param keys: List of tuples of strings
+        :return: List of flags (all True)
+        """
+        return self.filter_values(fingerprints(keys))
+
+    def filter_values(self, values):
+        """Record fingerprints of transaction keys; all rows are kept until `finalize`
+        :param values: NumPy uint64 array of fingerprints
+        :return: List of flags (all True)
+        """
+        self.values.append(values)
+        self.num_buffered += len(values)
+        self.num_rows += len(values)
+        if self.num_buffered >= self.buffer_size:
+            self._spill()
+        return [True] * len(values)
+
+    def __getstate__(self):
+        """Spill buffered fingerprints and record the sizes of spill files (for checkpoints)
+        """
+        self._spill()
+        state = self.__dict__.copy()
+        state["part_sizes"] = {name: os.path.getsize(os.path.join(self.work_dir, name))
+                               for name in os.listdir(self.work_dir)}
+        return state
+
+    def __setstate__(self, state):
+        """Restore the state of a checkpoint, truncating fingerprints spilled after it
+        """
+        part_sizes = state.pop("part_sizes")
+        self.__dict__.update(state)
+        for name in os.listdir(self.work_dir):
+            path = os.path.join(self.work_dir, name)
+            if name in part_sizes:
+                with open(path, "r+b") as f:
+                    f.truncate(part_sizes[name])
+            else:
+                os.remove(path)
+
+    def duplicated_rows(self):
+        """Get sequence numbers of duplicated rows (except for the first occurrence)
+        :return: Sorted NumPy int64 array of row sequence numbers
+        """
+        self._spill()
+        duplicated = list()
+        for part in range(NUM_PARTITIONS):
+            part_file = os.path.join(self.work_dir, "part%d.bin" % part)
+            if not os.path.exists(part_file):
+                continue
+            pairs = np.fromfile(part_file, dtype=np.uint64).reshape(-1, 2)
+            order = np.lexsort((pairs[:, 1], pairs[:, 0]))  # By fingerprint, then row sequence
+            values = pairs[order, 0]
+            is_dup = np.zeros(len(values), dtype=bool)
+            is_dup[1:] = values[1:] == values[:-1]
+            duplicated.append(pairs[order[is_dup], 1].astype(np.int64))
+        if not duplicated:
+            return np.zeros(0, dtype=np.int64)
+        return np.sort(np.concatenate(duplicated))
+
+    def finalize(self, csv_file):
+        """Remove duplicated rows from the output CSV file (the first line is the header)
+        :param csv_file: Output CSV file path which has been closed
+        :return: Sorted NumPy array of the sequence numbers of removed rows
+        """
+        duplicated = self.duplicated_rows()
+        if len(duplicated) > 0:
+            tmp_file = csv_file + ".dedupe"
+            with open(csv_file, "r", newline="") as rf, open(tmp_file, "w", newline="") as wf:
+                wf.write(rf.readline())  # Header
+                dup_iter = iter(duplicated.tolist())
+                next_dup = next(dup_iter, -1)
+                for seq, line in enumerate(rf):
+                    if seq == next_dup:
+                        next_dup = next(dup_iter, -1)
+                        continue
+                    wf.write(line)
+            os.replace(tmp_file, csv_file)
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+        return duplicated
+
+
+DEDUPE_STRATEGIES = {
+    "exact": ExactDedupe,
+    "fingerprint": FingerprintDedupe,
+    "bloom": BloomDedupe,
+    "external": ExternalDedupe,
+}
+
+
+def create_dedupe(name, max_memory_mb=DEFAULT_MEMORY_MB, tmp_dir=None):
+    """Create a de-duplication strategy
+    :param name: Strategy name (one of DEDUPE_STRATEGIES)
+    :param max_memory_mb: Memory limit in MiB (not applied to the exact strategy)
+    :param tmp_dir: Directory of spill files of the external strategy
+    :return: Strategy object with filter(keys), filter_values(fingerprints) and finalize(csv_file) methods
+    (finalize returns the sequence numbers of rows removed from the file, or None if no row is removed)
+    """
+    if name not in DEDUPE_STRATEGIES:
+        raise KeyError("De-duplication strategy (%s) must be one of %s" % (name, str(list(DEDUPE_STRATEGIES))))
+    if name == "exact":
+        return ExactDedupe()
+    if name == "external":
+        return ExternalDedupe(max_memory_mb, tmp_dir)
+    return DEDUPE_STRATEGIES[name](max_memory_mb)
@@ -0,0 +1,114 @@
+"""
+Streaming census of in/out-degrees and fan-in/fan-out patterns of the converted transactions.
+
+Account IDs are mapped to dense indices as transactions are converted, and each distinct
+originator-beneficiary pair is encoded as a single 64-bit integer (originator index in the upper 32 bits).
+Pending pairs are de-duplicated with a sort-unique when they grow large and at the end,
+and degrees are counted with np.bincount instead of sets of neighbors for each account.
+"""
+
+import csv
+import json
+
+import numpy as np
+
+
+DEFAULT_COMPACT_PAIRS = 1 << 22  # Number of pending pairs de-duplicated at once
+FAN_CSV_HEADER = ["threshold", "fan_in", "fan_out"]
+INDEX_BITS = 32
+INDEX_MASK = (1 << INDEX_BITS) - 1
+
+
+class DegreeCensus:
+    """Distinct originator-beneficiary pairs of transactions and the degrees of accounts
+    """
+
+    def __init__(self, compact_pairs=DEFAULT_COMPACT_PAIRS):
+        """
+        :param compact_pairs: Number of pending pairs which triggers de-duplication
+        """
+        self.compact_pairs = compact_pairs
+        self.accounts = dict()  # Account ID --> Dense index (in the order of appearance)
+        self.pairs = np.zeros(0, dtype=np.int64)  # Sorted distinct pair codes
+        self.pending = list()  # Arrays of pair codes not yet de-duplicated
+        self.num_pending = 0
+
+    def index(self, acct_ids):
+        """Get dense indices of accounts, adding new accounts
+        :param acct_ids: List of account IDs
+        :return: NumPy array of indices
+        """
+        accounts = self.accounts
+        return np.fromiter((accounts.setdefault(acct_id, len(accounts)) for acct_id in acct_ids),
+                           dtype=np.int64, count=len(acct_ids))
+
+    def add_pairs(self, orig_ids, dest_ids):
+        """Add originator-beneficiary pairs of transactions
+        :param orig_ids: List of originator account IDs
+        :param dest_ids: List of beneficiary account IDs (same length)
+        """
+        if len(orig_ids) == 0:
+            return
+        self._add_codes((self.index(orig_ids) << INDEX_BITS) | self.index(dest_ids))
+
+    def _add_codes(self, codes):
+        self.pending.append(codes)
+        self.num_pending += len(codes)
+        if self.num_pending >= self.compact_pairs:
+            self.compact()
+
+    def compact(self):
+        """De-duplicate pending pairs"""
+        if self.pending:
+            self.pairs = np.unique(np.concatenate([self.pairs] + self.pending))
+            self.pending = list()
+            self.num_pending = 0
+
+    def merge(self, other):
+        """Add pairs of another census (e.g. of a chunk converted by a worker process)
+        :param other: DegreeCensus object
+        """
+        other.compact()
+        remap = self.index(list(other.accounts))  # Indices of the other census --> Indices of this census
+        if len(other.pairs) > 0:
+            self._add_codes((remap[other.pairs >> INDEX_BITS] << INDEX_BITS) | remap[other.pairs & INDEX_MASK])
+
+    def num_pairs(self):
+        self.compact()
+        return len(self.pairs)
+
+    def degrees(self):
+        """Count in-degrees and out-degrees (distinct neighbors) of accounts
+        :return: In-degree and out-degree arrays in the order of account indices
+        """
+        self.compact()
+        num_accounts = len(self.accounts)
+        out_deg = np.bincount(self.pairs >> INDEX_BITS, minlength=num_accounts)
+        in_deg = np.bincount(self.pairs & INDEX_MASK, minlength=num_accounts)
+        return in_deg, out_deg
+
+    def fan_counts(self, max_threshold):
+        """Count fan-in and fan-out patterns (accounts with at least the threshold number of neighbors)
+        :param max_threshold: Maximum threshold of neighbors
+        :return: List of (threshold, number of fan-in accounts, number of fan-out accounts) from 2 neighbors
+        """
+        in_deg, out_deg = self.degrees()
+        # Number of accounts whose degree is at least d: reverse cumulative sum of the degree histogram
+        in_atleast = np.cumsum(np.bincount(in_deg, minlength=max_threshold + 1)[::-1])[::-1]
+        out_atleast = np.cumsum(np.bincount(out_deg, minlength=max_threshold + 1)[::-1])[::-1]
+        return [(th, int(in_atleast[th]), int(out_atleast[th])) for th in range(2, max_threshold + 1)]
+
+    def write_report(self, report_file, max_threshold):
+        """Write fan-in/fan-out counts as a CSV file, or a JSON file if the file name ends with ".json"
+        :param report_file: Output file path
+        :param max_threshold: Maximum threshold of neighbors
+        """
+        rows = self.fan_counts(max_threshold)
+        with open(report_file, "w") as wf:
+            if report_file.endswith(".json"):
+                json.dump({"accounts": len(self.accounts), "pairs": self.num_pairs(),
+                           "fan_in_out": [dict(zip(FAN_CSV_HEADER, row)) for row in rows]}, wf, indent=2)
+            else:
+                writer = csv.writer(wf)
+                writer.writerow(FAN_CSV_HEADER)
+                writer.writerows(rows)
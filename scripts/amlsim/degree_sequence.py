@@ -0,0 +1,108 @@
+"""
+Degree sequence parameter (degree.csv) utilities.
+
+Each row of degree.csv has the number of account vertices ("Count") with the given pair of
+in-degree and out-degree, which is the format `get_degrees` of the transaction graph generator loads.
+"""
+
+import csv
+import numpy as np
+
+
+DEGREE_CSV_HEADER = ["Count", "In-degree", "Out-degree"]
+
+
+def count_joint_degrees(in_deg, out_deg):
+    """Count vertices for each pair of in-degree and out-degree
+    :param in_deg: In-degree of each vertex (array-like)
+    :param out_deg: Out-degree of each vertex (array-like)
+    :return: Number of vertices, in-degree and out-degree as NumPy arrays sorted by the degree pair
+    """
+    in_deg = np.asarray(in_deg, dtype=np.int64)
+    out_deg = np.asarray(out_deg, dtype=np.int64)
+    if len(in_deg) != len(out_deg):
+        raise ValueError("The length of in-degree (%d) and out-degree (%d) sequences must be same."
+                         % (len(in_deg), len(out_deg)))
+    if len(in_deg) == 0:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, empty
+
+    base = int(out_deg.max()) + 1
+    keys, counts = np.unique(in_deg * base + out_deg, return_counts=True)
+    return counts, keys // base, keys % base
+
+
+def merge_degree_rows(counts, in_deg, out_deg):
+    """Merge rows with the same pair of in-degree and out-degree and remove empty rows
+    :return: Number of vertices, in-degree and out-degree arrays
+    """
+    base = int(out_deg.max()) + 2
+    keys, inverse = np.unique(in_deg * base + out_deg, return_inverse=True)
+    merged = np.bincount(inverse, weights=counts).astype(np.int64)
+    nonzero = merged > 0
+    return merged[nonzero], (keys // base)[nonzero], (keys % base)[nonzero]
+
+
+def balance_degrees(counts, in_deg, out_deg):
+    """Make the sum of in-degrees and out-degrees same by incrementing the degree of some vertices.
+    The vertices are taken from the most frequent rows so that the distribution shape is kept.
+    :return: Number of vertices, in-degree and out-degree arrays
+    """
+    diff = int((counts * in_deg).sum() - (counts * out_deg).sum())
+    while diff != 0:
+        counts = counts.copy()
+        new_counts, new_in, new_out = list(), list(), list()
+        remaining = abs(diff)
+        for i in np.argsort(-counts, kind="stable"):
+            if remaining == 0:
+                break
+            num = min(int(counts[i]), remaining)
+            counts[i] -= num
+            new_counts.append(num)
+            if diff > 0:  # Not enough out-degrees
+                new_in.append(in_deg[i])
+                new_out.append(out_deg[i] + 1)
+            else:  # Not enough in-degrees
+                new_in.append(in_deg[i] + 1)
+                new_out.append(out_deg[i])
+            remaining -= num
+
+        counts = np.concatenate([counts, np.array(new_counts, dtype=np.int64)])
+        in_deg = np.concatenate([in_deg, np.array(new_in, dtype=np.int64)])
+        out_deg = np.concatenate([out_deg, np.array(new_out, dtype=np.int64)])
+        counts, in_deg, out_deg = merge_degree_rows(counts, in_deg, out_deg)
+        diff = int((counts * in_deg).sum() - (counts * out_deg).sum())
+    return counts, in_deg, out_deg
+
+
+def write_degree_csv(deg_csv, counts, in_deg, out_deg):
+    """Write a degree distribution parameter CSV file
+    :param deg_csv: Output degree CSV file path
+    :param counts: Number of vertices of each row
+    :param in_deg: In-degree of each row
+    :param out_deg: Out-degree of each row
+    """
+    with open(deg_csv, "w") as wf:
+        writer = csv.writer(wf)
+        writer.writerow(DEGREE_CSV_HEADER)
+        writer.writerows(zip(np.asarray(counts).tolist(), np.asarray(in_deg).tolist(),
+                             np.asarray(out_deg).tolist()))
+
+
+def load_degree_csv(deg_csv):
+    """Load a degree distribution parameter CSV file without expanding it to degree sequences
+    :param deg_csv: Degree CSV file path
+    :return: Number of vertices, in-degree and out-degree of each row as NumPy arrays
+    """
+    counts, in_deg, out_deg = list(), list(), list()
+    with open(deg_csv, "r") as rf:
+        reader = csv.reader(rf)
+        next(reader)
+        for row in reader:
+            if len(row) == 0 or row[0].startswith("#"):
+                continue
+            counts.append(int(row[0]))
+            in_deg.append(int(row[1]))
+            out_deg.append(int(row[2]))
+    return (np.array(counts, dtype=np.int64), np.array(in_deg, dtype=np.int64),
+            np.array(out_deg, dtype=np.int64))
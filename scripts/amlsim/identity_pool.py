@@ -0,0 +1,131 @@
+"""
+Synthetic identity pool for account enrichment.
+
+Generating names and addresses with Faker for every account row dominates the conversion time
+of large simulations. The pool generates (and parses) a fixed number of identities with Faker once,
+and each account draws its attributes from the pool with vectorized random indices.
+"""
+
+import numpy as np
+
+
+DEFAULT_POOL_SIZE = 10000  # Number of identities generated with Faker
+DEFAULT_BLOCK_SIZE = 65536  # Number of identities drawn at once
+
+# Valid SSN space: area 001-899 except 666, group 01-99 and serial 0001-9999
+SSN_AREAS = np.array([a for a in range(1, 900) if a != 666])
+SSN_GROUPS = 99
+SSN_SERIALS = 9999
+SSN_SPACE = len(SSN_AREAS) * SSN_GROUPS * SSN_SERIALS
+SSN_MULTIPLIER = 48271  # Coprime with SSN_SPACE, so that (a * i + b) mod SSN_SPACE is a permutation
+
+
+def parse_address(address):
+    """Parse an address from Faker like "123 Main St\\nSpringfield, IL 12345"
+    :param address: Address string
+    :return: Street address, city, state and zip code (None if the address cannot be parsed)
+    """
+    lines = address.split("\n")
+    if len(lines) != 2:
+        return None
+    city_state = lines[1].split(", ")
+    if len(city_state) != 2:
+        return None
+    state_zip = city_state[1].split(" ")
+    if len(state_zip) != 2:
+        return None
+    return lines[0], city_state[0], state_zip[0], state_zip[1]
+
+
+def unique_ssn(indices, offset=0):
+    """Convert distinct integers to distinct SSNs with a bijection over the valid SSN space
+    :param indices: Distinct non-negative integer array (less than SSN_SPACE)
+    :param offset: Offset of the permutation (e.g. random seed)
+    :return: List of SSN strings like "123-45-6789"
+    """
+    indices = np.asarray(indices, dtype=np.int64)
+    if len(indices) > 0 and indices.max() >= SSN_SPACE:
+        raise ValueError("Number of unique SSNs must be less than %d" % SSN_SPACE)
+    keys = (indices * SSN_MULTIPLIER + offset) % SSN_SPACE
+    keys, serials = np.divmod(keys, SSN_SERIALS)
+    areas, groups = np.divmod(keys, SSN_GROUPS)
+    return ["%03d-%02d-%04d" % t for t in zip(SSN_AREAS[areas].tolist(), (groups + 1).tolist(),
+                                               (serials + 1).tolist())]
+
+
+class IdentityPool:
+    """Pool of parsed addresses, names, birth dates, SSNs and coordinates generated with Faker
+    """
+
+    def __init__(self, fake, size=DEFAULT_POOL_SIZE, seed=0, unique_ssn=False):
+        """
+        :param fake: Faker generator (e.g. Faker(['en_US'])['en_US'])
+        :param size: Number of identities in the pool
+        :param seed: Seed for drawing identities from the pool
+        :param unique_ssn: If True, every drawn identity has a distinct SSN instead of one from the pool
+        """
+        self.size = size
+        self.seed = seed
+        self.unique_ssn = unique_ssn
+        self.rng = np.random.RandomState(seed)
+        self.num_drawn = 0
+
+        addresses = list()
+        while len(addresses) < size:
+            address = parse_address(fake.address())
+            if address is not None:
+                addresses.append(address)
+        self.street_addrs, self.cities, self.states, self.zips = [np.array(c, dtype=object) for c in zip(*addresses)]
+        self.male_first_names = np.array([fake.first_name_male() for _ in range(size)], dtype=object)
+        self.female_first_names = np.array([fake.first_name_female() for _ in range(size)], dtype=object)
+        self.male_last_names = np.array([fake.last_name_male() for _ in range(size)], dtype=object)
+        self.female_last_names = np.array([fake.last_name_female() for _ in range(size)], dtype=object)
+        self.birth_dates = np.array([fake.date_of_birth() for _ in range(size)], dtype=object)
+        self.ssns = np.array([fake.ssn() for _ in range(size)], dtype=object)
+        self.lats = np.array([fake.latitude() for _ in range(size)], dtype=object)
+        self.lons = np.array([fake.longitude() for _ in range(size)], dtype=object)
+
+    def draw(self, num):
+        """Draw identities from the pool
+        :param num: Number of identities
+        :return: dict of attribute names and lists of values
+        """
+        def choose(values):
+            return values[self.rng.randint(0, self.size, num)].tolist()
+
+        is_male = self.rng.random_sample(num) < 0.5
+        addr_idx = self.rng.randint(0, self.size, num)  # Address components must be consistent
+        first_idx = self.rng.randint(0, self.size, num)
+        last_idx = self.rng.randint(0, self.size, num)
+        if self.unique_ssn:
+            ssns = unique_ssn(np.arange(self.num_drawn, self.num_drawn + num), self.seed or 0)
+        else:
+            ssns = choose(self.ssns)
+        self.num_drawn += num
+
+        return {
+            "gender": np.where(is_male, "Male", "Female").tolist(),
+            "first_name": np.where(is_male, self.male_first_names[first_idx],
+                                   self.female_first_names[first_idx]).tolist(),
+            "last_name": np.where(is_male, self.male_last_names[last_idx],
+                                  self.female_last_names[last_idx]).tolist(),
+            "street_addr": self.street_addrs[addr_idx].tolist(),
+            "city": self.cities[addr_idx].tolist(),
+            "state": self.states[addr_idx].tolist(),
+            "zip": self.zips[addr_idx].tolist(),
+            "birth_date": choose(self.birth_dates),
+            "ssn": ssns,
+            "lat": choose(self.lats),
+            "lon": choose(self.lons),
+        }
+
+    def identities(self, block_size=DEFAULT_BLOCK_SIZE):
+        """Generate identities one by one, drawing them from the pool block by block
+        :param block_size: Number of identities drawn at once
+        :return: Generator of dicts of attribute names and values
+        """
+        while True:
+            block = self.draw(block_size)
+            names = list(block.keys())
+            for values in zip(*block.values()):
+                yield dict(zip(names, values))
@@ -0,0 +1,109 @@
+"""
+Stage-level instrumentation (wall time, CPU time, peak RSS and memory allocations) of batch scripts.
+
+Each stage is measured with a context manager and the report is written as a JSON file,
+so that performance regressions can be tracked across runs and parameter sizes.
+"""
+
+import json
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+try:
+    import resource  # Not available on Windows
+except ImportError:
+    resource = None
+
+
+def get_peak_rss_mb():
+    """Get the peak resident set size of this process
+    :return: Peak RSS in MiB (None if unavailable)
+    """
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":  # Bytes on macOS, kilobytes on Linux
+        return max_rss / (1024 * 1024)
+    return max_rss / 1024
+
+
+class StageProfiler:
+    """Record wall time, CPU time, peak RSS and top memory allocators of each stage.
+    If disabled, stages are executed without any measurement.
+    """
+
+    def __init__(self, enabled=False, trace_malloc=True, top_n=10, counter=None):
+        """
+        :param enabled: Whether stages are measured
+        :param trace_malloc: Whether memory allocations are traced with tracemalloc
+        :param top_n: Number of top allocators (source lines) recorded for each stage
+        :param counter: Function which returns a dict of counts (e.g. nodes and edges) after each stage
+        """
+        self.enabled = enabled
+        self.trace_malloc = enabled and trace_malloc
+        self.top_n = top_n
+        self.counter = counter
+        self.stages = list()
+        self.start_time = time.time()
+        if self.trace_malloc and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def stage(self, name):
+        """Measure a stage
+        :param name: Stage name
+        """
+        if not self.enabled:
+            yield
+            return
+
+        snapshot = None
+        if self.trace_malloc:
+            tracemalloc.reset_peak()
+            snapshot = tracemalloc.take_snapshot()
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        yield
+        record = {
+            "name": name,
+            "wall_time_sec": time.perf_counter() - wall,
+            "cpu_time_sec": time.process_time() - cpu,
+            "peak_rss_mb": get_peak_rss_mb(),
+        }
+        if self.trace_malloc:
+            record["traced_peak_mb"] = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+            stats = tracemalloc.take_snapshot().compare_to(snapshot, "lineno")
+            record["top_allocators"] = [
+                {"location": "%s:%d" % (stat.traceback[0].filename, stat.traceback[0].lineno),
+                 "size_diff_kb": stat.size_diff / 1024, "count_diff": stat.count_diff}
+                for stat in stats[:self.top_n]]
+        if self.counter is not None:
+            record["counts"] = self.counter()
+        self.stages.append(record)
+
+    def report(self):
+        """Get the report of all measured stages
+        :return: Report as a dict
+        """
+        return {
+            "start_time": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.start_time)),
+            "total_wall_time_sec": sum(s["wall_time_sec"] for s in self.stages),
+            "total_cpu_time_sec": sum(s["cpu_time_sec"] for s in self.stages),
+            "peak_rss_mb": get_peak_rss_mb(),
+            "stages": self.stages,
+        }
+
+    def write(self, report_file):
+        """Write the report to a JSON file (nothing is written if disabled)
+        :param report_file: Output JSON file path
+        """
+        if not self.enabled:
+            return
+        dir_name = os.path.dirname(report_file)
+        if dir_name:
+            os.makedirs(dir_name, exist_ok=True)
+        with open(report_file, "w") as wf:
+            json.dump(self.report(), wf, indent=2)
@@ -0,0 +1,71 @@
+"""
+Split a large CSV log file into byte-range chunks aligned on newlines,
+so that each chunk can be parsed independently (e.g. by worker processes).
+Binary transaction logs (amlsim.binary_log) are split into chunks aligned on records.
+"""
+
+import csv
+import io
+import os
+
+from amlsim.binary_log import BinaryLogRows, is_binary_log, split_record_chunks, HEADER_SIZE
+from amlsim.tx_log_reader import TX_LOG_COLUMNS
+
+
+DEFAULT_CHUNK_MB = 64  # Size of each chunk in MiB
+
+
+def read_header(csv_file):
+    """Read the header of a CSV file
+    :param csv_file: CSV file path
+    :return: Header as a list of column names and the byte offset of the first data row
+    """
+    if is_binary_log(csv_file):  # Fixed columns of the transaction log
+        return list(TX_LOG_COLUMNS), HEADER_SIZE
+    with open(csv_file, "rb") as rf:
+        line = rf.readline()
+        offset = rf.tell()
+    header = next(csv.reader([line.decode()]))
+    return header, offset
+
+
+def split_chunks(csv_file, chunk_bytes=DEFAULT_CHUNK_MB * 1024 * 1024, start=None):
+    """Split data rows of a CSV file into byte ranges which begin and end at newlines
+    :param csv_file: CSV file path
+    :param chunk_bytes: Approximate size of each chunk in bytes
+    :param start: Byte offset of the first row to split (beginning of a line; None: the first data row)
+    :return: List of (start, end) byte offsets (end is exclusive)
+    """
+    if is_binary_log(csv_file):
+        return split_record_chunks(csv_file, chunk_bytes, start)
+    _, offset = read_header(csv_file)
+    if start is not None:
+        offset = start
+    file_size = os.path.getsize(csv_file)
+    chunks = list()
+    with open(csv_file, "rb") as rf:
+        start = offset
+        while start < file_size:
+            end = min(start + chunk_bytes, file_size)
+            if end < file_size:
+                rf.seek(end - 1)
+                rf.readline()  # Move to the beginning of the next line
+                end = rf.tell()
+            chunks.append((start, end))
+            start = end
+    return chunks
+
+
+def read_chunk(csv_file, start, end):
+    """Read rows in a byte range of a CSV file
+    :param csv_file: CSV file path
+    :param start: Start byte offset (beginning of a line)
+    :param end: End byte offset (beginning of a line or end of the file)
+    :return: csv.reader of the rows in the range
+    """
+    if is_binary_log(csv_file):
+        return iter(BinaryLogRows(csv_file, start, end))
+    with open(csv_file, "rb") as rf:
+        rf.seek(start)
+        data = rf.read(end - start)
+    return csv.reader(io.StringIO(data.decode(), newline=""))
@@ -0,0 +1,66 @@
+"""
+Follow a CSV log file which is still being appended by the simulator (like "tail -f").
+
+The Java simulator appends transaction rows to the log file block by block and writes the counter log
+after the last block. Complete lines are yielded as soon as they are appended, so that the conversion
+overlaps with the simulation. The log is finished when the counter log is newer than the transaction log.
+"""
+
+import os
+import time
+
+
+DEFAULT_POLL_INTERVAL = 1.0  # Seconds between checks of new data
+READ_SIZE = 1 << 22  # Bytes read at once
+
+
+def counter_log_written(log_file, counter_file):
+    """Get a function which checks whether the simulator has finished writing the log file
+    :param log_file: Transaction log file path
+    :param counter_file: Counter log file path (written after the last block of the transaction log)
+    :return: Function () -> bool
+    """
+    def done():
+        try:
+            return os.path.getmtime(counter_file) >= os.path.getmtime(log_file)
+        except OSError:  # Either file does not exist yet
+            return False
+    return done
+
+
+def follow_lines(log_file, done, poll_interval=DEFAULT_POLL_INTERVAL, timeout=None):
+    """Yield complete lines of a file while it is being appended
+    :param log_file: Log file path (it may not exist yet)
+    :param done: Function which returns True after the last line is appended
+    :param poll_interval: Seconds between checks of new data
+    :param timeout: Seconds without new data until TimeoutError is raised (None: wait forever)
+    :return: Generator of lines (str including the newline)
+    """
+    last_update = time.time()
+    while not os.path.exists(log_file):
+        if timeout is not None and time.time() - last_update > timeout:
+            raise TimeoutError("Log file is not created: %s" % log_file)
+        time.sleep(poll_interval)
+
+    with open(log_file, "rb") as rf:
+        pending = b""  # Incomplete last line
+        while True:
+            finished = done()  # Check before reading, so that the last block is read after completion
+            data = rf.read(READ_SIZE)
+            if data:
+                last_update = time.time()
+                lines = (pending + data).split(b"\n")
+                pending = lines.pop()
+                for line in lines:
+                    yield line.decode() + "\n"
+                continue
+
+            if finished:
+                if pending:
+                    yield pending.decode()
+                return
+            if os.path.getsize(log_file) < rf.tell():
+                raise RuntimeError("Log file is truncated while following: %s" % log_file)
+            if timeout is not None and time.time() - last_update > timeout:
+                raise TimeoutError("No data is appended to %s for %d seconds" % (log_file, timeout))
+            time.sleep(poll_interval)
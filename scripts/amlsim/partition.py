@@ -0,0 +1,168 @@
+"""
+Partitioned CSV outputs (e.g. transactions by originator bank and step window).
+
+Rows are routed to partition directories in the Hive style like "orig_bank=bank0/steps=0-29/transactions.csv",
+so that per-bank pipelines (and readers such as pyarrow.dataset or Spark) read only their slice.
+Partition files are opened lazily and the least recently used files are closed
+when the number of open files exceeds the limit. The converter writes partitions along with the output lists,
+and records the sizes of partition files in its checkpoints so that a resumed conversion continues them.
+"""
+
+import csv
+import os
+from collections import OrderedDict
+
+
+DEFAULT_MAX_OPEN_FILES = 64  # Maximum number of partition files opened at once
+UNKNOWN = "unknown"  # Partition value of unknown banks and steps
+
+
+def partition_key(orig_bank, bene_bank=None, step=None, step_window=0):
+    """Get the relative directory of a partition
+    :param orig_bank: Bank ID of the originator
+    :param bene_bank: Bank ID of the beneficiary (None: not partitioned by beneficiary banks)
+    :param step: Simulation step of the row (None: unknown)
+    :param step_window: Number of steps in each window (0: not partitioned by steps)
+    :return: Relative directory path
+    """
+    key = "orig_bank=%s" % orig_bank
+    if bene_bank is not None:
+        key += "/bene_bank=%s" % bene_bank
+    if step_window:
+        if step is None:
+            key += "/steps=%s" % UNKNOWN
+        else:
+            start = step - step % step_window
+            key += "/steps=%d-%d" % (start, start + step_window - 1)
+    return key
+
+
+class PartitionedCSVWriter:
+    """Write CSV rows into partition files with a bounded number of open file handles
+    """
+
+    def __init__(self, root_dir, file_name, header, max_open_files=DEFAULT_MAX_OPEN_FILES):
+        """
+        :param root_dir: Root directory of partitions
+        :param file_name: File name in each partition directory
+        :param header: CSV header written to each partition file
+        :param max_open_files: Maximum number of partition files opened at once
+        """
+        self.root_dir = root_dir
+        self.file_name = file_name
+        self.header = header
+        self.max_open_files = max(max_open_files, 1)
+        self.handles = OrderedDict()  # Partition key -> (file object, CSV writer) in the order of use
+        self.created = set()  # Partition keys whose files have been created
+        self.num_opens = 0  # Number of file opens (including reopens of closed partitions)
+
+    def _open(self, key):
+        if len(self.handles) >= self.max_open_files:
+            _, (lru_f, _) = self.handles.popitem(last=False)  # Close the least recently used file
+            lru_f.close()
+        path = os.path.join(self.root_dir, key, self.file_name)
+        if key in self.created:
+            f = open(path, "a")
+            writer = csv.writer(f)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            f = open(path, "w")
+            writer = csv.writer(f)
+            writer.writerow(self.header)
+            self.created.add(key)
+        self.num_opens += 1
+        self.handles[key] = (f, writer)
+        return writer
+
+    def writerow(self, key, row):
+        """Write a row to a partition
+        :param key: Partition key (relative directory path)
+        :param row: CSV row
+        """
+        entry = self.handles.get(key)
+        if entry is None:
+            writer = self._open(key)
+        else:
+            self.handles.move_to_end(key)
+            writer = entry[1]
+        writer.writerow(row)
+
+    def sync(self):
+        """Flush the partition files to disk (e.g. before a checkpoint)
+        :return: dict of the absolute paths and sizes of the created partition files
+        """
+        for f, _ in self.handles.values():
+            f.flush()
+        sizes = dict()
+        for key in self.created:
+            path = os.path.abspath(os.path.join(self.root_dir, key, self.file_name))
+            fd = os.open(path, os.O_RDONLY)  # Closed partitions have been flushed but not synced
+            try:
+                os.fsync(fd)
+                sizes[path] = os.fstat(fd).st_size
+            finally:
+                os.close(fd)
+        return sizes
+
+    def resume(self, sizes):
+        """Continue partition files which have been truncated to a checkpoint.
+        Partition files created after the checkpoint are removed.
+        :param sizes: dict of the absolute paths and sizes of output files at the checkpoint
+        """
+        for dir_path, _, names in os.walk(self.root_dir):
+            if self.file_name not in names:
+                continue
+            path = os.path.abspath(os.path.join(dir_path, self.file_name))
+            if path in sizes:
+                self.created.add(os.path.relpath(dir_path, self.root_dir).replace(os.sep, "/"))
+            else:
+                os.remove(path)
+
+    def close(self):
+        for f, _ in self.handles.values():
+            f.close()
+        self.handles.clear()
+
+    def partitions(self):
+        """Get the list of created partitions
+        :return: Sorted list of partition keys
+        """
+        return sorted(self.created)
+
+
+class TransactionPartitionWriter(PartitionedCSVWriter):
+    """Write transaction rows into partitions by the banks of their accounts and their step windows
+    """
+
+    def __init__(self, root_dir, file_name, header, acct_banks, indices, bank_pair=False, step_window=0,
+                 step_of=None, max_open_files=DEFAULT_MAX_OPEN_FILES):
+        """
+        :param root_dir: Root directory of partitions
+        :param file_name: File name in each partition directory
+        :param header: CSV header written to each partition file
+        :param acct_banks: dict of account IDs and bank IDs (as CSV values)
+        :param indices: Column indices of the originator ID, beneficiary ID and timestamp
+        :param bank_pair: Whether rows are also partitioned by beneficiary banks
+        :param step_window: Number of steps in each window (0: not partitioned by steps)
+        :param step_of: Function from a timestamp to a step (or None if unknown)
+        :param max_open_files: Maximum number of partition files opened at once
+        """
+        super().__init__(root_dir, file_name, header, max_open_files)
+        self.acct_banks = acct_banks
+        self.orig_idx, self.dest_idx, self.time_idx = indices
+        self.bank_pair = bank_pair
+        self.step_window = step_window
+        self.step_of = step_of
+
+    def write_tx(self, row):
+        """Write a transaction row to its partition
+        :param row: CSV row
+        """
+        orig_bank = self.acct_banks.get(str(row[self.orig_idx]), UNKNOWN)
+        bene_bank = self.acct_banks.get(str(row[self.dest_idx]), UNKNOWN) if self.bank_pair else None
+        step = self.step_of(str(row[self.time_idx])) if self.step_window else None
+        self.writerow(partition_key(orig_bank, bene_bank, step, self.step_window), row)
+
+    def write_txs(self, rows):
+        for row in rows:
+            self.write_tx(row)
@@ -0,0 +1,79 @@
+"""
+Vectorized party stage of the converter: parties (individuals and organizations) of accounts,
+account-party mappings and resolved entities.
+
+Accounts are grouped into parties as runs of consecutive accounts whose sizes follow a geometric distribution
+(one account per party by default), so that all accounts of a party share the identity of the party.
+If blocking keys are set, parties which are the same entity are linked with a blocking index: parties are grouped
+by the values of identity attributes (e.g. the same SSN) with a sort, and every party of a block is linked
+to the first party of the block, instead of comparing all pairs of parties. No keys are set by default,
+because identities are drawn from a bounded pool and unrelated parties share attributes of the same identity.
+"""
+
+import numpy as np
+
+
+DEFAULT_INDIVIDUAL_RATIO = 0.5  # Ratio of individuals to all parties
+DEFAULT_ACCOUNTS_PER_PARTY = 1.0  # Average number of accounts of each party
+DEFAULT_BLOCK_KEYS = []  # Identity attributes of the same entity (none: no resolved entities)
+KEY_SEPARATOR = "\x1f"
+
+
+def assign_parties(num_accounts, rng, accounts_per_party=DEFAULT_ACCOUNTS_PER_PARTY):
+    """Group consecutive accounts into parties
+    :param num_accounts: Number of accounts
+    :param rng: NumPy RandomState
+    :param accounts_per_party: Average number of accounts of each party (1: one party per account)
+    :return: NumPy int64 array of the party index of each account (non-decreasing from 0)
+    """
+    if accounts_per_party <= 1:
+        return np.arange(num_accounts, dtype=np.int64)
+    sizes = rng.geometric(1.0 / accounts_per_party, num_accounts)
+    ends = np.cumsum(sizes)
+    num_parties = int(np.searchsorted(ends, num_accounts)) + 1  # Parties which cover all accounts
+    return np.repeat(np.arange(num_parties, dtype=np.int64), sizes[:num_parties])[:num_accounts]
+
+
+def assign_kinds(num_parties, rng, individual_ratio=DEFAULT_INDIVIDUAL_RATIO):
+    """Choose individuals and organizations
+    :param num_parties: Number of parties
+    :param rng: NumPy RandomState
+    :param individual_ratio: Probability that a party is an individual
+    :return: NumPy boolean array (True: individual, False: organization)
+    """
+    return rng.random_sample(num_parties) < individual_ratio
+
+
+def block_codes(party_keys, names):
+    """Get block codes of parties from the values of identity attributes
+    :param party_keys: dict of attribute names and lists of values of each party
+    :param names: Attribute names of the blocking key
+    :return: NumPy int64 array of block codes (parties with the same values have the same code)
+    """
+    if len(names) == 1:
+        keys = party_keys[names[0]]
+    else:
+        keys = [KEY_SEPARATOR.join(map(str, values)) for values in zip(*[party_keys[name] for name in names])]
+    codes = dict()  # Key --> Block code (in the order of appearance)
+    return np.fromiter((codes.setdefault(key, len(codes)) for key in keys), dtype=np.int64, count=len(keys))
+
+
+def resolve_entities(party_keys, block_keys=DEFAULT_BLOCK_KEYS):
+    """Link parties which have the same values of any blocking key
+    :param party_keys: dict of attribute names and lists of values of each party
+    :param block_keys: List of blocking keys (lists of attribute names)
+    :return: Arrays of the first and second party indices of links, sorted by the first and second indices
+    """
+    num_parties = len(next(iter(party_keys.values()))) if party_keys else 0
+    links = [np.zeros(0, dtype=np.int64)]
+    for names in block_keys:
+        codes = block_codes(party_keys, names)
+        order = np.argsort(codes, kind="stable")  # Parties of each block in the order of party indices
+        sorted_codes = codes[order]
+        is_start = np.ones(len(order), dtype=bool)
+        is_start[1:] = sorted_codes[1:] != sorted_codes[:-1]
+        first = order[np.flatnonzero(is_start)[np.cumsum(is_start) - 1]]  # First party of the block of each party
+        others = ~is_start
+        links.append(first[others] * num_parties + order[others])
+    links = np.unique(np.concatenate(links))
+    return links // max(num_parties, 1), links % max(num_parties, 1)
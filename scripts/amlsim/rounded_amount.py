@@ -8,6 +8,14 @@ class RoundedAmount:
         self.max = max
 
     def getAmount(self):
+        start, stop, step = self.getRange()
+        result = random.randrange(start, stop, step)
+        return float(result)
+
+    def getRange(self):
+        """Get the range of rounded amounts as arguments of range()
+        :return: Start value, stop value (exclusive) and step size (i.e. 10, 100, 1000)
+        """
         min = int(self.min)
         max = int(self.max)
         range = max - min
@@ -23,8 +31,7 @@ class RoundedAmount:
         if (power_of_ten > 1):
             start = self.__get_starting_value(min, num_digits_power_of_ten)
         
-        result = random.randrange(start, max + 1, power_of_ten)
-        return float(result)
+        return start, max + 1, power_of_ten
 
     
     def __get_step_size(self, step_size, range):
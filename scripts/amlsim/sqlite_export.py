@@ -0,0 +1,108 @@
+"""
+SQLite export of converted datasets for point lookups (e.g. all transactions of an account or an alert).
+
+Converted CSV files are loaded into tables of a local SQLite database with batched executemany calls
+inside a single transaction per table, with journaling and syncing relaxed for the bulk load.
+Secondary indexes (account IDs, alert IDs and timestamps) are built after all rows are loaded,
+which is much faster than maintaining them for each inserted row.
+"""
+
+import csv
+import os
+import sqlite3
+from itertools import islice
+
+
+DEFAULT_BATCH_ROWS = 50000  # Number of rows inserted by each executemany call
+CACHE_MB = 256  # Page cache size of the bulk load
+INDEX_DATA_TYPES = {"account_id", "orig_id", "dest_id", "alert_id", "timestamp"}  # Columns with indexes
+SQL_TYPES = {"int": "INTEGER", "float": "REAL"}  # Column affinity of schema.json value types (others: TEXT)
+
+
+def quote(name):
+    """Quote an SQL identifier (table or column name)"""
+    return '"%s"' % name.replace('"', '""')
+
+
+def connect(db_file):
+    """Open a database for the bulk load
+    :param db_file: SQLite database file path
+    :return: sqlite3.Connection (transactions are controlled explicitly)
+    """
+    conn = sqlite3.connect(db_file, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=OFF")  # The database can be rebuilt from CSV files if the load is interrupted
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA cache_size=%d" % (-CACHE_MB * 1024))  # Negative: KiB
+    return conn
+
+
+def load_csv(conn, table, csv_file, value_types, batch_rows=DEFAULT_BATCH_ROWS):
+    """Replace a table with the rows of a CSV file
+    :param conn: sqlite3.Connection from connect()
+    :param table: Table name
+    :param csv_file: CSV file path with the header
+    :param value_types: dict of column names and schema.json value types
+    :param batch_rows: Number of rows inserted at once
+    :return: Number of rows
+    """
+    num_rows = 0
+    with open(csv_file, "r", newline="") as rf:
+        reader = csv.reader(rf)
+        header = next(reader)
+        columns = ", ".join("%s %s" % (quote(name), SQL_TYPES.get(value_types.get(name), "TEXT")) for name in header)
+        insert = "INSERT INTO %s VALUES (%s)" % (quote(table), ", ".join("?" * len(header)))
+        conn.execute("BEGIN")
+        try:
+            conn.execute("DROP TABLE IF EXISTS %s" % quote(table))
+            conn.execute("CREATE TABLE %s (%s)" % (quote(table), columns))
+            while True:
+                rows = list(islice(reader, batch_rows))
+                if not rows:
+                    break
+                conn.executemany(insert, rows)
+                num_rows += len(rows)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    return num_rows
+
+
+def create_indexes(conn, table, index_columns):
+    """Create secondary indexes of a loaded table
+    :param conn: sqlite3.Connection
+    :param table: Table name
+    :param index_columns: Column names with indexes
+    """
+    conn.execute("BEGIN")
+    for column in index_columns:
+        conn.execute("CREATE INDEX IF NOT EXISTS %s ON %s (%s)" % (
+            quote("idx_%s_%s" % (table, column)), quote(table), quote(column)))
+    conn.execute("COMMIT")
+
+
+def export_sqlite(db_file, tables, batch_rows=DEFAULT_BATCH_ROWS):
+    """Load CSV files into a SQLite database and index them
+    :param db_file: SQLite database file path
+    :param tables: List of (table name, CSV file path, schema.json columns) tuples
+    :param batch_rows: Number of rows inserted at once
+    :return: dict of table names and the numbers of rows
+    """
+    num_rows = dict()
+    conn = connect(db_file)
+    try:
+        for table, csv_file, columns in tables:
+            if not os.path.exists(csv_file):
+                continue
+            value_types = {column["name"]: column.get("valueType", "string") for column in columns}
+            num_rows[table] = load_csv(conn, table, csv_file, value_types, batch_rows)
+        for table, csv_file, columns in tables:  # Indexes after all rows are loaded
+            if table in num_rows:
+                create_indexes(conn, table, [column["name"] for column in columns
+                                             if column.get("dataType") in INDEX_DATA_TYPES])
+        conn.execute("ANALYZE")  # Statistics for the query planner
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    finally:
+        conn.close()
+    return num_rows
@@ -0,0 +1,169 @@
+"""
+Fast reader of the transaction log written by the Java simulator (TransactionRepository.flushLog).
+
+The log always has the same 11 unquoted columns, so large blocks of complete lines are parsed at once
+into NumPy structured arrays with np.loadtxt instead of csv.reader and int() calls for each field.
+Blocks with irregular lines (e.g. a truncated last line or invalid numbers) are parsed line by line.
+A row is valid under the same rules as convert_logs.parse_tx_log: it has at least 11 columns and its step,
+isSAR and alertID are integers. Other numbers which cannot be parsed become NaN (amounts and balances)
+or -1 (account IDs).
+"""
+
+import io
+import os
+import warnings
+
+import numpy as np
+from numpy.lib.recfunctions import repack_fields
+
+
+TX_LOG_COLUMNS = ["step", "type", "amount", "nameOrig", "oldbalanceOrig", "newbalanceOrig",
+                  "nameDest", "oldbalanceDest", "newbalanceDest", "isSAR", "alertID"]
+TX_LOG_DTYPE = np.dtype([
+    ("step", np.int64),
+    ("type", "S16"),  # Transaction type (e.g. b"TRANSFER", b"CASH-IN")
+    ("amount", np.float64),
+    ("nameOrig", np.int64),
+    ("oldbalanceOrig", np.float64),
+    ("newbalanceOrig", np.float64),
+    ("nameDest", np.int64),
+    ("oldbalanceDest", np.float64),
+    ("newbalanceDest", np.float64),
+    ("isSAR", np.int8),
+    ("alertID", np.int64),
+])
+REQUIRED_COLUMNS = {"step", "isSAR", "alertID"}  # Columns which must be integers in valid rows
+LAST_COLUMN = TX_LOG_COLUMNS[-1]
+DEFAULT_BLOCK_MB = 16  # Size of each block parsed at once in MiB
+
+
+def is_tx_log_header(header):
+    """Check whether a header is the fixed header of the transaction log
+    :param header: Header as a list of column names
+    :return: True if the fast reader can parse the file
+    """
+    return list(header) == TX_LOG_COLUMNS
+
+
+def _row_dtype(columns):
+    if columns is None:
+        return TX_LOG_DTYPE
+    return np.dtype([(name, TX_LOG_DTYPE[name]) for name in columns])
+
+
+def _parse_field(value, dtype):
+    """Parse a field of an irregular line
+    :return: Parsed value (a sentinel value if it is invalid)
+    """
+    try:
+        if dtype.kind == "i":
+            return int(value)
+        if dtype.kind == "f":
+            return float(value)
+        return value
+    except ValueError:
+        return -1 if dtype.kind == "i" else float("nan")
+
+
+def _parse_lines(data, dtype, indices):
+    """Parse lines one by one, skipping invalid rows
+    :param data: Bytes of complete lines
+    :param dtype: Structured dtype of the result
+    :param indices: Column indices of the fields of dtype
+    :return: Structured array
+    """
+    rows = list()
+    num_columns = len(TX_LOG_COLUMNS)
+    required_idx = [TX_LOG_COLUMNS.index(name) for name in sorted(REQUIRED_COLUMNS)]
+    for line in data.splitlines():
+        fields = line.split(b",")
+        if len(fields) < num_columns:
+            continue
+        try:
+            for idx in required_idx:
+                int(fields[idx])
+        except ValueError:
+            continue
+        rows.append(tuple(_parse_field(fields[idx], dtype[n]) for n, idx in enumerate(indices)))
+    return np.array(rows, dtype=dtype)
+
+
+def parse_block(data, columns=None):
+    """Parse a block of complete lines of the transaction log (without the header)
+    :param data: Bytes of lines
+    :param columns: Column names to parse (None: all columns)
+    :return: NumPy structured array with the columns of valid rows
+    """
+    dtype = _row_dtype(columns)
+    # The last column is always parsed, so that np.loadtxt fails on lines with fewer columns
+    parse_dtype = dtype if LAST_COLUMN in dtype.names else _row_dtype(list(dtype.names) + [LAST_COLUMN])
+    indices = [TX_LOG_COLUMNS.index(name) for name in parse_dtype.names]
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")  # Empty input
+            rows = np.loadtxt(io.BytesIO(data), dtype=parse_dtype, delimiter=",", usecols=indices,
+                              comments=None, ndmin=1, encoding=None)
+    except ValueError:  # Irregular lines
+        rows = _parse_lines(data, parse_dtype, indices)
+    if parse_dtype is not dtype:
+        rows = repack_fields(rows[list(dtype.names)])
+    return rows
+
+
+def read_blocks(log_file, columns=None, block_bytes=DEFAULT_BLOCK_MB * 1024 * 1024, start=None, end=None):
+    """Read the transaction log as blocks of parsed rows
+    :param log_file: Transaction log file path (CSV with the header or binary)
+    :param columns: Column names to parse (None: all columns)
+    :param block_bytes: Approximate size of each block in bytes
+    :param start: Start byte offset (beginning of a line; None: the first data row)
+    :param end: End byte offset (exclusive; None: the end of the file)
+    :return: Generator of NumPy structured arrays
+    """
+    from amlsim import binary_log  # binary_log depends on this module
+    if binary_log.is_binary_log(log_file):  # Binary log of the simulator ("log_format": "binary")
+        yield from binary_log.read_binary_blocks(log_file, columns, start=start, end=end)
+        return
+    with open(log_file, "rb") as rf:
+        if start is None:
+            header = rf.readline().decode().rstrip("\r\n").split(",")
+            if not is_tx_log_header(header):
+                raise ValueError("Unexpected header of the transaction log %s: %s" % (log_file, header))
+        else:
+            rf.seek(start)
+        end = os.path.getsize(log_file) if end is None else end
+        remaining = end - rf.tell()
+        pending = b""  # Incomplete line of the previous block
+        while remaining > 0:
+            data = rf.read(min(block_bytes, remaining))
+            if not data:
+                break
+            remaining -= len(data)
+            data = pending + data
+            cut = data.rfind(b"\n") + 1 if remaining > 0 else len(data)
+            pending = data[cut:]
+            yield parse_block(data[:cut], columns)
+        if pending:
+            yield parse_block(pending, columns)
+
+
+def load_tx_log(log_file, columns=None, block_bytes=DEFAULT_BLOCK_MB * 1024 * 1024):
+    """Load the whole transaction log as typed columns
+    :param log_file: Transaction log file path
+    :param columns: Column names to parse (None: all columns)
+    :param block_bytes: Approximate size of each block in bytes
+    :return: NumPy structured array of all valid rows
+    """
+    blocks = list(read_blocks(log_file, columns, block_bytes))
+    if not blocks:
+        return np.zeros(0, dtype=_row_dtype(columns))
+    return np.concatenate(blocks)
+
+
+def count_rows(log_file, start=None, end=None):
+    """Count valid rows of the transaction log (or a byte range of it)
+    :param log_file: Transaction log file path
+    :param start: Start byte offset (beginning of a line; None: the first data row)
+    :param end: End byte offset (exclusive; None: the end of the file)
+    :return: Number of valid rows
+    """
+    return sum(len(block) for block in read_blocks(log_file, sorted(REQUIRED_COLUMNS), start=start, end=end))
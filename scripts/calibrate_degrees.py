@@ -0,0 +1,206 @@
+"""
+Calibrate a degree distribution parameter file (degree.csv) from an observed transaction CSV file.
+
+The transaction file is streamed in chunks and only the in/out-degree of each account is kept,
+so the memory usage depends on the number of accounts rather than the number of transactions.
+Heavy tails of the in/out-degree distributions are fitted with power-law and log-normal distributions
+(powerlaw package) and the better one replaces the noisy observed tail.
+"""
+
+import csv
+import json
+import sys
+from collections import Counter
+from itertools import islice
+from operator import itemgetter
+
+import numpy as np
+import powerlaw
+from scipy.special import ndtr, ndtri  # SciPy is a dependency of powerlaw
+
+from amlsim.degree_sequence import count_joint_degrees, merge_degree_rows, balance_degrees, write_degree_csv
+from amlsim.tx_log_reader import is_tx_log_header, read_blocks
+
+
+CHUNK_ROWS = 2 ** 20  # Number of transaction rows counted at once
+MAX_FIT_SAMPLES = 10 ** 5  # Maximum number of vertex degrees used for fitting
+
+# Pairs of (originator, beneficiary) column names in the transaction files of AMLSim and its inputs
+EDGE_COLUMNS = [
+    ("src", "dst"),  # transactions.csv of the transaction graph generator
+    ("orig_acct", "bene_acct"),  # Converted transaction list
+    ("nameOrig", "nameDest"),  # Transaction log of the simulator
+]
+
+
+def find_edge_columns(header):
+    """Find originator and beneficiary column indices from the CSV header
+    :param header: Header row of the transaction CSV file
+    :return: Originator and beneficiary column indices
+    """
+    name2idx = {n: i for i, n in enumerate(header)}
+    for src_name, dst_name in EDGE_COLUMNS:
+        if src_name in name2idx and dst_name in name2idx:
+            return name2idx[src_name], name2idx[dst_name]
+    raise KeyError("No originator and beneficiary columns in the header: %s" % str(header))
+
+
+def count_degrees_tx_log(log_file):
+    """Count in/out-degrees of accounts from the transaction log of the simulator parsed as NumPy blocks
+    :param log_file: Transaction log file path
+    :return: In-degree and out-degree arrays (including zero degrees) and the number of edges
+    """
+    blocks = list(read_blocks(log_file, ["nameOrig", "nameDest"]))
+    orig = np.concatenate([block["nameOrig"] for block in blocks]) if blocks else np.zeros(0, dtype=np.int64)
+    dest = np.concatenate([block["nameDest"] for block in blocks]) if blocks else np.zeros(0, dtype=np.int64)
+    accounts, inverse = np.unique(np.concatenate([orig, dest]), return_inverse=True)
+    out_deg = np.bincount(inverse[:len(orig)], minlength=len(accounts))
+    in_deg = np.bincount(inverse[len(orig):], minlength=len(accounts))
+    return in_deg, out_deg, len(orig)
+
+
+def count_degrees_csv(tx_csv, chunk_rows=CHUNK_ROWS):
+    """Stream a transaction CSV file and count in/out-degrees of accounts.
+    Each transaction row is an edge, so repeated transactions between the same accounts are counted.
+    :param tx_csv: Transaction CSV file path
+    :param chunk_rows: Number of rows counted at once
+    :return: In-degree and out-degree arrays (including zero degrees) and the number of edges
+    """
+    with open(tx_csv, "r", newline="") as rf:
+        header = next(csv.reader(rf))
+    if is_tx_log_header(header):  # Transaction log of the simulator
+        return count_degrees_tx_log(tx_csv)
+
+    in_counter = Counter()
+    out_counter = Counter()
+    num_edges = 0
+    with open(tx_csv, "r", newline="") as rf:
+        reader = csv.reader(rf)
+        src_idx, dst_idx = find_edge_columns(next(reader))
+        get_src = itemgetter(src_idx)
+        get_dst = itemgetter(dst_idx)
+        while True:
+            rows = list(islice(reader, chunk_rows))
+            if not rows:
+                break
+            out_counter.update(map(get_src, rows))
+            in_counter.update(map(get_dst, rows))
+            num_edges += len(rows)
+
+    accounts = list(out_counter.keys() | in_counter.keys())
+    in_deg = np.fromiter((in_counter[a] for a in accounts), dtype=np.int64, count=len(accounts))
+    out_deg = np.fromiter((out_counter[a] for a in accounts), dtype=np.int64, count=len(accounts))
+    return in_deg, out_deg, num_edges
+
+
+def fit_tail(degrees, seed=None):
+    """Fit power-law and log-normal distributions to the tail of positive degrees
+    :param degrees: Degree array
+    :param seed: Seed for sampling degrees when there are too many vertices
+    :return: Fitting report (parameters of both distributions and the better one) as a dict
+    """
+    positive = degrees[degrees > 0]
+    if len(np.unique(positive)) < 3:
+        return {"fitted": False}
+    if len(positive) > MAX_FIT_SAMPLES:
+        positive = np.random.RandomState(seed).choice(positive, MAX_FIT_SAMPLES, replace=False)
+
+    fit = powerlaw.Fit(positive, discrete=True, verbose=False)
+    ratio, p = fit.distribution_compare("power_law", "lognormal")
+    best = "power_law" if ratio > 0 else "lognormal"
+    report = {
+        "fitted": True,
+        "xmin": float(fit.xmin),
+        "power_law": {"alpha": float(fit.power_law.alpha)},
+        "lognormal": {"mu": float(fit.lognormal.mu), "sigma": float(fit.lognormal.sigma)},
+        "loglikelihood_ratio": float(ratio),
+        "p_value": float(p),
+        "best": best,
+    }
+    return report
+
+
+def sample_tail(report, size, xmax, rng):
+    """Draw discrete degrees within [xmin, xmax] from the fitted tail distribution by inverse transform sampling.
+    The sampling is done with NumPy because the random generator of the powerlaw package is slow for discrete data.
+    :param report: Fitting report of the degree distribution
+    :param size: Number of samples
+    :param xmax: Maximum degree
+    :param rng: numpy.random.RandomState object
+    :return: Degree array
+    """
+    xmin = report["xmin"]
+    low, high = xmin - 0.5, xmax + 0.5  # Continuous approximation of discrete degrees
+    if report["best"] == "power_law":
+        exponent = 1.0 - report["power_law"]["alpha"]
+        u_low, u_high = low ** exponent, high ** exponent
+        samples = (u_low + (u_high - u_low) * rng.random_sample(size)) ** (1.0 / exponent)
+    else:
+        mu, sigma = report["lognormal"]["mu"], report["lognormal"]["sigma"]
+        u_low = ndtr((np.log(low) - mu) / sigma)
+        u_high = ndtr((np.log(high) - mu) / sigma)
+        samples = np.exp(mu + sigma * ndtri(u_low + (u_high - u_low) * rng.random_sample(size)))
+    return np.clip(np.rint(samples), xmin, xmax).astype(np.int64)
+
+
+def smooth_tail(degrees, report, seed=None):
+    """Replace degrees in the fitted tail with samples from the fitted distribution.
+    The samples are assigned in the order of the observed degrees, so the correlation
+    between in-degree and out-degree of each vertex is kept.
+    :param degrees: Degree array
+    :param report: Fitting report of the degree distribution
+    :param seed: Seed for random number generator
+    :return: New degree array
+    """
+    degrees = degrees.copy()
+    tail_idx = np.flatnonzero(degrees >= report["xmin"])
+    if len(tail_idx) == 0:
+        return degrees
+    rng = np.random.RandomState(seed)
+    samples = sample_tail(report, len(tail_idx), int(degrees.max()), rng)
+    order = tail_idx[np.argsort(degrees[tail_idx], kind="stable")]
+    degrees[order] = np.sort(samples)
+    return degrees
+
+
+def calibrate_degrees(tx_csv, deg_csv, report_json=None, smooth=True, seed=0):
+    """Calibrate degree.csv from a transaction CSV file
+    :param tx_csv: Transaction CSV file path
+    :param deg_csv: Output degree CSV file path
+    :param report_json: Output fitting report JSON file path (optional)
+    :param smooth: If True, replace the tails of degree distributions with the fitted distributions
+    :param seed: Seed for random number generator
+    :return: Fitting report as a dict
+    """
+    in_deg, out_deg, num_edges = count_degrees_csv(tx_csv)
+    report = {"num_vertices": len(in_deg), "num_edges": num_edges}
+
+    for name, degrees in (("in_degree", in_deg), ("out_degree", out_deg)):
+        report[name] = fit_tail(degrees, seed)
+        if smooth and report[name]["fitted"]:
+            degrees[:] = smooth_tail(degrees, report[name], seed)
+
+    counts, in_values, out_values = count_joint_degrees(in_deg, out_deg)
+    counts, in_values, out_values = merge_degree_rows(counts, in_values, out_values)
+    counts, in_values, out_values = balance_degrees(counts, in_values, out_values)
+    write_degree_csv(deg_csv, counts, in_values, out_values)
+    report["num_calibrated_edges"] = int((counts * in_values).sum())
+
+    if report_json is not None:
+        with open(report_json, "w") as wf:
+            json.dump(report, wf, indent=2)
+    return report
+
+
+if __name__ == "__main__":
+    argv = sys.argv
+    if len(argv) < 3:
+        print("Usage: python3 %s [TxCSV] [OutputDegCSV] [FitReportJSON]" % argv[0])
+        exit(1)
+
+    _report = calibrate_degrees(argv[1], argv[2], argv[3] if len(argv) >= 4 else None)
+    print("Number of vertices: %d" % _report["num_vertices"])
+    print("Number of edges: %d (calibrated: %d)" % (_report["num_edges"], _report["num_calibrated_edges"]))
+    for _name in ("in_degree", "out_degree"):
+        if _report[_name]["fitted"]:
+            print("%s: xmin=%d, best fit=%s" % (_name, _report[_name]["xmin"], _report[_name]["best"]))
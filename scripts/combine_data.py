@@ -1,19 +1,33 @@
 """
 Combine AMLSim outputs into a single dataset
+
+Each input dataset is parsed once for all of its repetitions. Rows of the output lists are kept as constant
+CSV text segments between the ID columns (accounts, transactions and alerts), and the ID columns as NumPy arrays.
+For each repetition, the ID offsets are added to the arrays and the rows are written in bulk.
 """
 
+import io
+import multiprocessing
 import os
+import shutil
 import sys
+import tempfile
 from collections import Counter
 import csv
 import json
-import datetime
 from dateutil.parser import parse
+import numpy as np
+
+from amlsim.date_table import DateTable
+
+
+SHARD_NAMES = ["accounts", "transactions", "cash_transactions", "alert_members", "alert_transactions"]
 
 
 class Schema:
-    def __init__(self, json_file, base_date):
+    def __init__(self, json_file, base_date, total_steps=0):
         self._base_date = base_date
+        self.date_table = DateTable(base_date, total_steps)  # Formatted dates of all simulation steps
 
         with open(json_file, "r") as rf:
             self.data = json.load(rf)
@@ -219,12 +233,7 @@ class Schema:
         :param _days: Days from the "base_date"
         :return: Date as ISO 8601 format
         """
-        try:
-            num_days = int(_days)
-        except ValueError:
-            return ""
-        dt = self._base_date + datetime.timedelta(num_days)
-        return dt.isoformat() + "Z"  # UTC
+        return self.date_table.lookup(_days)
 
     def get_acct_row(self, acct_id, acct_name, init_balance, start_str, end_str, is_sar, model_id, bank_id, **attr):
         row = list(self.acct_defaults)
@@ -333,7 +342,7 @@ def load_output_conf_json(conf_json):
 
     schema_path = os.path.join(conf["input"]["directory"], conf["input"]["schema"])
     base_date = parse(conf["general"]["base_date"])
-    schema = Schema(schema_path, base_date)
+    schema = Schema(schema_path, base_date, conf["general"].get("total_steps", 0))
 
     return acct_path, tx_path, cash_path, alert_acct_path, alert_tx_path, schema
 
@@ -356,6 +365,286 @@ def load_input_conf_json(conf_json):
     return acct_path, alert_path, deg_path, tx_path
 
 
+def csv_field(value):
+    """Format a value as a CSV field in the same way as csv.writer (minimal quoting)
+    :param value: Value
+    :return: CSV field text
+    """
+    text = "" if value is None else str(value)
+    if "," in text or '"' in text or "\n" in text or "\r" in text:
+        return '"%s"' % text.replace('"', '""')
+    return text
+
+
+class OffsetRows:
+    """Rows of an output list parsed once and written for each repetition with offsets of the ID columns.
+    Each row is kept as CSV text segments between the ID columns.
+    """
+
+    def __init__(self, rows, id_columns):
+        """
+        :param rows: Output rows (lists of values)
+        :param id_columns: List of output column indices and lists of integer IDs of the rows
+        """
+        self.ids = [np.array(ids, dtype=np.int64) for _, ids in id_columns]
+        self.order = sorted(range(len(id_columns)), key=lambda k: id_columns[k][0])  # ID columns in the row order
+        bounds = [id_columns[k][0] for k in self.order]
+
+        # Segment k: fields between the (k-1)-th and k-th ID columns with their delimiters
+        self.segments = [list() for _ in range(len(bounds) + 1)]
+        for row in rows:
+            fields = [csv_field(value) for value in row]
+            start = 0
+            for k, end in enumerate(bounds):
+                self.segments[k].append(("," if k > 0 else "") + "".join(f + "," for f in fields[start:end]))
+                start = end + 1
+            self.segments[-1].append("".join("," + f for f in fields[start:]) + "\n")
+
+    def __len__(self):
+        return len(self.segments[0])
+
+    def write(self, wf, offsets):
+        """Write rows with offsets of the ID columns (negative IDs such as -1 for no alert are not offset)
+        :param wf: Output file object
+        :param offsets: List of offsets of the ID columns (same order as the ID columns)
+        :return: List of NumPy arrays of the written IDs
+        """
+        ids = [np.where(values >= 0, values + offset, values) for values, offset in zip(self.ids, offsets)]
+        columns = [self.segments[0]]
+        for k, segments in zip(self.order, self.segments[1:]):
+            columns.append(map(str, ids[k].tolist()))
+            columns.append(segments)
+        wf.writelines(map("".join, zip(*columns)))
+        return ids
+
+    def id_bounds(self):
+        """Get bounds of the IDs written with offsets
+        :return: List of the maximum non-negative ID and the maximum negative ID (None if not found) of ID columns
+        """
+        return [(int(ids[ids >= 0].max()) if (ids >= 0).any() else None,
+                 int(ids[ids < 0].max()) if (ids < 0).any() else None) for ids in self.ids]
+
+
+def max_offset_id(current, bounds, offset):
+    """Get the maximum ID written with an offset
+    :param current: Current maximum ID
+    :param bounds: Maximum non-negative ID and maximum negative ID of the ID column (from OffsetRows.id_bounds)
+    :param offset: Offset of the ID column
+    :return: Maximum of the current maximum and the written IDs
+    """
+    nonneg_max, neg_max = bounds
+    if nonneg_max is not None:
+        current = max(current, nonneg_max + offset)
+    if neg_max is not None:
+        current = max(current, neg_max)
+    return current
+
+
+def next_offsets(bounds, offsets):
+    """Get ID offsets of the next repetition: the maximum IDs of this repetition plus one
+    :param bounds: ID bounds of the account, transaction, cash transaction, alert member and alert transaction lists
+    :param offsets: Account, transaction and alert ID offsets of this repetition
+    :return: Account, transaction and alert ID offsets of the next repetition
+    """
+    acct_bounds, tx_bounds, cash_bounds, _, alert_tx_bounds = bounds
+    acct_offset, tx_offset, alert_offset = offsets
+    max_acct_id = max_offset_id(0, acct_bounds[0], acct_offset)
+    max_tx_id = max_offset_id(max_offset_id(0, tx_bounds[0], tx_offset), cash_bounds[0], tx_offset)
+    max_alert_id = 0
+    for alert_bounds in (tx_bounds[3], cash_bounds[3], alert_tx_bounds[0]):
+        max_alert_id = max_offset_id(max_alert_id, alert_bounds, alert_offset)
+    return max_acct_id + 1, max_tx_id + 1, max_alert_id + 1
+
+
+def read_csv_text(csv_path):
+    """Read data rows of a CSV file (without the header) and format them again as CSV text
+    :param csv_path: CSV file path
+    :return: CSV text
+    """
+    buffer = io.StringIO()
+    with open(csv_path, "r") as rf:
+        reader = csv.reader(rf)
+        next(reader)
+        csv.writer(buffer, lineterminator='\n').writerows(reader)
+    return buffer.getvalue()
+
+
+def load_output_lists(in_conf_json, out_schema):
+    """Parse output lists of an input dataset
+    :param in_conf_json: Configuration JSON file of the input dataset
+    :param out_schema: Schema of the combined dataset
+    :return: OffsetRows of accounts, transactions, cash transactions, alert members and alert transactions
+    """
+    in_acct_path, in_tx_path, in_cash_path, in_alert_acct_path, in_alert_tx_path, in_schema = \
+        load_output_conf_json(in_conf_json)
+
+    # Account list (account IDs)
+    rows = list()
+    acct_ids = list()
+    with open(in_acct_path, "r") as rf:
+        reader = csv.reader(rf)
+        next(reader)
+        for row in reader:
+            acct_id = int(row[in_schema.acct_id_idx])
+            acct_ids.append(acct_id)
+            rows.append(out_schema.get_acct_row(
+                acct_id, row[in_schema.acct_name_idx], row[in_schema.acct_balance_idx],
+                row[in_schema.acct_start_idx], row[in_schema.acct_end_idx], row[in_schema.acct_sar_idx],
+                row[in_schema.acct_model_idx], row[in_schema.acct_bank_idx]))
+    accounts = OffsetRows(rows, [(out_schema.acct_id_idx, acct_ids)])
+
+    # Transaction and cash transaction lists (transaction, originator, beneficiary and alert IDs)
+    tx_lists = list()
+    for in_path in (in_tx_path, in_cash_path):
+        rows = list()
+        tx_ids, orig_ids, bene_ids, alert_ids = list(), list(), list(), list()
+        with open(in_path, "r") as rf:
+            reader = csv.reader(rf)
+            next(reader)
+            for row in reader:
+                tx_ids.append(int(row[in_schema.tx_id_idx]))
+                orig_ids.append(int(row[in_schema.tx_orig_idx]))
+                bene_ids.append(int(row[in_schema.tx_dest_idx]))
+                alert_ids.append(int(row[in_schema.tx_alert_idx]))
+                rows.append(out_schema.get_tx_row(
+                    tx_ids[-1], row[in_schema.tx_time_idx], row[in_schema.tx_amount_idx],
+                    row[in_schema.tx_type_idx], orig_ids[-1], bene_ids[-1], row[in_schema.tx_sar_idx],
+                    alert_ids[-1]))
+        tx_lists.append(OffsetRows(rows, [(out_schema.tx_id_idx, tx_ids), (out_schema.tx_orig_idx, orig_ids),
+                                          (out_schema.tx_dest_idx, bene_ids),
+                                          (out_schema.tx_alert_idx, alert_ids)]))
+
+    # Alert member list (alert and account IDs, and account IDs as account names)
+    rows = list()
+    alert_ids, acct_ids = list(), list()
+    with open(in_alert_acct_path, "r") as rf:
+        reader = csv.reader(rf)
+        next(reader)
+        for row in reader:
+            alert_ids.append(int(row[in_schema.alert_acct_alert_idx]))
+            acct_ids.append(int(row[in_schema.alert_acct_id_idx]))
+            rows.append(out_schema.get_alert_acct_row(
+                alert_ids[-1], row[in_schema.alert_acct_reason_idx], acct_ids[-1], acct_ids[-1],
+                row[in_schema.alert_acct_sar_idx], row[in_schema.alert_acct_model_idx],
+                row[in_schema.alert_acct_schedule_idx], row[in_schema.alert_acct_bank_idx]))
+    alert_accounts = OffsetRows(rows, [(out_schema.alert_acct_alert_idx, alert_ids),
+                                       (out_schema.alert_acct_id_idx, acct_ids),
+                                       (out_schema.alert_acct_name_idx, acct_ids)])
+
+    # Alert transaction list (alert, transaction, originator and beneficiary IDs)
+    rows = list()
+    alert_ids, tx_ids, orig_ids, bene_ids = list(), list(), list(), list()
+    with open(in_alert_tx_path, "r") as rf:
+        reader = csv.reader(rf)
+        next(reader)
+        for row in reader:
+            alert_ids.append(int(row[in_schema.alert_tx_alert_idx]))
+            tx_ids.append(int(row[in_schema.alert_tx_tx_idx]))
+            orig_ids.append(int(row[in_schema.alert_tx_orig_idx]))
+            bene_ids.append(int(row[in_schema.alert_tx_dest_idx]))
+            rows.append(out_schema.get_alert_tx_row(
+                alert_ids[-1], row[in_schema.alert_tx_alert_type_idx], row[in_schema.alert_tx_sar_idx],
+                tx_ids[-1], orig_ids[-1], bene_ids[-1], row[in_schema.alert_tx_tx_type_idx],
+                row[in_schema.alert_tx_amount_idx], row[in_schema.alert_tx_date_idx]))
+    alert_txs = OffsetRows(rows, [(out_schema.alert_tx_alert_idx, alert_ids), (out_schema.alert_tx_tx_idx, tx_ids),
+                                  (out_schema.alert_tx_orig_idx, orig_ids),
+                                  (out_schema.alert_tx_dest_idx, bene_ids)])
+
+    return accounts, tx_lists[0], tx_lists[1], alert_accounts, alert_txs
+
+
+def write_output_lists(output_lists, out_files, offsets):
+    """Write a repetition of output lists with ID offsets
+    :param output_lists: OffsetRows of accounts, transactions, cash transactions, alert members and alert transactions
+    :param out_files: Output file objects of the lists
+    :param offsets: Account, transaction and alert ID offsets
+    """
+    accounts, txs, cash_txs, alert_accounts, alert_txs = output_lists
+    acct_wf, tx_wf, cash_wf, alert_acct_wf, alert_tx_wf = out_files
+    acct_offset, tx_offset, alert_offset = offsets
+    accounts.write(acct_wf, [acct_offset])
+    txs.write(tx_wf, [tx_offset, acct_offset, acct_offset, alert_offset])
+    cash_txs.write(cash_wf, [tx_offset, acct_offset, acct_offset, alert_offset])
+    alert_accounts.write(alert_acct_wf, [alert_offset, acct_offset, acct_offset])
+    alert_txs.write(alert_tx_wf, [alert_offset, tx_offset, acct_offset, acct_offset])
+
+
+# State of shard worker processes, set by init_shard_worker
+_shard_worker = dict()
+
+
+def init_shard_worker(out_conf_json, shard_dir):
+    """Initialize a worker process writing shards of the combined dataset
+    :param out_conf_json: Configuration JSON file of the combined dataset
+    :param shard_dir: Directory of shard files
+    """
+    _shard_worker.update(out_schema=load_output_conf_json(out_conf_json)[-1], shard_dir=shard_dir, lists=dict())
+
+
+def load_worker_lists(in_conf_json):
+    """Parse output lists of an input dataset once in each worker process
+    :param in_conf_json: Configuration JSON file of the input dataset
+    :return: OffsetRows of the output lists
+    """
+    cache = _shard_worker["lists"]
+    if in_conf_json not in cache:
+        cache[in_conf_json] = load_output_lists(in_conf_json, _shard_worker["out_schema"])
+    return cache[in_conf_json]
+
+
+def scan_ids(in_conf_json):
+    """Get ID bounds of the output lists of an input dataset
+    :param in_conf_json: Configuration JSON file of the input dataset
+    :return: List of ID bounds of the output lists (see OffsetRows.id_bounds)
+    """
+    return [output_list.id_bounds() for output_list in load_worker_lists(in_conf_json)]
+
+
+def write_shard(task):
+    """Write a repetition of an input dataset to shard files of the output lists
+    :param task: Tuple of the shard index, configuration JSON file of the input dataset and ID offsets
+    :return: Shard index
+    """
+    idx, in_conf_json, offsets = task
+    out_files = [open(path, "w") for path in shard_paths(_shard_worker["shard_dir"], idx)]
+    write_output_lists(load_worker_lists(in_conf_json), out_files, offsets)
+    for wf in out_files:
+        wf.close()
+    return idx
+
+
+def shard_paths(shard_dir, idx):
+    """Get shard file paths of the output lists
+    :param shard_dir: Directory of shard files
+    :param idx: Shard index
+    :return: List of shard file paths in the order of the output lists
+    """
+    return [os.path.join(shard_dir, "%s_%d.csv" % (name, idx)) for name in SHARD_NAMES]
+
+
+def append_shard(out_f, shard_path):
+    """Append a shard file to the output file without copying it through user space (if supported) and remove it
+    :param out_f: Unbuffered binary output file object at the end of the file (copy_file_range rejects O_APPEND)
+    :param shard_path: Shard file path
+    """
+    with open(shard_path, "rb") as rf:
+        size = os.fstat(rf.fileno()).st_size
+        copied = 0
+        if hasattr(os, "copy_file_range"):
+            try:
+                while copied < size:
+                    num_bytes = os.copy_file_range(rf.fileno(), out_f.fileno(), size - copied)
+                    if num_bytes == 0:
+                        break
+                    copied += num_bytes
+            except OSError:  # Not supported by the file systems: copy the rest
+                pass
+        if copied < size:
+            rf.seek(copied)
+            shutil.copyfileobj(rf, out_f)
+    os.remove(shard_path)
+
+
 class Combiner:
 
     def __init__(self, out_conf_json, out_sim_name=None):
@@ -365,6 +654,9 @@ class Combiner:
 
         with open(out_conf_json, "r") as rf:
             out_conf = json.load(rf)
+        self.out_conf_json = out_conf_json
+        # Number of worker processes writing shards of repetitions (1: no worker process)
+        self.num_workers = int(out_conf.get("combiner", {}).get("num_workers", 1))
 
         in_dir = out_conf["input"]["directory"]
         os.makedirs(in_dir, exist_ok=True)
@@ -417,28 +709,19 @@ class Combiner:
             writer = csv.writer(wf, lineterminator='\n')
             writer.writerow(self.out_schema.alert_tx_names)
 
-    def append_input_data(self, in_conf_json):
+    def append_input_data(self, in_conf_json, repetitions=1):
+        """Append parameter files of an input dataset, which are read once for all repetitions
+        :param in_conf_json: Configuration JSON file of the input dataset
+        :param repetitions: Number of repetitions
+        """
         in_acct_path, in_alert_path, in_deg_path, in_tx_path = load_input_conf_json(in_conf_json)
 
-        wf = open(self.in_acct_path, "a")
-        writer = csv.writer(wf, lineterminator='\n')
-        rf = open(in_acct_path, "r")
-        reader = csv.reader(rf)
-        next(reader)
-        for row in reader:
-            writer.writerow(row)
-        rf.close()
-        wf.close()
-
-        wf = open(self.in_alert_path, "a")
-        writer = csv.writer(wf, lineterminator='\n')
-        rf = open(in_alert_path, "r")
-        reader = csv.reader(rf)
-        next(reader)
-        for row in reader:
-            writer.writerow(row)
-        rf.close()
-        wf.close()
+        for in_path, out_path in [(in_acct_path, self.in_acct_path), (in_alert_path, self.in_alert_path),
+                                  (in_tx_path, self.in_tx_path)]:
+            text = read_csv_text(in_path)
+            with open(out_path, "a") as wf:
+                for _ in range(repetitions):
+                    wf.write(text)
 
         with open(in_deg_path, "r") as rf:
             reader = csv.reader(rf)
@@ -447,18 +730,8 @@ class Combiner:
                 deg = int(row[0])
                 in_num = int(row[1])
                 out_num = int(row[2])
-                self.in_deg[deg] += in_num
-                self.out_deg[deg] += out_num
-
-        wf = open(self.in_tx_path, "a")
-        writer = csv.writer(wf, lineterminator='\n')
-        rf = open(in_tx_path, "r")
-        reader = csv.reader(rf)
-        next(reader)
-        for row in reader:
-            writer.writerow(row)
-        rf.close()
-        wf.close()
+                self.in_deg[deg] += in_num * repetitions
+                self.out_deg[deg] += out_num * repetitions
 
     def write_degrees(self):
         degrees = sorted(set(self.in_deg.keys()) | set(self.out_deg.keys()))
@@ -469,187 +742,63 @@ class Combiner:
             for d in degrees:
                 writer.writerow([d, self.in_deg[d], self.out_deg[d]])
 
-    def append_output_data(self, in_conf_json):
-        in_acct_path, in_tx_path, in_cash_path, in_alert_acct_path, in_alert_tx_path, in_schema = \
-            load_output_conf_json(in_conf_json)
-
-        max_acct_id = 0
-        max_tx_id = 0
-        max_alert_id = 0
-
-        # Convert account list
-        wf = open(self.out_acct_path, "a")
-        writer = csv.writer(wf, lineterminator='\n')
-        rf = open(in_acct_path, "r")
-        reader = csv.reader(rf)
-
-        id_idx = in_schema.acct_id_idx
-        name_idx = in_schema.acct_name_idx
-        balance_idx = in_schema.acct_balance_idx
-        start_idx = in_schema.acct_start_idx
-        end_idx = in_schema.acct_end_idx
-        sar_idx = in_schema.acct_sar_idx
-        model_idx = in_schema.acct_model_idx
-        bank_idx = in_schema.acct_bank_idx
-
-        next(reader)
-        for row in reader:
-            acct_id = int(row[id_idx]) + self.last_acct_id
-            max_acct_id = max(max_acct_id, acct_id)
-
-            acct_name = row[name_idx]
-            balance = row[balance_idx]
-            start = row[start_idx]
-            end = row[end_idx]
-            is_sar = row[sar_idx]
-            model = row[model_idx]
-            bank_id = row[bank_idx]
-
-            output_row = self.out_schema.get_acct_row(acct_id, acct_name, balance, start, end, is_sar, model, bank_id)
-            writer.writerow(output_row)
-
-        rf.close()
-        wf.close()
-
-        # Convert transaction list
-        id_idx = in_schema.tx_id_idx
-        orig_idx = in_schema.tx_orig_idx
-        bene_idx = in_schema.tx_dest_idx
-        date_idx = in_schema.tx_time_idx
-        amt_idx = in_schema.tx_amount_idx
-        type_idx = in_schema.tx_type_idx
-        sar_idx = in_schema.tx_sar_idx
-        alert_idx = in_schema.tx_alert_idx
-
-        wf = open(self.out_tx_path, "a")
-        writer = csv.writer(wf, lineterminator='\n')
-        rf = open(in_tx_path, "r")
-        reader = csv.reader(rf)
-
-        next(reader)
-        for row in reader:
-            tx_id = int(row[id_idx]) + self.last_tx_id
-            max_tx_id = max(max_tx_id, tx_id)
-
-            orig_id = int(row[orig_idx]) + self.last_acct_id
-            bene_id = int(row[bene_idx]) + self.last_acct_id
-            date = row[date_idx]
-            amount = row[amt_idx]
-            tx_type = row[type_idx]
-            is_sar = row[sar_idx]
-            alert_id = int(row[alert_idx])
-            if alert_id >= 0 and self.last_alert_id is not None:
-                alert_id += self.last_alert_id
-            max_alert_id = max(max_alert_id, alert_id)
-
-            output_row = self.out_schema.get_tx_row(tx_id, date, amount, tx_type, orig_id, bene_id, is_sar, alert_id)
-            writer.writerow(output_row)
-
-        rf.close()
-        wf.close()
-
-        # Convert cash transaction list
-        wf = open(self.out_cash_path, "a")
-        writer = csv.writer(wf, lineterminator='\n')
-        rf = open(in_cash_path, "r")
-        reader = csv.reader(rf)
-
-        next(reader)
-        for row in reader:
-            tx_id = int(row[id_idx]) + self.last_tx_id
-            max_tx_id = max(max_tx_id, tx_id)
-
-            orig_id = int(row[orig_idx]) + self.last_acct_id
-            bene_id = int(row[bene_idx]) + self.last_acct_id
-            date = row[date_idx]
-            amount = row[amt_idx]
-            tx_type = row[type_idx]
-            is_sar = row[sar_idx]
-            alert_id = int(row[alert_idx])
-            if alert_id >= 0 and self.last_alert_id is not None:
-                alert_id += self.last_alert_id
-            max_alert_id = max(max_alert_id, alert_id)
-
-            output_row = self.out_schema.get_tx_row(tx_id, date, amount, tx_type, orig_id, bene_id, is_sar, alert_id)
-            writer.writerow(output_row)
-
-        rf.close()
-        wf.close()
-
-        # Convert alert member list
-        alert_idx = in_schema.alert_acct_alert_idx
-        acct_idx = in_schema.alert_acct_id_idx
-        reason_idx = in_schema.alert_acct_reason_idx
-        sar_idx = in_schema.alert_acct_sar_idx
-        model_idx = in_schema.alert_acct_model_idx
-        schedule_idx = in_schema.alert_acct_schedule_idx
-        bank_idx = in_schema.alert_acct_bank_idx
-
-        wf = open(self.out_alert_acct_path, "a")
-        writer = csv.writer(wf, lineterminator='\n')
-        rf = open(in_alert_acct_path, "r")
-        reader = csv.reader(rf)
-
-        next(reader)
-        for row in reader:
-            if self.last_alert_id is None:
-                writer.writerow(self.out_schema.alert_acct_names)
-                self.last_alert_id = 0
-
-            alert_id = int(row[alert_idx]) + self.last_alert_id
-            reason = row[reason_idx]
-            acct_id = int(row[acct_idx]) + self.last_acct_id
-            is_sar = row[sar_idx]
-            model = row[model_idx]
-            schedule = row[schedule_idx]
-            bank_id = row[bank_idx]
-            output_row = self.out_schema.get_alert_acct_row(alert_id, reason, acct_id, acct_id, is_sar, model,
-                                                            schedule, bank_id)
-            writer.writerow(output_row)
-
-        rf.close()
-        wf.close()
-
-        # Convert alert transaction list
-        alert_idx = in_schema.alert_tx_alert_idx
-        type_idx = in_schema.alert_tx_alert_type_idx
-        sar_idx = in_schema.alert_tx_sar_idx
-        tx_idx = in_schema.alert_tx_tx_idx
-        orig_idx = in_schema.alert_tx_orig_idx
-        bene_idx = in_schema.alert_tx_dest_idx
-        tx_type_idx = in_schema.alert_tx_tx_type_idx
-        amt_idx = in_schema.alert_tx_amount_idx
-        date_idx = in_schema.alert_tx_date_idx
-
-        wf = open(self.out_alert_tx_path, "a")
-        writer = csv.writer(wf, lineterminator='\n')
-        rf = open(in_alert_tx_path, "r")
-        reader = csv.reader(rf)
-
-        next(reader)
-        for row in reader:
-            alert_id = int(row[alert_idx]) + self.last_alert_id
-            max_alert_id = max(max_alert_id, alert_id)
-
-            alert_type = row[type_idx]
-            is_sar = row[sar_idx]
-            tx_id = int(row[tx_idx]) + self.last_tx_id
-            orig_id = int(row[orig_idx]) + self.last_acct_id
-            bene_id = int(row[bene_idx]) + self.last_acct_id
-            tx_type = row[tx_type_idx]
-            amount = row[amt_idx]
-            date = row[date_idx]
-
-            output_row = self.out_schema.get_alert_tx_row(alert_id, alert_type, is_sar, tx_id, orig_id, bene_id,
-                                                          tx_type, amount, date)
-            writer.writerow(output_row)
-
-        rf.close()
-        wf.close()
-
-        self.last_acct_id = (max_acct_id + 1)
-        self.last_tx_id = (max_tx_id + 1)
-        self.last_alert_id = (max_alert_id + 1)
+    def append_output_data(self, in_conf_json, repetitions=1):
+        """Append output lists of an input dataset, which are parsed once for all repetitions.
+        Account, transaction and alert IDs of each repetition follow those of the previous one.
+        :param in_conf_json: Configuration JSON file of the input dataset
+        :param repetitions: Number of repetitions
+        """
+        output_lists = load_output_lists(in_conf_json, self.out_schema)
+        bounds = [output_list.id_bounds() for output_list in output_lists]
+
+        out_files = [open(path, "a") for path in self.out_paths()]
+        for rep in range(repetitions):
+            print("Loading %s: %d/%d" % (in_conf_json, rep, repetitions))
+            offsets = (self.last_acct_id, self.last_tx_id, self.last_alert_id)
+            write_output_lists(output_lists, out_files, offsets)
+            self.last_acct_id, self.last_tx_id, self.last_alert_id = next_offsets(bounds, offsets)
+        for wf in out_files:
+            wf.close()
+
+    def append_output_data_parallel(self, inputs, num_workers):
+        """Append output lists of input datasets with worker processes.
+        ID offsets of all repetitions are computed from the ID bounds of the datasets first,
+        then each repetition is written to its own shard files, which are appended in order.
+        :param inputs: List of configuration JSON files of input datasets and numbers of repetitions
+        :param num_workers: Number of worker processes
+        """
+        in_conf_jsons = list(dict.fromkeys(in_conf_json for in_conf_json, _ in inputs))  # Distinct datasets
+        shard_dir = tempfile.mkdtemp(prefix="shards_", dir=os.path.dirname(self.out_acct_path))
+        print("Combine %d datasets with %d workers" % (len(in_conf_jsons), num_workers))
+
+        with multiprocessing.Pool(num_workers, initializer=init_shard_worker,
+                                  initargs=(self.out_conf_json, shard_dir)) as pool:
+            bounds = dict(zip(in_conf_jsons, pool.map(scan_ids, in_conf_jsons)))
+            tasks = list()
+            for in_conf_json, repetitions in inputs:
+                for _ in range(repetitions):
+                    offsets = (self.last_acct_id, self.last_tx_id, self.last_alert_id)
+                    tasks.append((len(tasks), in_conf_json, offsets))
+                    self.last_acct_id, self.last_tx_id, self.last_alert_id = next_offsets(bounds[in_conf_json],
+                                                                                          offsets)
+
+            out_files = [open(path, "r+b", buffering=0) for path in self.out_paths()]
+            for out_f in out_files:
+                out_f.seek(0, os.SEEK_END)
+            for idx in pool.imap(write_shard, tasks):  # Shards in the order of repetitions
+                for out_f, shard_path in zip(out_files, shard_paths(shard_dir, idx)):
+                    append_shard(out_f, shard_path)
+                print("Combined %s: %d/%d" % (tasks[idx][1], idx + 1, len(tasks)))
+            for out_f in out_files:
+                out_f.close()
+        os.rmdir(shard_dir)
+
+    def out_paths(self):
+        """Get file paths of the combined output lists
+        :return: Paths of accounts, transactions, cash transactions, alert members and alert transactions
+        """
+        return [self.out_acct_path, self.out_tx_path, self.out_cash_path, self.out_alert_acct_path,
+                self.out_alert_tx_path]
 
 
 if __name__ == "__main__":
@@ -662,11 +811,12 @@ if __name__ == "__main__":
     _conf_json = argv[1]
     _sim_name = argv[2]
     com = Combiner(_conf_json, _sim_name)
-    for i in range(3, argc, 2):
-        _in_conf_json = argv[i]
-        _rep = int(argv[i+1])
-        for j in range(_rep):
-            print("Loading %s: %d/%d" % (_in_conf_json, j, _rep))
-            com.append_input_data(_in_conf_json)
-            com.append_output_data(_in_conf_json)
+    _inputs = [(argv[i], int(argv[i+1])) for i in range(3, argc, 2)]
+    for _in_conf_json, _rep in _inputs:
+        com.append_input_data(_in_conf_json, _rep)
+    if com.num_workers > 1:
+        com.append_output_data_parallel(_inputs, com.num_workers)
+    else:
+        for _in_conf_json, _rep in _inputs:
+            com.append_output_data(_in_conf_json, _rep)
     com.write_degrees()
@@ -1,21 +1,43 @@
 import csv
+import hashlib
 import json
 import sys
 import os
 import shutil
 import datetime
+import multiprocessing
+import tempfile
 from dateutil.parser import parse
-from random import random
-from collections import defaultdict, Counter
+from itertools import chain, repeat
+from operator import itemgetter
 
 from amlsim.account_data_type_lookup import AccountDataTypeLookup
+from amlsim.account_index import AccountIndexBuilder
+from amlsim.async_writer import create_csv_writer, DEFAULT_QUEUE_SIZE
+from amlsim.binary_log import BinaryLogRows, binary_log_path
+from amlsim.checkpoint import Checkpoint, OffsetLineReader, DEFAULT_CHECKPOINT_MB
+from amlsim.columnar import csv_to_parquet, parquet_path, require_pyarrow, DEFAULT_ROW_GROUP_SIZE, \
+    DEFAULT_COMPRESSION
+from amlsim.date_table import DateTable, compact_format
+from amlsim.identity_pool import IdentityPool, DEFAULT_POOL_SIZE
+from amlsim.dedupe import create_dedupe, fingerprints, DEFAULT_MEMORY_MB
+from amlsim.degree_census import DegreeCensus
+from amlsim.log_chunks import read_header, split_chunks, read_chunk, DEFAULT_CHUNK_MB
+from amlsim.log_follower import follow_lines, counter_log_written
+from amlsim.tx_log_reader import count_rows, is_tx_log_header
+from amlsim.party_stage import assign_parties, assign_kinds, resolve_entities, DEFAULT_INDIVIDUAL_RATIO, \
+    DEFAULT_ACCOUNTS_PER_PARTY, DEFAULT_BLOCK_KEYS
+from amlsim.partition import PartitionedCSVWriter, TransactionPartitionWriter, DEFAULT_MAX_OPEN_FILES
+from amlsim.sqlite_export import export_sqlite, DEFAULT_BATCH_ROWS
 from faker import Faker
 import numpy as np
 
 
+_compact_dates = DateTable(datetime.datetime(2017, 1, 1), formatter=compact_format)  # Memoized on demand
+
+
 def days_to_date(days):
-    date = datetime.datetime(2017, 1, 1) + datetime.timedelta(days=days)
-    return date.strftime("%Y%m%d")
+    return _compact_dates.lookup(days)
 
 
 def get_simulator_name(csv_file):
@@ -36,6 +58,33 @@ def get_bank(acct_id):
 
 
 CASH_TYPES = {"CASH-IN", "CASH-OUT"}
+TX_BATCH_SIZE = 65536  # Number of transactions de-duplicated at once
+
+# Columns of the SAR account list
+SAR_ACCOUNT_COLUMNS = [{"name": "ALERT_ID", "valueType": "int"}, {"name": "ACCOUNT_ID", "valueType": "int"},
+                       {"name": "CUSTOMER_ID", "valueType": "string"}, {"name": "EVENT_DATE", "valueType": "string"},
+                       {"name": "ALERT_TYPE", "valueType": "string"}, {"name": "ACCOUNT_TYPE", "valueType": "string"},
+                       {"name": "IS_SAR", "valueType": "string"}]
+
+# Account columns filled from the identity pool
+IDENTITY_COLUMNS = {"first_name", "last_name", "street_addr", "city", "state", "zip", "gender",
+                    "birth_date", "ssn", "lat", "lon"}
+
+
+def _step_extractor(index, default, min_step):
+    """Get a function extracting a start/end step of an account row
+    :param index: Input column index of the step
+    :param default: Default value if the step is invalid
+    :param min_step: Minimum valid step
+    :return: Function (input row, identity) -> step or default value
+    """
+    def extract(row, _identity):
+        try:
+            step = int(row[index])
+        except ValueError:  # If failed, keep the default value
+            return default
+        return step if step >= min_step else default
+    return extract
 
 
 class AMLTypology:
@@ -75,9 +124,121 @@ class AMLTypology:
         return days_to_date(max_days)
 
 
+class RowPlan:
+    """Compiled plan to build rows of an output table.
+    Values of positional arguments, input columns and default values are gathered with one itemgetter call,
+    and only date columns are formatted per row.
+    """
+
+    def __init__(self, names, defaults, types, arg_indices, days2date, header=None):
+        """
+        :param names: Output column names
+        :param defaults: Default values of output columns
+        :param types: Value types of output columns
+        :param arg_indices: Output column indices of positional arguments (None if the column does not exist)
+        :param days2date: Function to convert days to a date string
+        :param header: Input CSV header whose columns with the same names as output columns are copied
+        """
+        self.names = names
+        self.defaults = tuple(defaults)
+        self.types = types
+        self.arg_indices = arg_indices
+        self.days2date = days2date
+        self.header = header
+        self.name2idx = {name: idx for idx, name in enumerate(names)}
+        self.date_indices = [idx for idx, v_type in enumerate(types) if v_type == "date"]
+
+        # Positions in the sequence of (defaults + positional arguments + input row), later ones take priority
+        num_defaults = len(self.defaults)
+        sources = list(range(num_defaults))
+        for arg_pos, idx in enumerate(arg_indices):
+            if idx is not None:
+                sources[idx] = num_defaults + arg_pos
+        if header is not None:
+            offset = num_defaults + len(arg_indices)
+            for in_idx, name in enumerate(header):
+                if name in self.name2idx:
+                    sources[self.name2idx[name]] = offset + in_idx
+        if len(sources) == 1:
+            self.getter = lambda values, _pos=sources[0]: (values[_pos],)
+        else:
+            self.getter = itemgetter(*sources)
+
+    def bind(self, header):
+        """Compile a plan copying input columns with the same names as output columns
+        :param header: Input CSV header
+        :return: RowPlan
+        """
+        return RowPlan(self.names, self.defaults, self.types, self.arg_indices, self.days2date, header)
+
+    def build(self, args, in_row=(), attr=None):
+        """Build an output row
+        :param args: Tuple of positional argument values
+        :param in_row: Input CSV row (only for a plan bound to the input header)
+        :param attr: dict of additional column names and values
+        :return: Output row as a list
+        """
+        row = list(self.getter(self.defaults + args + tuple(in_row)))
+        if attr:
+            for name, value in attr.items():
+                if name in self.name2idx:
+                    row[self.name2idx[name]] = value
+        for idx in self.date_indices:
+            row[idx] = self.days2date(row[idx])  # convert days to date
+        return row
+
+    def build_rows(self, arg_columns):
+        """Build output rows column-wise from columns of positional argument values (without input rows)
+        :param arg_columns: Tuple of lists of positional argument values (same length)
+        :return: Iterator of output rows as tuples
+        """
+        num_rows = len(arg_columns[0]) if arg_columns else 0
+        columns = [repeat(value, num_rows) for value in self.defaults]
+        for arg_pos, idx in enumerate(self.arg_indices):
+            if idx is not None:
+                columns[idx] = arg_columns[arg_pos]
+        for idx in self.date_indices:
+            if isinstance(columns[idx], repeat):  # Default date converted once
+                columns[idx] = repeat(self.days2date(self.defaults[idx]), num_rows)
+            else:
+                columns[idx] = map(self.days2date, columns[idx])
+        return zip(*columns)
+
+
+class AccountRowPlan:
+    """Compiled plan to convert rows of the account list from the transaction graph generator.
+    Constant columns are computed once and each remaining column has an extractor function.
+    """
+
+    def __init__(self, const_row, ops, id_idx, type_idx):
+        """
+        :param const_row: Output row of constant values
+        :param ops: List of output column indices and functions (input row, identity) -> value
+        :param id_idx: Input column index of account IDs
+        :param type_idx: Input column index of account types
+        """
+        self.const_row = const_row
+        self.ops = ops
+        self.id_idx = id_idx
+        self.type_idx = type_idx
+
+    def build(self, in_row, identity):
+        """Build an output account row
+        :param in_row: Input account row
+        :param identity: dict of identity attributes (names, address...)
+        :return: Output row as a list
+        """
+        row = list(self.const_row)
+        for idx, op in self.ops:
+            row[idx] = op(in_row, identity)
+        return row
+
+
 class Schema:
-    def __init__(self, data, base_date):
+    def __init__(self, data, base_date, total_steps=0):
         self._base_date = base_date
+        self._total_steps = total_steps
+        self.date_table = DateTable(base_date, total_steps)  # Formatted dates of all simulation steps
 
         self.data = data
 
@@ -200,6 +361,7 @@ class Schema:
             self.acct_names.append(name)
             self.acct_defaults.append(default)
             self.acct_types.append(v_type)
+            self.acct_name2idx[name] = idx
 
         # Transaction list
         for idx, col in enumerate(tx_data):
@@ -372,150 +534,294 @@ class Schema:
             elif d_type == "second_id":
                 self.party_party_second_idx = idx
 
+        # Compiled plans of output rows
+        self.tx_plan = RowPlan(self.tx_names, self.tx_defaults, self.tx_types,
+                               [self.tx_id_idx, self.tx_time_idx, self.tx_amount_idx, self.tx_type_idx,
+                                self.tx_orig_idx, self.tx_dest_idx, self.tx_sar_idx, self.tx_alert_idx],
+                               self.date_table.lookup)
+        self.alert_acct_plan = RowPlan(self.alert_acct_names, self.alert_acct_defaults, self.alert_acct_types,
+                                       [self.alert_acct_alert_idx, self.alert_acct_reason_idx, self.alert_acct_id_idx,
+                                        self.alert_acct_name_idx, self.alert_acct_sar_idx, self.alert_acct_model_idx,
+                                        self.alert_acct_schedule_idx, self.alert_acct_bank_idx],
+                                       self.date_table.lookup)
+        self.alert_tx_plan = RowPlan(self.alert_tx_names, self.alert_tx_defaults, self.alert_tx_types,
+                                     [self.alert_tx_id_idx, self.alert_tx_type_idx, self.alert_tx_sar_idx,
+                                      self.alert_tx_idx, self.alert_tx_orig_idx, self.alert_tx_dest_idx,
+                                      self.alert_tx_tx_type_idx, self.alert_tx_amount_idx, self.alert_tx_time_idx],
+                                     self.date_table.lookup)
+        self.party_ind_plan = RowPlan(self.party_ind_names, self.party_ind_defaults, self.party_ind_types,
+                                      [self.party_ind_id_idx], self.date_table.lookup)
+        self.party_org_plan = RowPlan(self.party_org_names, self.party_org_defaults, self.party_org_types,
+                                      [self.party_org_id_idx], self.date_table.lookup)
+        self.acct_party_plan = RowPlan(self.acct_party_names, self.acct_party_defaults, self.acct_party_types,
+                                       [self.acct_party_mapping_idx, self.acct_party_acct_idx,
+                                        self.acct_party_party_idx], self.date_table.lookup)
+        self.party_party_plan = RowPlan(self.party_party_names, self.party_party_defaults, self.party_party_types,
+                                        [self.party_party_ref_idx, self.party_party_first_idx,
+                                         self.party_party_second_idx], self.date_table.lookup)
+
+    def compile_acct_plan(self, header):
+        """Compile the conversion plan of account rows
+        :param header: Header of the account list from the transaction graph generator
+        :return: AccountRowPlan
+        """
+        lookup = AccountDataTypeLookup()
+        name2idx = {name: idx for idx, name in enumerate(header)}
+        const_row = list(self.acct_defaults)
+        ops = list()
+        id_idx = None
+        type_idx = None
+
+        for output_index, output_item in enumerate(self.data["account"]):
+            name = output_item["name"]
+            default = const_row[output_index]
+            is_date = output_item.get("valueType") == "date"
+
+            extract = None
+            if "dataType" in output_item:
+                output_type = output_item["dataType"]
+                input_index = name2idx.get(lookup.inputType(output_type))
+                if input_index is None:  # Keep the default value as it is
+                    continue
+                if output_type == "start_time":
+                    extract = _step_extractor(input_index, default, 0)
+                elif output_type == "end_time":
+                    extract = _step_extractor(input_index, default, 1)
+                else:
+                    extract = lambda _row, _identity, _idx=input_index: _row[_idx]
+                    if output_type == "account_id":
+                        id_idx = input_index
+                    elif output_type == "account_type":
+                        type_idx = input_index
+
+            if name in IDENTITY_COLUMNS:  # Drawn from the identity pool
+                ops.append((output_index, lambda _row, _identity, _name=name: _identity[_name]))
+                continue
+            elif name == "country":
+                const_row[output_index] = "US"
+                continue
+
+            if extract is None:  # Constant value
+                const_row[output_index] = self.days2date(default) if is_date else default
+            elif is_date:
+                ops.append((output_index, lambda _row, _identity, _f=extract, _d=self.date_table.lookup:
+                            _d(_f(_row, _identity))))
+            else:
+                ops.append((output_index, extract))
+
+        return AccountRowPlan(const_row, ops, id_idx, type_idx)
+
     def days2date(self, _days):
-        """Get date as ISO 8601 format from days from the "base_date". If failed, return an empty string.
+        """Get date as ISO 8601 format from days from the "base_date" with the precomputed date table.
+        If failed, return an empty string.
         :param _days: Days from the "base_date"
         :return: Date as ISO 8601 format
         """
-        try:
-            num_days = int(_days)
-        except ValueError:
-            return ""
-        dt = self._base_date + datetime.timedelta(num_days)
-        return dt.isoformat() + "Z"  # UTC
+        return self.date_table.lookup(_days)
 
 
     def get_tx_row(self, _tx_id, _timestamp, _amount, _tx_type, _orig, _dest, _is_sar, _alert_id, **attr):
-        row = list(self.tx_defaults)
-        row[self.tx_id_idx] = _tx_id
-        row[self.tx_time_idx] = _timestamp
-        row[self.tx_amount_idx] = _amount
-        row[self.tx_type_idx] = _tx_type
-        row[self.tx_orig_idx] = _orig
-        row[self.tx_dest_idx] = _dest
-        row[self.tx_sar_idx] = _is_sar
-        row[self.tx_alert_idx] = _alert_id
-
-        for name, value in attr.items():
-            if name in self.tx_name2idx:
-                idx = self.tx_name2idx[name]
-                row[idx] = value
-
-        for idx, v_type in enumerate(self.tx_types):
-            if v_type == "date":
-                row[idx] = self.days2date(row[idx])  # convert days to date
-        return row
+        return self.tx_plan.build((_tx_id, _timestamp, _amount, _tx_type, _orig, _dest, _is_sar, _alert_id),
+                                  attr=attr)
 
     def get_alert_acct_row(self, _alert_id, _reason, _acct_id, _acct_name, _is_sar,
                            _model_id, _schedule_id, _bank_id, **attr):
-        row = list(self.alert_acct_defaults)
-        row[self.alert_acct_alert_idx] = _alert_id
-        row[self.alert_acct_reason_idx] = _reason
-        row[self.alert_acct_id_idx] = _acct_id
-        row[self.alert_acct_name_idx] = _acct_name
-        row[self.alert_acct_sar_idx] = _is_sar
-        row[self.alert_acct_model_idx] = _model_id
-        row[self.alert_acct_schedule_idx] = _schedule_id
-        row[self.alert_acct_bank_idx] = _bank_id
-
-        for name, value in attr.items():
-            if name in self.alert_acct_name2idx:
-                idx = self.alert_acct_name2idx[name]
-                row[idx] = value
-
-        for idx, v_type in enumerate(self.alert_acct_types):
-            if v_type == "date":
-                row[idx] = self.days2date(row[idx])  # convert days to date
-        return row
+        return self.alert_acct_plan.build((_alert_id, _reason, _acct_id, _acct_name, _is_sar,
+                                           _model_id, _schedule_id, _bank_id), attr=attr)
 
     def get_alert_tx_row(self, _alert_id, _alert_type, _is_sar, _tx_id, _orig, _dest,
                          _tx_type, _amount, _timestamp, **attr):
-        row = list(self.alert_tx_defaults)
-        row[self.alert_tx_id_idx] = _alert_id
-        row[self.alert_tx_type_idx] = _alert_type
-        row[self.alert_tx_sar_idx] = _is_sar
-        row[self.alert_tx_idx] = _tx_id
-        row[self.alert_tx_orig_idx] = _orig
-        row[self.alert_tx_dest_idx] = _dest
-        row[self.alert_tx_tx_type_idx] = _tx_type
-        row[self.alert_tx_amount_idx] = _amount
-        row[self.alert_tx_time_idx] = _timestamp
-
-        for name, value in attr.items():
-            if name in self.alert_tx_name2idx:
-                idx = self.alert_tx_name2idx[name]
-                row[idx] = value
-
-        for idx, v_type in enumerate(self.alert_tx_types):
-            if v_type == "date":
-                row[idx] = self.days2date(row[idx])  # convert days to date
-        return row
+        return self.alert_tx_plan.build((_alert_id, _alert_type, _is_sar, _tx_id, _orig, _dest,
+                                         _tx_type, _amount, _timestamp), attr=attr)
 
     def get_party_ind_row(self, _party_id, **attr):
-        row = list(self.party_ind_defaults)
-        row[self.party_ind_id_idx] = _party_id
+        return self.party_ind_plan.build((_party_id,), attr=attr)
 
-        for name, value in attr.items():
-            if name in self.party_ind_name2idx:
-                idx = self.party_ind_name2idx[name]
-                row[idx] = value
+    def get_party_org_row(self, _party_id, **attr):
+        return self.party_org_plan.build((_party_id,), attr=attr)
 
-        for idx, v_type in enumerate(self.party_ind_types):
-            if v_type == "date":
-                row[idx] = self.days2date(row[idx])  # convert days to date
-        return row
+    def get_acct_party_row(self, _mapping_id, _acct_id, _party_id, **attr):
+        return self.acct_party_plan.build((_mapping_id, _acct_id, _party_id), attr=attr)
 
-    def get_party_org_row(self, _party_id, **attr):
-        row = list(self.party_org_defaults)
-        row[self.party_org_id_idx] = _party_id
+    def get_party_party_row(self, _ref_id, _first_id, _second_id, **attr):
+        return self.party_party_plan.build((_ref_id, _first_id, _second_id), attr=attr)
 
-        for name, value in attr.items():
-            if name in self.party_org_name2idx:
-                idx = self.party_org_name2idx[name]
-                row[idx] = value
 
-        for idx, v_type in enumerate(self.party_org_types):
-            if v_type == "date":
-                row[idx] = self.days2date(row[idx])  # convert days to date
-        return row
+def tx_key(tx):
+    """Get the de-duplication key of a parsed transaction
+    :param tx: Parsed transaction tuple from parse_tx_log
+    :return: Tuple of originator, beneficiary, transaction type, amount and date
+    """
+    return tx[5], tx[6], tx[4], tx[3], tx[2]
 
-    def get_acct_party_row(self, _mapping_id, _acct_id, _party_id, **attr):
-        row = list(self.acct_party_defaults)
-        row[self.acct_party_mapping_idx] = _mapping_id
-        row[self.acct_party_acct_idx] = _acct_id
-        row[self.acct_party_party_idx] = _party_id
-
-        for name, value in attr.items():
-            if name in self.acct_party_name2idx:
-                idx = self.acct_party_name2idx[name]
-                row[idx] = value
-
-        for idx, v_type in enumerate(self.acct_party_types):
-            if v_type == "date":
-                row[idx] = self.days2date(row[idx])  # convert days to date
-        return row
 
-    def get_party_party_row(self, _ref_id, _first_id, _second_id, **attr):
-        row = list(self.party_party_defaults)
-        row[self.party_party_ref_idx] = _ref_id
-        row[self.party_party_first_idx] = _first_id
-        row[self.party_party_second_idx] = _second_id
-
-        for name, value in attr.items():
-            if name in self.party_party_name2idx:
-                idx = self.party_party_name2idx[name]
-                row[idx] = value
-
-        for idx, v_type in enumerate(self.party_party_types):
-            if v_type == "date":
-                row[idx] = self.days2date(row[idx])  # convert days to date
-        return row
+def parse_tx_log(rows, header, tx_id=1):
+    """Parse rows of the transaction log, skipping incomplete and invalid rows
+    :param rows: Iterable of transaction log rows
+    :param header: Header of the transaction log
+    :param tx_id: Transaction ID of the first valid row
+    :return: Generator of (row, tx_id, date, amount, type, originator, beneficiary, is_sar, alert_id) tuples
+    """
+    indices = {name: index for index, name in enumerate(header)}
+    num_columns = len(header)
+    step_idx = indices["step"]
+    amt_idx = indices["amount"]
+    orig_idx = indices["nameOrig"]
+    dest_idx = indices["nameDest"]
+    sar_idx = indices["isSAR"]
+    alert_idx = indices["alertID"]
+    type_idx = indices["type"]
+
+    for row in rows:
+        if len(row) < num_columns:
+            continue
+        try:
+            days = int(row[step_idx])
+            date_str = str(days)  # days_to_date(days)
+            amount = row[amt_idx]  # transaction amount
+            orig_id = row[orig_idx]  # originator ID
+            dest_id = row[dest_idx]  # beneficiary ID
+            sar_id = int(row[sar_idx])  # SAR transaction index
+            alert_id = int(row[alert_idx])  # Alert ID
+
+            is_sar = sar_id > 0
+            ttype = row[type_idx]
+        except ValueError:
+            continue
+
+        yield row, tx_id, date_str, amount, ttype, orig_id, dest_id, is_sar, alert_id
+        tx_id += 1
+
+
+# State of chunk worker processes, set by init_chunk_worker
+_chunk_worker = dict()
+
+
+def init_chunk_worker(schema_data, base_date, total_steps, header, alert_reasons, part_dir, count_pairs,
+                      account_index=False):
+    """Initialize a worker process converting chunks of the transaction log
+    :param schema_data: Schema JSON data
+    :param base_date: Base date of the simulation
+    :param total_steps: Total simulation steps
+    :param header: Header of the transaction log
+    :param alert_reasons: dict of alert IDs and alert types
+    :param part_dir: Directory of part files
+    :param count_pairs: Whether the degree census of distinct originator-beneficiary pairs is taken
+    :param account_index: Whether accounts of transaction and alert transaction rows are recorded for indexes
+    """
+    schema = Schema(schema_data, base_date, total_steps)
+    _chunk_worker.update(header=header, tx_plan=schema.tx_plan.bind(header),
+                         alert_tx_plan=schema.alert_tx_plan.bind(header), alert_reasons=alert_reasons,
+                         part_dir=part_dir, count_pairs=count_pairs, account_index=account_index)
+
+
+def count_chunk(task):
+    """Count valid transactions in a chunk of the transaction log
+    :param task: Tuple of the log file path, start and end byte offsets
+    :return: Number of valid transactions
+    """
+    log_file, start, end = task
+    if is_tx_log_header(_chunk_worker["header"]):  # Fixed format of the simulator parsed as NumPy blocks
+        return count_rows(log_file, start, end)
+    return sum(1 for _ in parse_tx_log(read_chunk(log_file, start, end), _chunk_worker["header"]))
+
+
+def convert_chunk(task):
+    """Convert a chunk of the transaction log into part files.
+    Rows of transactions and cash transactions are written with their fingerprints (NumPy files)
+    for de-duplication in the parent process.
+    :param task: Tuple of the chunk index, log file path, start and end byte offsets and the first transaction ID
+    :return: Chunk index, DegreeCensus of the chunk (None if not taken), AccountIndexBuilder objects of
+    transaction and alert transaction rows (None if not recorded) and alert transaction rows
+    """
+    idx, log_file, start, end, tx_id = task
+    tx_plan = _chunk_worker["tx_plan"]
+    alert_tx_plan = _chunk_worker["alert_tx_plan"]
+    alert_reasons = _chunk_worker["alert_reasons"]
+    part_dir = _chunk_worker["part_dir"]
+    tx_origs = list()  # Originators and beneficiaries of transaction rows
+    tx_dests = list()
+    alert_origs = list()
+    alert_dests = list()
+    alert_rows = list()
+
+    tx_keys = list()
+    cash_keys = list()
+    with open(os.path.join(part_dir, "tx_%d.csv" % idx), "w") as out_tx_f, \
+            open(os.path.join(part_dir, "cash_%d.csv" % idx), "w") as out_cash_tx_f, \
+            open(os.path.join(part_dir, "alert_%d.csv" % idx), "w") as out_alert_tx_f:
+        tx_writer = csv.writer(out_tx_f)
+        cash_tx_writer = csv.writer(out_cash_tx_f)
+        alert_tx_writer = csv.writer(out_alert_tx_f)
+        for tx in parse_tx_log(read_chunk(log_file, start, end), _chunk_worker["header"], tx_id):
+            row, tx_id, date_str, amount, ttype, orig_id, dest_id, is_sar, alert_id = tx
+            if ttype in CASH_TYPES:
+                cash_tx_writer.writerow(tx_plan.build(tx[1:], row))
+                cash_keys.append(tx_key(tx))
+            else:
+                tx_writer.writerow(tx_plan.build(tx[1:], row))
+                tx_keys.append(tx_key(tx))
+                tx_origs.append(orig_id)
+                tx_dests.append(dest_id)
+            if alert_id >= 0:
+                alert_tx_writer.writerow(alert_tx_plan.build((alert_id, alert_reasons[alert_id], is_sar, tx_id,
+                                                              orig_id, dest_id, ttype, amount, date_str), row))
+                alert_rows.append(row)
+                alert_origs.append(orig_id)
+                alert_dests.append(dest_id)
+
+    np.save(os.path.join(part_dir, "tx_%d.npy" % idx), fingerprints(tx_keys))
+    np.save(os.path.join(part_dir, "cash_%d.npy" % idx), fingerprints(cash_keys))
+    census = None
+    if _chunk_worker["count_pairs"]:
+        census = DegreeCensus()
+        census.add_pairs(tx_origs, tx_dests)
+        census.compact()
+    tx_index = alert_index = None
+    if _chunk_worker["account_index"]:
+        tx_index = AccountIndexBuilder()
+        tx_index.add_rows(tx_origs, tx_dests)
+        alert_index = AccountIndexBuilder()
+        alert_index.add_rows(alert_origs, alert_dests)
+    return idx, census, tx_index, alert_index, alert_rows
+
+
+def append_part(out_f, part_path, dedupe=None, partitions=None):
+    """Append a part file written by convert_chunk to the output file and remove it
+    :param out_f: Output file object
+    :param part_path: Part file path without extension
+    :param dedupe: De-duplication strategy (if None, all rows are appended)
+    :param partitions: TransactionPartitionWriter of the appended rows (None: not partitioned)
+    :return: Flags of the rows of the part file which have been appended (None if all rows are appended)
+    """
+    csv_file = part_path + ".csv"
+    flags = None
+    with open(csv_file, "r", newline="") as rf:  # Keep line terminators of CSV rows
+        if dedupe is not None:
+            flags = dedupe.filter_values(np.load(part_path + ".npy"))
+            os.remove(part_path + ".npy")
+        if partitions is None and (flags is None or all(flags)):
+            shutil.copyfileobj(rf, out_f)
+        else:
+            lines = list(rf) if flags is None else [line for line, new in zip(rf, flags) if new]
+            out_f.writelines(lines)
+            if partitions is not None:
+                partitions.write_txs(csv.reader(lines))
+    os.remove(csv_file)
+    return flags
 
 
 class LogConverter:
 
     def __init__(self, conf, sim_name=None, fake=None):
         self.reports = dict()  # SAR ID and transaction subgraph
+        self.num_alert_txs = 0  # Number of alert transactions added to SAR typologies
+        self.alert_txs_loaded = False  # Whether alert transactions have been loaded while converting the log
+        self.tx_index = None  # AccountIndexBuilder of transaction rows (if account indexes are written)
+        self.alert_tx_index = None  # AccountIndexBuilder of alert transaction rows
+        self.acct_banks = dict()  # Account ID -> bank ID (as CSV values) of partitioned outputs
+        self.tx_partitions = list()  # Partition writers of the transaction lists being converted
+        self.recorded_accounts = set()  # Accounts recorded in any SAR typology (union of recorded members)
         self.org_types = dict()  # ID, organization type
 
         self.fake = fake
@@ -523,6 +829,79 @@ class LogConverter:
         general_conf = conf.get('general', {})
         input_conf = conf.get('temporal', {})  # Input directory of this converter is temporal directory
         output_conf = conf.get('output', {})
+        converter_conf = conf.get('converter', {})
+
+        # Identity pool for account attributes (names, addresses, SSNs...)
+        seed = general_conf.get('random_seed')
+        self.seed = seed if seed is None else int(seed)
+        self.identity_pool_size = converter_conf.get('identity_pool_size', DEFAULT_POOL_SIZE)
+        self.unique_ssn = converter_conf.get('unique_ssn', False)  # Whether all accounts have distinct SSNs
+
+        # Parties of accounts: ratio of individuals, average accounts per party and blocking keys of resolved entities
+        party_conf = converter_conf.get('party', {})
+        self.individual_ratio = party_conf.get('individual_ratio', DEFAULT_INDIVIDUAL_RATIO)
+        self.accounts_per_party = party_conf.get('accounts_per_party', DEFAULT_ACCOUNTS_PER_PARTY)
+        self.entity_block_keys = party_conf.get('block_keys', DEFAULT_BLOCK_KEYS)  # Empty: no resolved entities
+
+        # Transaction de-duplication strategy ("exact", "fingerprint", "bloom" or "external") and its memory limit
+        self.dedupe_strategy = converter_conf.get('dedupe', 'exact')
+        self.dedupe_memory_mb = converter_conf.get('dedupe_memory_mb', DEFAULT_MEMORY_MB)
+
+        # Number of worker processes converting chunks of the transaction log (1: no worker process)
+        self.num_workers = int(converter_conf.get('num_workers', 1))
+        self.chunk_mb = converter_conf.get('chunk_mb', DEFAULT_CHUNK_MB)  # Size of each chunk in MiB
+
+        # Fan-in/out report of the degree census (DEGREE environment variable): CSV, or JSON with the ".json" suffix
+        self.degree_report_file = converter_conf.get('degree_report', 'degree_census.csv')
+
+        # Write output files with background threads and bounded queues of row batches
+        self.async_writers = converter_conf.get('async_writers', True)
+        self.writer_queue_size = converter_conf.get('writer_queue_size', DEFAULT_QUEUE_SIZE)
+
+        # Output file format ("csv" or "parquet") and Parquet options
+        self.output_format = converter_conf.get('output_format', 'csv')
+        if self.output_format not in {"csv", "parquet"}:
+            raise ValueError("Unknown output format: %s" % self.output_format)
+        if self.output_format == "parquet":
+            require_pyarrow()
+        self.row_group_size = converter_conf.get('row_group_size', DEFAULT_ROW_GROUP_SIZE)
+        self.parquet_compression = converter_conf.get('parquet_compression', DEFAULT_COMPRESSION)
+        self.keep_csv = converter_conf.get('keep_csv', False)  # Keep CSV files after converting them to Parquet
+
+        # Checkpoints of the transaction log conversion to resume an interrupted conversion
+        self.checkpoint_mb = converter_conf.get('checkpoint_mb', DEFAULT_CHECKPOINT_MB)  # Input MiB (0: disabled)
+        self.checkpoint_dir_name = converter_conf.get('checkpoint_dir', 'checkpoint')  # In the output directory
+
+        # Partitioned copies of the outputs by bank ("orig_bank" or "bank_pair") and step window (disabled by default)
+        partition_conf = converter_conf.get('partition', {})
+        self.partition_by = partition_conf.get('by')
+        if self.partition_by not in {None, "orig_bank", "bank_pair"}:
+            raise ValueError("Unknown partition key: %s" % self.partition_by)
+        self.partition_step_window = int(partition_conf.get('step_window', 0))  # Steps in each window (0: none)
+        self.partition_max_open_files = partition_conf.get('max_open_files', DEFAULT_MAX_OPEN_FILES)
+        self.partition_dir = partition_conf.get('directory', 'partitions')  # Relative to the output directory
+
+        # Sidecar indexes of transaction and alert transaction lists by account (<file>.idx directories)
+        self.account_index = converter_conf.get('account_index', False)
+        if self.account_index and self.output_format == "parquet" and not self.keep_csv:
+            raise ValueError("Account indexes refer to CSV files: set keep_csv to true with the Parquet output format")
+
+        # SQLite database of the outputs for point lookups (disabled by default)
+        sqlite_conf = converter_conf.get('sqlite', {})
+        self.sqlite_db = sqlite_conf.get('database')  # Relative to the output directory
+        self.sqlite_batch_rows = sqlite_conf.get('batch_rows', DEFAULT_BATCH_ROWS)
+
+        # Follow the transaction log while the simulator is appending to it (FOLLOW environment variable or config)
+        follow = os.getenv("FOLLOW", converter_conf.get('follow', False))
+        self.follow = str(follow).lower() in {"1", "true", "yes"}
+        self.follow_timeout = converter_conf.get('follow_timeout')  # Seconds without new rows until failure
+
+        # Format of the transaction log written by the simulator: "csv" or "binary" (fixed-width records)
+        self.log_format = conf.get('simulator', {}).get('log_format', 'csv')
+        if self.log_format not in {"csv", "binary"}:
+            raise ValueError("Unknown transaction log format: %s" % self.log_format)
+        if self.log_format == "binary" and self.follow:
+            raise ValueError("The follow mode needs the CSV transaction log")
 
         # self.sim_name = os.getenv("SIMULATION_NAME")
         # if self.sim_name is None:
@@ -543,10 +922,13 @@ class LogConverter:
         json_file = os.path.join(param_dir, schema_file)
         with open(json_file, "r") as rf:
             data = json.load(rf)
-        self.schema = Schema(data, base_date)
+        self.schema = Schema(data, base_date, general_conf.get('total_steps', 0))
 
         # Input files
         self.log_file = os.path.join(self.work_dir, output_conf["transaction_log"])
+        if self.log_format == "binary":
+            self.log_file = binary_log_path(self.log_file)
+        self.counter_log_file = os.path.join(self.work_dir, output_conf.get("counter_log", "tx_count.csv"))
         self.in_acct_file = input_conf["accounts"]  # Account list file from the transaction graph generator
         self.group_file = input_conf["alert_members"]  # Alert account list file from the transaction graph generator
 
@@ -570,17 +952,50 @@ class LogConverter:
         if os.path.exists(src_dia_path):
             shutil.copy(src_dia_path, dst_dia_path)
 
+    def write_parties(self, acct_ids, party_of, party_keys, rng, ind_writer, org_writer, map_writer, ent_writer):
+        """Write parties, account-party mappings and resolved entities in bulk
+        :param acct_ids: List of account IDs
+        :param party_of: List of party indices of accounts (non-decreasing from 0)
+        :param party_keys: dict of identity attribute names and lists of values of each party
+        :param rng: NumPy RandomState
+        :param ind_writer: Writer of individual parties
+        :param org_writer: Writer of organization parties
+        :param map_writer: Writer of account-party mappings
+        :param ent_writer: Writer of resolved entities
+        """
+        num_accounts = len(acct_ids)
+        party_of = np.array(party_of[:num_accounts], dtype=np.int64)
+        # Party ID: ID of the first account of the party
+        is_first = np.ones(num_accounts, dtype=bool)
+        is_first[1:] = party_of[1:] != party_of[:-1]
+        party_ids = [acct_ids[i] for i in np.flatnonzero(is_first).tolist()]
+        num_parties = len(party_ids)
+
+        is_individual = assign_kinds(num_parties, rng, self.individual_ratio)
+        ind_ids = [party_ids[i] for i in np.flatnonzero(is_individual).tolist()]
+        org_ids = [party_ids[i] for i in np.flatnonzero(~is_individual).tolist()]
+        ind_writer.writerows(self.schema.party_ind_plan.build_rows((ind_ids,)))
+        org_writer.writerows(self.schema.party_org_plan.build_rows((org_ids,)))
+
+        mapping_ids = range(1, num_accounts + 1)
+        acct_party_ids = [party_ids[i] for i in (np.cumsum(is_first) - 1).tolist()]
+        map_writer.writerows(self.schema.acct_party_plan.build_rows((mapping_ids, acct_ids, acct_party_ids)))
+
+        if self.entity_block_keys and num_parties > 0:
+            firsts, seconds = resolve_entities(party_keys, self.entity_block_keys)
+            ref_ids = range(1, len(firsts) + 1)
+            first_ids = [party_ids[i] for i in firsts.tolist()]
+            second_ids = [party_ids[i] for i in seconds.tolist()]
+            ent_writer.writerows(self.schema.party_party_plan.build_rows((ref_ids, first_ids, second_ids)))
+        print("Parties: %d individuals, %d organizations for %d accounts" % (
+            len(ind_ids), len(org_ids), num_accounts))
+
     def convert_acct_tx(self):
         print("Convert transaction list from %s to %s, %s and %s" % (
             self.log_file, self.tx_file, self.cash_tx_file, self.alert_tx_file))
 
         in_acct_f = open(os.path.join(self.input_dir, self.in_acct_file), "r")  # Input account file
-        in_tx_f = open(self.log_file, "r")  # Transaction log file from the Java simulator
-
         out_acct_f = open(os.path.join(self.work_dir, self.out_acct_file), "w")  # Output account file
-        out_tx_f = open(os.path.join(self.work_dir, self.tx_file), "w")  # Output transaction file
-        out_cash_tx_f = open(os.path.join(self.work_dir, self.cash_tx_file), "w")  # Output cash transaction file
-        out_alert_tx_f = open(os.path.join(self.work_dir, self.alert_tx_file), "w")  # Output alert transaction file
 
         out_ind_f = open(os.path.join(self.work_dir, self.party_individual_file), "w")  # Party individuals
         out_org_f = open(os.path.join(self.work_dir, self.party_organization_file), "w")  # Party organizations
@@ -588,248 +1003,373 @@ class LogConverter:
         out_ent_f = open(os.path.join(self.work_dir, self.resolved_entities_file), "w")  # Resolved entities
 
         # Load account list
+        num_accounts = sum(1 for _ in in_acct_f) - 1  # Number of account rows except the header
+        in_acct_f.seek(0)
         reader = csv.reader(in_acct_f)
-        acct_writer = csv.writer(out_acct_f)
+        acct_writer = self.create_writer(out_acct_f)
         acct_writer.writerow(self.schema.acct_names)  # write header
 
-        ind_writer = csv.writer(out_ind_f)
+        ind_writer = self.create_writer(out_ind_f)
         ind_writer.writerow(self.schema.party_ind_names)
-        org_writer = csv.writer(out_org_f)
+        org_writer = self.create_writer(out_org_f)
         org_writer.writerow(self.schema.party_org_names)
-        map_writer = csv.writer(out_map_f)
+        map_writer = self.create_writer(out_map_f)
         map_writer.writerow(self.schema.acct_party_names)
-        ent_writer = csv.writer(out_ent_f)
+        ent_writer = self.create_writer(out_ent_f)
         ent_writer.writerow(self.schema.party_party_names)
 
         header = next(reader)
 
-        mapping_id = 1  # Mapping ID for account-alert list
-
-        lookup = AccountDataTypeLookup()
-        us_gen = self.fake['en_US']
-
-        for row in reader:
-            output_row = list(self.schema.acct_defaults)
-
-            acct_type = ""
-            acct_id = ""
-
-            gender = np.random.choice(['Male', 'Female'], p=[0.5, 0.5])
-
-            good_address = False
-            while good_address == False:
-                address = us_gen.address()
-                split1 = address.split('\n')
-                street_address = split1[0]
-                split2 = split1[1].split(', ')
-                if len(split2) == 2:
-                    good_address = True
-            
-            city = split2[0] 
-            split3 = split2[1].split(' ')
-            state = split3[0]
-            postcode = split3[1]
-            
-
-            for output_index, output_item in enumerate(self.schema.data['account']):
-                if 'dataType' in output_item:
-                    output_type = output_item['dataType']
-                    input_type = lookup.inputType(output_type)
-
-                    try:
-                        input_index = header.index(input_type)
-                    except ValueError:
-                        continue
-
-                    if output_type == "start_time":
-                        try:
-                            start = int(row[input_index])
-                            if start >= 0:
-                                output_row[output_index] = start
-                        except ValueError:  # If failed, keep the default value
-                            pass
-
-                    elif output_type == "end_time":
-                        try:
-                            end = int(row[input_index])
-                            if end > 0:
-                                output_row[output_index] = end
-                        except ValueError:  # If failed, keep the default value
-                            pass
-
-                    elif output_type == "account_id":
-                        acct_id = row[input_index]
-                        output_row[output_index] = acct_id
-
-                    elif output_type == "account_type":
-                        acct_type = row[input_index]
-                        output_row[output_index] = acct_type
-        
-                    else:
-                        output_row[output_index] = row[input_index]
-
-                if 'valueType' in output_item:
-                    if output_item['valueType'] == 'date':
-                        output_row[output_index] = self.schema.days2date(output_row[output_index])
-
-                
-                if 'name' in output_item:
-                    if output_item['name'] == 'first_name':
-                        output_row[output_index] = us_gen.first_name_male() if gender == "Male" else us_gen.first_name_female()
-                    
-                    elif output_item['name'] == 'last_name':
-                        output_row[output_index] = us_gen.last_name_male() if gender == "Male" else us_gen.last_name_female()
-
-                    elif output_item['name'] == 'street_addr':
-                        output_row[output_index] = street_address
-
-                    elif output_item['name'] == 'city':
-                        output_row[output_index] = city
-
-                    elif output_item['name'] == 'state':
-                        output_row[output_index] = state
-
-                    elif output_item['name'] == 'country':
-                        output_row[output_index] = "US"
-
-                    elif output_item['name'] == 'zip':
-                        output_row[output_index] = postcode
-
-                    elif output_item['name'] == 'gender':
-                        output_row[output_index] = gender
-
-                    elif output_item['name'] == 'birth_date':
-                        output_row[output_index] = us_gen.date_of_birth()
-
-                    elif output_item['name'] == 'ssn':
-                        output_row[output_index] = us_gen.ssn()
-
-                    elif output_item['name'] == 'lat':
-                        output_row[output_index] = us_gen.latitude()
-                    
-                    elif output_item['name'] == 'lon':
-                        output_row[output_index] = us_gen.longitude()
-
-           
+        acct_plan = self.schema.compile_acct_plan(header)
+        pool_size = max(min(self.identity_pool_size, num_accounts), 1)  # No larger than the number of accounts
+        identity_pool = IdentityPool(self.fake['en_US'], pool_size, self.seed, self.unique_ssn)
+        identities = identity_pool.identities()
+
+        # Parties of accounts (runs of consecutive accounts) share the identity of the first account
+        rng = np.random.RandomState(self.seed)
+        party_of = assign_parties(num_accounts, rng, self.accounts_per_party).tolist()
+        key_names = sorted({name for names in self.entity_block_keys for name in names})
+        party_keys = {name: list() for name in key_names}  # Identity attributes of each party for blocking
+        acct_ids = list()
+        identity = None
+        acct_partitions = self.open_acct_partitions()
+        if acct_partitions is not None:
+            acct_columns = [column.get("dataType") for column in self.schema.data["account"]]
+            acct_id_idx = acct_columns.index("account_id")
+            acct_bank_idx = acct_columns.index("bank_id")
+
+        for acct_num, row in enumerate(reader):
+            if acct_num == 0 or party_of[acct_num] != party_of[acct_num - 1]:
+                identity = next(identities)  # Gender, name, address, birth date, SSN and coordinates
+                for name in key_names:
+                    party_keys[name].append(identity[name])
+            output_row = acct_plan.build(row, identity)
+            acct_id = row[acct_plan.id_idx] if acct_plan.id_idx is not None else ""
+            acct_type = row[acct_plan.type_idx] if acct_plan.type_idx is not None else ""
 
             acct_writer.writerow(output_row)
             self.org_types[int(acct_id)] = acct_type
-
-            # Write a party row per account
-            is_individual = random() >= 0.5  # 50%: individual, 50%: organization
-            party_id = str(acct_id)
-            if is_individual:  # Individual
-                output_row = self.schema.get_party_ind_row(party_id)
-                ind_writer.writerow(output_row)
-            else:
-                output_row = self.schema.get_party_org_row(party_id)
-                org_writer.writerow(output_row)
-
-            # Write account-party mapping row
-            output_row = self.schema.get_acct_party_row(mapping_id, acct_id, party_id)
-            map_writer.writerow(output_row)
-            mapping_id += 1
-
+            if acct_partitions is not None:  # Banks of accounts are known before the transactions are converted
+                bank_id = str(output_row[acct_bank_idx])
+                self.acct_banks[str(output_row[acct_id_idx])] = bank_id
+                acct_partitions.writerow("bank=%s" % bank_id, output_row)
+            acct_ids.append(acct_id)
+
+        self.write_parties(acct_ids, party_of, party_keys, rng, ind_writer, org_writer, map_writer, ent_writer)
+
+        for writer in (acct_writer, ind_writer, org_writer, map_writer, ent_writer):
+            writer.close()
+        if acct_partitions is not None:
+            self.close_partitions([acct_partitions])
         in_acct_f.close()
+        out_acct_f.close()
         out_ind_f.close()
         out_org_f.close()
         out_map_f.close()
         out_ent_f.close()
 
-        # Avoid duplicated transaction CSV rows in the log file
-        tx_set = set()
-        cash_tx_set = set()
-
-        # Load transaction log from the Java simulator
-        reader = csv.reader(in_tx_f)
-        tx_writer = csv.writer(out_tx_f)
-        cash_tx_writer = csv.writer(out_cash_tx_f)
-        alert_tx_writer = csv.writer(out_alert_tx_f)
-
-        header = next(reader)
-        indices = {name: index for index, name in enumerate(header)}
-        num_columns = len(header)
-
-        tx_header = self.schema.tx_names
-        alert_header = self.schema.alert_tx_names
-        tx_writer.writerow(tx_header)
-        cash_tx_writer.writerow(tx_header)
-        alert_tx_writer.writerow(alert_header)
-
-        step_idx = indices["step"]
-        amt_idx = indices["amount"]
-        orig_idx = indices["nameOrig"]
-        dest_idx = indices["nameDest"]
-        sar_idx = indices["isSAR"]
-        alert_idx = indices["alertID"]
-        type_idx = indices["type"]
+        deg_param = os.getenv("DEGREE")
+        count_pairs = bool(deg_param)  # Degree census of distinct originator-beneficiary pairs
+
+        # Resume the conversion from the last checkpoint if any
+        checkpoint = self.create_checkpoint(count_pairs)
+        resume = checkpoint.load() if checkpoint is not None else None
+        if resume is not None:
+            manifest, state = resume
+            print("Resume the conversion of %s from byte %d (transaction ID %d)" % (
+                self.log_file, manifest["offset"], manifest["tx_id"]))
+            tx_dedupe = state["tx_dedupe"]
+            cash_tx_dedupe = state["cash_tx_dedupe"]
+            self.reports = state["reports"]
+            self.num_alert_txs = state["num_alert_txs"]
+            self.tx_index = state["tx_index"]
+            self.alert_tx_index = state["alert_tx_index"]
+        else:
+            # Avoid duplicated transaction CSV rows in the log file
+            tx_dedupe = create_dedupe(self.dedupe_strategy, self.dedupe_memory_mb, self.work_dir)
+            cash_tx_dedupe = create_dedupe(self.dedupe_strategy, self.dedupe_memory_mb, self.work_dir)
+            if self.account_index:
+                self.tx_index = AccountIndexBuilder()
+                self.alert_tx_index = AccountIndexBuilder()
+
+        if self.num_workers > 1 and not self.follow:  # Chunks need the complete log file
+            census = self.convert_tx_log_parallel(tx_dedupe, cash_tx_dedupe, count_pairs, checkpoint, resume)
+        else:
+            census = self.convert_tx_log(tx_dedupe, cash_tx_dedupe, count_pairs, checkpoint, resume)
+        if checkpoint is not None:
+            checkpoint.clear()  # De-duplication below rewrites the output files
+        removed_rows = tx_dedupe.finalize(os.path.join(self.work_dir, self.tx_file))
+        cash_tx_dedupe.finalize(os.path.join(self.work_dir, self.cash_tx_file))
+        if self.partition_by is not None and self.dedupe_strategy == "external":
+            for file_name in (self.tx_file, self.cash_tx_file):  # Rewritten by the de-duplication above
+                self.partition_file(file_name, self.schema.data["transaction"])
+        if self.tx_index is not None:
+            for builder, file_name, removed in ((self.tx_index, self.tx_file, removed_rows),
+                                                (self.alert_tx_index, self.alert_tx_file, None)):
+                idx_dir = builder.write(os.path.join(self.work_dir, file_name), removed)
+                print("Wrote the account index of %s to %s" % (file_name, idx_dir))
+
+        # Fan-in/out patterns of the degree census taken during the conversion
+        if deg_param:
+            report_file = os.path.join(self.work_dir, self.degree_report_file)
+            census.write_report(report_file, int(deg_param))
+            print("Wrote the degree census of %d accounts and %d distinct pairs to %s" % (
+                len(census.accounts), census.num_pairs(), report_file))
+
+    def create_writer(self, out_f):
+        """Create a CSV writer of an output file (close it before closing the file)
+        :param out_f: Output file object
+        :return: CSVWriter or AsyncCSVWriter object
+        """
+        return create_csv_writer(out_f, self.async_writers, self.writer_queue_size)
 
+    def create_checkpoint(self, count_pairs):
+        """Create the checkpoint of the transaction log conversion if checkpoints are enabled
+        :param count_pairs: Whether distinct originator-beneficiary pairs are collected
+        :return: Checkpoint object (None if checkpoints are disabled)
+        """
+        if not self.checkpoint_mb or self.follow:  # The log file is incomplete in the follow mode
+            return None
+        schema_json = json.dumps(self.schema.data, sort_keys=True).encode()
+        settings = {"dedupe": self.dedupe_strategy, "dedupe_memory_mb": self.dedupe_memory_mb,
+                    "count_pairs": count_pairs, "schema": hashlib.sha256(schema_json).hexdigest(),
+                    "base_date": str(self.schema._base_date),
+                    "partition": [self.partition_by, self.partition_step_window, self.partition_dir]}
+        return Checkpoint(os.path.join(self.work_dir, self.checkpoint_dir_name), self.log_file, settings)
+
+    def save_checkpoint(self, checkpoint, offset, tx_id, writers, out_files, tx_dedupe, cash_tx_dedupe, census):
+        """Flush the output files and save a checkpoint of the transaction log conversion
+        :param checkpoint: Checkpoint object
+        :param offset: Byte offset of the next unread row of the transaction log
+        :param tx_id: Next transaction ID
+        :param writers: CSV writers of the output files
+        :param out_files: Output file objects
+        :param tx_dedupe: De-duplication strategy of transactions
+        :param cash_tx_dedupe: De-duplication strategy of cash transactions
+        :param census: DegreeCensus of distinct originator-beneficiary pairs (or None)
+        """
+        for writer in writers:
+            writer.flush()
+        for out_f in out_files:
+            out_f.flush()
+        partition_sizes = dict()
+        for partitions in self.tx_partitions:
+            partition_sizes.update(partitions.sync())
+        state = {"tx_dedupe": tx_dedupe, "cash_tx_dedupe": cash_tx_dedupe, "census": census,
+                 "reports": self.reports, "num_alert_txs": self.num_alert_txs,
+                 "tx_index": self.tx_index, "alert_tx_index": self.alert_tx_index}
+        checkpoint.save(offset, tx_id, {os.path.abspath(out_f.name): out_f for out_f in out_files}, state,
+                        partition_sizes)
+        print("Saved a checkpoint at byte %d (transaction ID %d)" % (offset, tx_id))
+
+    def convert_tx_log(self, tx_dedupe, cash_tx_dedupe, count_pairs=False, checkpoint=None, resume=None):
+        """Convert the transaction log into transaction, cash transaction and alert transaction lists.
+        Alert transactions are also added to SAR typologies, so that the log is read only once.
+        :param tx_dedupe: De-duplication strategy of transactions
+        :param cash_tx_dedupe: De-duplication strategy of cash transactions
+        :param count_pairs: Whether distinct originator-beneficiary pairs are collected
+        :param checkpoint: Checkpoint object saved periodically (None: no checkpoint)
+        :param resume: Manifest and state of the checkpoint to resume from (None: convert from the beginning)
+        :return: DegreeCensus of distinct originator-beneficiary pairs (None if count_pairs is False)
+        """
+        census = DegreeCensus() if count_pairs else None
         tx_id = 1
-        for row in reader:
-            if len(row) < num_columns:
-                continue
-            try:
-                days = int(row[step_idx])
-                date_str = str(days)  # days_to_date(days)
-                amount = row[amt_idx]  # transaction amount
-                orig_id = row[orig_idx]  # originator ID
-                dest_id = row[dest_idx]  # beneficiary ID
-                sar_id = int(row[sar_idx])  # SAR transaction index
-                alert_id = int(row[alert_idx])  # Alert ID
-
-                is_sar = sar_id > 0
-                is_alert = alert_id >= 0
-                ttype = row[type_idx]
-            except ValueError:
-                continue
+        out_mode = "w"
+        lines = None  # Line reader with the byte offset of the next row for checkpoints
 
-            attr = {name: row[index] for name, index in indices.items()}
-            if ttype in CASH_TYPES:  # Cash transactions
-                cash_tx = (orig_id, dest_id, ttype, amount, date_str)
-                if cash_tx not in cash_tx_set:
-                    cash_tx_set.add(cash_tx)
-                    output_row = self.schema.get_tx_row(tx_id, date_str, amount, ttype, orig_id, dest_id,
-                                                        is_sar, alert_id, **attr)
-                    cash_tx_writer.writerow(output_row)
-            else:  # Account-to-account transactions including alert transactions
-                tx = (orig_id, dest_id, ttype, amount, date_str)
-                if tx not in tx_set:
-                    output_row = self.schema.get_tx_row(tx_id, date_str, amount, ttype, orig_id, dest_id,
-                                                        is_sar, alert_id, **attr)
-                    tx_writer.writerow(output_row)
-                    tx_set.add(tx)
-            if is_alert:  # Alert transactions
-                alert_type = self.reports.get(alert_id).get_reason()
-                alert_row = self.schema.get_alert_tx_row(alert_id, alert_type, is_sar, tx_id, orig_id, dest_id,
-                                                         ttype, amount, date_str, **attr)
-                alert_tx_writer.writerow(alert_row)
+        # Load transaction log from the Java simulator
+        if self.follow:  # Convert rows as soon as they are appended until the simulator writes the counter log
+            print("Follow %s until %s is written" % (self.log_file, self.counter_log_file))
+            in_tx_f = follow_lines(self.log_file, counter_log_written(self.log_file, self.counter_log_file),
+                                   timeout=self.follow_timeout)
+            reader = csv.reader(in_tx_f)
+            header = next(reader)
+        elif checkpoint is None and self.log_format == "csv":
+            in_tx_f = open(self.log_file, "r")  # Transaction log file from the Java simulator
+            reader = csv.reader(in_tx_f)
+            header = next(reader)
+        else:
+            header, offset = read_header(self.log_file)
+            if resume is not None:  # Continue from the checkpoint and append rows to the truncated outputs
+                manifest, state = resume
+                offset = manifest["offset"]
+                tx_id = manifest["tx_id"]
+                census = state["census"]
+                checkpoint.truncate_outputs(manifest)
+                out_mode = "a"
+            if self.log_format == "binary":  # Records formatted as rows with the offset of the next record
+                in_tx_f = None
+                lines = BinaryLogRows(self.log_file, offset)
+                reader = iter(lines)
+            else:
+                in_tx_f = open(self.log_file, "rb")
+                in_tx_f.seek(offset)
+                lines = OffsetLineReader(in_tx_f, offset)
+                reader = csv.reader(lines)
+        out_tx_f = open(os.path.join(self.work_dir, self.tx_file), out_mode)  # Output transaction file
+        out_cash_tx_f = open(os.path.join(self.work_dir, self.cash_tx_file), out_mode)  # Output cash transactions
+        out_alert_tx_f = open(os.path.join(self.work_dir, self.alert_tx_file), out_mode)  # Output alert transactions
+
+        tx_writer = self.create_writer(out_tx_f)
+        cash_tx_writer = self.create_writer(out_cash_tx_f)
+        alert_tx_writer = self.create_writer(out_alert_tx_f)
+
+        if out_mode == "w":
+            tx_writer.writerow(self.schema.tx_names)
+            cash_tx_writer.writerow(self.schema.tx_names)
+            alert_tx_writer.writerow(self.schema.alert_tx_names)
+
+        tx_parts, cash_tx_parts, alert_tx_parts = self.open_tx_partitions(resume)
+
+        tx_plan = self.schema.tx_plan.bind(header)  # Copy log columns with the same names as output columns
+        alert_tx_plan = self.schema.alert_tx_plan.bind(header)
+        alert_reasons = {alert_id: typology.get_reason() for alert_id, typology in self.reports.items()}
+        indices = {name: index for index, name in enumerate(header)}
 
+        def write_batch(_batch):
+            """Write a batch of parsed transactions, de-duplicating them in bulk"""
+            is_cash = [_tx[4] in CASH_TYPES for _tx in _batch]
+            cash_new = iter(cash_tx_dedupe.filter([tx_key(_tx) for _tx, _c in zip(_batch, is_cash) if _c]))
+            tx_new = iter(tx_dedupe.filter([tx_key(_tx) for _tx, _c in zip(_batch, is_cash) if not _c]))
+            pair_origs = list()  # Originators and beneficiaries of new transactions (degree census and index)
+            pair_dests = list()
+            alert_origs = list()
+            alert_dests = list()
+
+            for _tx, _c in zip(_batch, is_cash):
+                _row, _tx_id, _date_str, _amount, _ttype, _orig_id, _dest_id, _is_sar, _alert_id = _tx
+                if _c:  # Cash transactions
+                    if next(cash_new):
+                        _out_row = tx_plan.build(_tx[1:], _row)
+                        cash_tx_writer.writerow(_out_row)
+                        if cash_tx_parts is not None:
+                            cash_tx_parts.write_tx(_out_row)
+                elif next(tx_new):  # Account-to-account transactions including alert transactions
+                    _out_row = tx_plan.build(_tx[1:], _row)
+                    tx_writer.writerow(_out_row)
+                    if tx_parts is not None:
+                        tx_parts.write_tx(_out_row)
+                    pair_origs.append(_orig_id)
+                    pair_dests.append(_dest_id)
+                if _alert_id >= 0:  # Alert transactions
+                    _out_row = alert_tx_plan.build((_alert_id, alert_reasons[_alert_id], _is_sar, _tx_id,
+                                                    _orig_id, _dest_id, _ttype, _amount, _date_str), _row)
+                    alert_tx_writer.writerow(_out_row)
+                    if alert_tx_parts is not None:
+                        alert_tx_parts.write_tx(_out_row)
+                    self.add_alert_tx(_row, indices)  # Accumulate SAR typologies in the same pass
+                    alert_origs.append(_orig_id)
+                    alert_dests.append(_dest_id)
+            if census is not None:
+                census.add_pairs(pair_origs, pair_dests)
+            if self.tx_index is not None:  # Rows in the order they are written
+                self.tx_index.add_rows(pair_origs, pair_dests)
+                self.alert_tx_index.add_rows(alert_origs, alert_dests)
+
+        checkpoint_bytes = int(self.checkpoint_mb * 1024 * 1024)
+        checkpoint_offset = lines.offset if lines is not None else 0  # Offset of the last checkpoint
+        batch = list()
+        for tx in parse_tx_log(reader, header, tx_id):
+            batch.append(tx)
+            if len(batch) >= TX_BATCH_SIZE:
+                write_batch(batch)
+                batch = list()
+                if lines is not None and lines.offset - checkpoint_offset >= checkpoint_bytes:
+                    self.save_checkpoint(checkpoint, lines.offset, tx[1] + 1,
+                                         (tx_writer, cash_tx_writer, alert_tx_writer),
+                                         (out_tx_f, out_cash_tx_f, out_alert_tx_f),
+                                         tx_dedupe, cash_tx_dedupe, census)
+                    checkpoint_offset = lines.offset
+
+            tx_id = tx[1]
             if tx_id % 1000000 == 0:
                 print("Converted %d transactions." % tx_id)
-            tx_id += 1
+        write_batch(batch)
 
-        in_tx_f.close()
+        for writer in (tx_writer, cash_tx_writer, alert_tx_writer):
+            writer.close()
+        if in_tx_f is not None:
+            in_tx_f.close()
         out_tx_f.close()
         out_cash_tx_f.close()
         out_alert_tx_f.close()
-
-        # Count degrees (fan-in/out patterns)
-        deg_param = os.getenv("DEGREE")
-        if deg_param:
-            max_threshold = int(deg_param)
-            pred = defaultdict(set)  # Account, Predecessors
-            succ = defaultdict(set)  # Account, Successors
-            for orig, dest, _, _, _ in tx_set:
-                pred[dest].add(orig)
-                succ[orig].add(dest)
-            in_degrees = [len(nbs) for nbs in pred.values()]
-            out_degrees = [len(nbs) for nbs in succ.values()]
-            in_deg = Counter(in_degrees)
-            out_deg = Counter(out_degrees)
-            for th in range(2, max_threshold+1):
-                num_fan_in = sum([c for d, c in in_deg.items() if d >= th])
-                num_fan_out = sum([c for d, c in out_deg.items() if d >= th])
-                print("Number of fan-in / fan-out patterns with", th, "neighbors", num_fan_in, "/", num_fan_out)
+        self.close_partitions(self.tx_partitions)
+        self.alert_txs_loaded = True
+        return census
+
+    def convert_tx_log_parallel(self, tx_dedupe, cash_tx_dedupe, count_pairs=False, checkpoint=None, resume=None):
+        """Convert the transaction log with worker processes.
+        The log is split into byte-range chunks aligned on newlines. Workers count valid rows of each chunk
+        to assign global transaction IDs, then convert chunks into part files with fingerprints of the rows.
+        The part files are de-duplicated and concatenated in the order of chunks,
+        and alert transactions of each chunk are added to SAR typologies.
+        :param tx_dedupe: De-duplication strategy of transactions
+        :param cash_tx_dedupe: De-duplication strategy of cash transactions
+        :param count_pairs: Whether distinct originator-beneficiary pairs are collected
+        :param checkpoint: Checkpoint object saved after chunks (None: no checkpoint)
+        :param resume: Manifest and state of the checkpoint to resume from (None: convert from the beginning)
+        :return: DegreeCensus of distinct originator-beneficiary pairs (None if count_pairs is False)
+        """
+        header, offset = read_header(self.log_file)
+        indices = {name: index for index, name in enumerate(header)}
+        census = DegreeCensus() if count_pairs else None
+        tx_id = 1
+        out_mode = "w"
+        if resume is not None:  # Continue from the checkpoint and append rows to the truncated outputs
+            manifest, state = resume
+            offset = manifest["offset"]
+            tx_id = manifest["tx_id"]
+            census = state["census"]
+            checkpoint.truncate_outputs(manifest)
+            out_mode = "a"
+        tx_parts, cash_tx_parts, alert_tx_parts = self.open_tx_partitions(resume)
+        chunks = split_chunks(self.log_file, int(self.chunk_mb * 1024 * 1024), offset)
+        part_dir = tempfile.mkdtemp(prefix="parts_", dir=self.work_dir)
+        alert_reasons = {alert_id: typology.get_reason() for alert_id, typology in self.reports.items()}
+        init_args = (self.schema.data, self.schema._base_date, self.schema._total_steps, header, alert_reasons,
+                     part_dir, count_pairs, self.tx_index is not None)
+        print("Convert %d chunks of %s with %d workers" % (len(chunks), self.log_file, self.num_workers))
+
+        with multiprocessing.Pool(self.num_workers, initializer=init_chunk_worker, initargs=init_args) as pool:
+            counts = pool.map(count_chunk, [(self.log_file, start, end) for start, end in chunks])
+            first_ids = np.cumsum([tx_id] + counts).tolist()  # Transaction ID of the first row in each chunk
+            tasks = [(idx, self.log_file, start, end, first_id)
+                     for idx, ((start, end), first_id) in enumerate(zip(chunks, first_ids))]
+            results = pool.imap(convert_chunk, tasks)  # Results in the order of chunks
+
+            checkpoint_bytes = int(self.checkpoint_mb * 1024 * 1024)
+            checkpoint_offset = offset  # Offset of the last checkpoint
+            with open(os.path.join(self.work_dir, self.tx_file), out_mode) as out_tx_f, \
+                    open(os.path.join(self.work_dir, self.cash_tx_file), out_mode) as out_cash_tx_f, \
+                    open(os.path.join(self.work_dir, self.alert_tx_file), out_mode) as out_alert_tx_f:
+                if out_mode == "w":
+                    csv.writer(out_tx_f).writerow(self.schema.tx_names)
+                    csv.writer(out_cash_tx_f).writerow(self.schema.tx_names)
+                    csv.writer(out_alert_tx_f).writerow(self.schema.alert_tx_names)
+                for idx, chunk_census, chunk_tx_index, chunk_alert_index, alert_rows in results:
+                    flags = append_part(out_tx_f, os.path.join(part_dir, "tx_%d" % idx), tx_dedupe, tx_parts)
+                    append_part(out_cash_tx_f, os.path.join(part_dir, "cash_%d" % idx), cash_tx_dedupe,
+                                cash_tx_parts)
+                    append_part(out_alert_tx_f, os.path.join(part_dir, "alert_%d" % idx), None, alert_tx_parts)
+                    if chunk_census is not None:
+                        census.merge(chunk_census)
+                    if chunk_tx_index is not None:
+                        self.tx_index.merge(chunk_tx_index, flags)
+                        self.alert_tx_index.merge(chunk_alert_index)
+                    for row in alert_rows:  # Accumulate SAR typologies in the order of transactions
+                        self.add_alert_tx(row, indices)
+                    print("Converted chunk %d/%d" % (idx + 1, len(chunks)))
+                    chunk_end = chunks[idx][1]
+                    if checkpoint is not None and chunk_end - checkpoint_offset >= checkpoint_bytes:
+                        self.save_checkpoint(checkpoint, chunk_end, first_ids[idx + 1], (),
+                                             (out_tx_f, out_cash_tx_f, out_alert_tx_f),
+                                             tx_dedupe, cash_tx_dedupe, census)
+                        checkpoint_offset = chunk_end
+
+        shutil.rmtree(part_dir, ignore_errors=True)
+        self.close_partitions(self.tx_partitions)
+        self.alert_txs_loaded = True
+        return census
 
     def convert_alert_members(self):
         input_file = self.group_file
@@ -843,8 +1383,8 @@ class LogConverter:
         indices = {name: index for index, name in enumerate(header)}
 
         writer = csv.writer(wf)
-        header = self.schema.alert_acct_names
-        writer.writerow(header)
+        writer.writerow(self.schema.alert_acct_names)
+        alert_acct_plan = self.schema.alert_acct_plan.bind(header)
 
         for row in reader:
             reason = row[indices["reason"]]
@@ -859,56 +1399,76 @@ class LogConverter:
                 self.reports[alert_id] = AMLTypology(reason)
             self.reports[alert_id].add_member(account_id, is_sar)
 
-            attr = {name: row[index] for name, index in indices.items()}
-            output_row = self.schema.get_alert_acct_row(alert_id, reason, account_id, account_id, is_sar,
-                                                        model_id, schedule_id, bank_id, **attr)
+            output_row = alert_acct_plan.build((alert_id, reason, account_id, account_id, is_sar,
+                                                model_id, schedule_id, bank_id), row)
             writer.writerow(output_row)
 
 
     def output_sar_cases(self):
-        """Extract SAR account list involved in alert transactions from transaction log file
+        """Extract SAR account list involved in alert transactions.
+        If the transaction log has been converted, alert transactions loaded in the same pass are used
+        instead of reading the log file again.
         """
         input_file = self.log_file
         output_file = os.path.join(self.work_dir, self.sar_acct_file)
 
-        print("Convert SAR typologies from %s to %s" % (input_file, output_file))
-        with open(input_file, "r") as rf:
-            reader = csv.reader(rf)
-            alerts = self.sar_accounts(reader)
+        if self.alert_txs_loaded:
+            print("Convert SAR typologies to %s" % output_file)
+            alerts = self.extract_sar_accounts()
+        else:
+            print("Convert SAR typologies from %s to %s" % (input_file, output_file))
+            if self.log_format == "binary":
+                alerts = self.sar_accounts(chain([read_header(input_file)[0]], BinaryLogRows(input_file)))
+            else:
+                with open(input_file, "r") as rf:
+                    reader = csv.reader(rf)
+                    alerts = self.sar_accounts(reader)
         
         with open(output_file, "w") as wf:
             writer = csv.writer(wf)
             self.write_sar_accounts(writer, alerts)
 
-    
+    def add_alert_tx(self, row, indices):
+        """Add an alert transaction of the transaction log to its SAR typology
+        :param row: Transaction log row
+        :param indices: dict of column names and indices of the transaction log
+        """
+        try:
+            days = int(row[indices["step"]])
+            amount = float(row[indices["amount"]])
+            orig = int(row[indices["nameOrig"]])
+            dest = int(row[indices["nameDest"]])
+            alert_id = int(row[indices["alertID"]])
+            orig_name = "C_%d" % orig
+            dest_name = "C_%d" % dest
+        except ValueError:
+            return
+
+        if alert_id >= 0 and alert_id in self.reports:  # SAR transactions
+            attr = {name: row[index] for name, index in indices.items()}
+            self.reports[alert_id].add_tx(self.num_alert_txs, amount, days, orig, dest, orig_name, dest_name, attr)
+            self.num_alert_txs += 1
+
     def sar_accounts(self, reader):
         header = next(reader)
         indices = {name: index for index, name in enumerate(header)}
         columns = len(header)
 
-        tx_id = 0
         for row in reader:
             if len(row) < columns:
                 continue
-            try:
-                days = int(row[indices["step"]])
-                amount = float(row[indices["amount"]])
-                orig = int(row[indices["nameOrig"]])
-                dest = int(row[indices["nameDest"]])
-                alert_id = int(row[indices["alertID"]])
-                orig_name = "C_%d" % orig
-                dest_name = "C_%d" % dest
-            except ValueError:
-                continue
-
-            if alert_id >= 0 and alert_id in self.reports:  # SAR transactions
-                attr = {name: row[index] for name, index in indices.items()}
-                self.reports[alert_id].add_tx(tx_id, amount, days, orig, dest, orig_name, dest_name, attr)
-                tx_id += 1
+            self.add_alert_tx(row, indices)
+        return self.extract_sar_accounts()
 
+    def extract_sar_accounts(self):
+        """Extract accounts involved in alert transactions of SAR typologies
+        :return: List of SAR account rows
+        """
         sar_accounts = list()
         count = 0
         num_reports = len(self.reports)
+        for typology in self.reports.values():  # Index members recorded outside of this method
+            self.recorded_accounts.update(typology.recorded_members)
         for sar_id, typology in self.reports.items():
             if typology.count == 0:
                 continue
@@ -923,12 +1483,12 @@ class LogConverter:
                 if (not self.account_recorded(orig_acct)):
                     acct_id = orig_acct
                     cust_id = orig_name
-                    typology.recorded_members.add(acct_id)
+                    self.record_account(typology, acct_id)
                     sar_accounts.append((sar_id, acct_id, cust_id, days_to_date(step), reason, self.org_type(acct_id), is_sar))
                 if (not self.account_recorded(dest_acct)):
                     acct_id = dest_acct
                     cust_id = dest_name
-                    typology.recorded_members.add(acct_id)
+                    self.record_account(typology, acct_id)
                     sar_accounts.append((sar_id, acct_id, cust_id, days_to_date(step), reason, self.org_type(acct_id), is_sar))
                 
             count += 1
@@ -941,18 +1501,150 @@ class LogConverter:
 
 
     def write_sar_accounts(self, writer, sar_accounts):
-        writer.writerow(
-            ["ALERT_ID", "ACCOUNT_ID", "CUSTOMER_ID", "EVENT_DATE",
-             "ALERT_TYPE", "ACCOUNT_TYPE", "IS_SAR"])
+        writer.writerow([column["name"] for column in SAR_ACCOUNT_COLUMNS])
 
         for alert in sar_accounts:
             writer.writerow(alert)
 
+    def record_account(self, typology, acct_id):
+        """Record an account as a member of the typology and add it to the recorded account index
+        :param typology: AMLTypology object
+        :param acct_id: Account ID
+        """
+        typology.recorded_members.add(acct_id)
+        self.recorded_accounts.add(acct_id)
+
+    def partition_writer(self, file_name, header, columns=None):
+        """Create the writer of partitioned copies of an output list under the partition directory
+        (e.g. partitions/transactions/orig_bank=bank_a/steps=0-29/transactions.csv)
+        :param file_name: Output file name
+        :param header: CSV header of the output list
+        :param columns: Schema columns of a transaction list (None: account list partitioned by bank)
+        :return: PartitionedCSVWriter (accounts) or TransactionPartitionWriter object
+        """
+        base_name = os.path.basename(file_name)
+        out_dir = os.path.join(self.work_dir, self.partition_dir, os.path.splitext(base_name)[0])
+        if columns is None:
+            return PartitionedCSVWriter(out_dir, base_name, header, self.partition_max_open_files)
+        data_types = [column.get("dataType") for column in columns]
+        indices = (data_types.index("orig_id"), data_types.index("dest_id"), data_types.index("timestamp"))
+        return TransactionPartitionWriter(out_dir, base_name, header, self.acct_banks, indices,
+                                          self.partition_by == "bank_pair", self.partition_step_window,
+                                          self.schema.date_table.step_of, self.partition_max_open_files)
+
+    def open_acct_partitions(self):
+        """Create the partition writer of the account list if the partition key is set
+        :return: PartitionedCSVWriter object (None if outputs are not partitioned)
+        """
+        if self.partition_by is None:
+            return None
+        partitions = self.partition_writer(self.out_acct_file, self.schema.acct_names)
+        if os.path.isdir(partitions.root_dir):
+            shutil.rmtree(partitions.root_dir)  # Remove partitions of the previous run
+        self.acct_banks.clear()
+        return partitions
+
+    def open_tx_partitions(self, resume=None):
+        """Create the partition writers of the transaction, cash transaction and alert transaction lists,
+        which are fed with the rows written to the lists. Lists rewritten by the external de-duplication
+        are partitioned after it by partition_file instead.
+        :param resume: Manifest and state of the checkpoint to resume from (None: convert from the beginning)
+        :return: List of the writers of the three lists (None if a list is not partitioned during the conversion)
+        """
+        self.tx_partitions = list()
+        if self.partition_by is None:
+            return [None, None, None]
+        inline = self.dedupe_strategy != "external"
+        outputs = [(self.tx_file, self.schema.tx_names, self.schema.data["transaction"], inline),
+                   (self.cash_tx_file, self.schema.tx_names, self.schema.data["transaction"], inline),
+                   (self.alert_tx_file, self.schema.alert_tx_names, self.schema.data["alert_tx"], True)]
+        writers = list()
+        for file_name, header, columns, enabled in outputs:
+            partitions = None
+            if enabled:
+                partitions = self.partition_writer(file_name, header, columns)
+                if resume is not None:  # Partition files have been truncated with the output files
+                    partitions.resume(resume[0]["outputs"])
+                elif os.path.isdir(partitions.root_dir):
+                    shutil.rmtree(partitions.root_dir)  # Remove partitions of the previous run
+                self.tx_partitions.append(partitions)
+            writers.append(partitions)
+        return writers
+
+    def close_partitions(self, writers):
+        """Close partition writers
+        :param writers: List of PartitionedCSVWriter objects
+        """
+        for partitions in writers:
+            partitions.close()
+            print("Partitioned %s into %d files (%d opens) in %s" % (
+                partitions.file_name, len(partitions.partitions()), partitions.num_opens, partitions.root_dir))
+        if writers is self.tx_partitions:
+            self.tx_partitions = list()
+
+    def partition_file(self, file_name, columns):
+        """Write partitioned copies of a finished transaction list (e.g. after the external de-duplication)
+        :param file_name: Output file name
+        :param columns: Schema columns of the transaction list
+        """
+        with open(os.path.join(self.work_dir, file_name), "r") as rf:
+            reader = csv.reader(rf)
+            partitions = self.partition_writer(file_name, next(reader), columns)
+            if os.path.isdir(partitions.root_dir):
+                shutil.rmtree(partitions.root_dir)  # Remove partitions of the previous run
+            partitions.write_txs(reader)
+        self.close_partitions([partitions])
+
+    def export_sqlite(self):
+        """Load the account, transaction and alert lists into a SQLite database with indexes
+        of account IDs, alert IDs and timestamps if the database is set
+        """
+        if not self.sqlite_db:
+            return
+        db_file = os.path.join(self.work_dir, self.sqlite_db)
+        tables = [
+            ("accounts", os.path.join(self.work_dir, self.out_acct_file), self.schema.data["account"]),
+            ("transactions", os.path.join(self.work_dir, self.tx_file), self.schema.data["transaction"]),
+            ("cash_transactions", os.path.join(self.work_dir, self.cash_tx_file), self.schema.data["transaction"]),
+            ("alert_members", os.path.join(self.work_dir, self.alert_acct_file), self.schema.data["alert_member"]),
+            ("alert_transactions", os.path.join(self.work_dir, self.alert_tx_file), self.schema.data["alert_tx"]),
+        ]
+        print("Export the outputs to %s" % db_file)
+        num_rows = export_sqlite(db_file, tables, self.sqlite_batch_rows)
+        for table, rows in num_rows.items():
+            print("Loaded %d rows into table %s" % (rows, table))
+
+    def convert_output_format(self):
+        """Convert the output CSV files into Parquet files with the value types in the schema
+        if the output format is "parquet"
+        """
+        if self.output_format != "parquet":
+            return
+        outputs = [
+            (self.out_acct_file, self.schema.data["account"]),
+            (self.tx_file, self.schema.data["transaction"]),
+            (self.cash_tx_file, self.schema.data["transaction"]),
+            (self.alert_tx_file, self.schema.data["alert_tx"]),
+            (self.alert_acct_file, self.schema.data["alert_member"]),
+            (self.party_individual_file, self.schema.data["party_individual"]),
+            (self.party_organization_file, self.schema.data["party_organization"]),
+            (self.account_mapping_file, self.schema.data["account_mapping"]),
+            (self.resolved_entities_file, self.schema.data["resolved_entities"]),
+            (self.sar_acct_file, SAR_ACCOUNT_COLUMNS),
+        ]
+        for file_name, columns in outputs:
+            csv_file = os.path.join(self.work_dir, file_name)
+            if not os.path.exists(csv_file):
+                continue
+            parquet_file = parquet_path(csv_file)
+            print("Convert %s to %s" % (csv_file, parquet_file))
+            value_types = {column["name"]: column.get("valueType", "string") for column in columns}
+            csv_to_parquet(csv_file, parquet_file, value_types, self.row_group_size, self.parquet_compression)
+            if not self.keep_csv:
+                os.remove(csv_file)
+
     def account_recorded(self, acct_id):
-        for sar_id, typology in self.reports.items():
-            if acct_id in typology.recorded_members:
-                return True
-        return False
+        return acct_id in self.recorded_accounts
 
 
 if __name__ == "__main__":
@@ -974,3 +1666,5 @@ if __name__ == "__main__":
     converter.convert_alert_members()
     converter.convert_acct_tx()
     converter.output_sar_cases()
+    converter.export_sqlite()  # Before the CSV files are converted into Parquet files
+    converter.convert_output_format()
@@ -3,68 +3,95 @@ Generate scale-free graph and output degree-distribution CSV file
 """
 
 import numpy as np
-import networkx as nx
-from collections import Counter
-import csv
 import sys
 
+from amlsim.degree_sequence import count_joint_degrees, write_degree_csv
 
-def kronecker_generator(scale, edge_factor):
-    """Kronecker graph generator
-  Ported from octave code in https://graph500.org/?page_id=12#alg:generator
-  """
-    N = 2 ** scale  # Number of vertices
-    M = N * edge_factor  # Number of edges
-    A, B, C = (0.57, 0.19, 0.19)  # Initiator probabilities
-    ijw = np.ones((3, M))  # Index arrays
-
-    ab = A + B
-    c_norm = C / (1 - (A + B))
-    a_norm = A / (A + B)
 
-    for ib in range(scale):
-        ii_bit = (np.random.rand(1, M) > ab).astype(int)
-        ac = c_norm * ii_bit + a_norm * (1 - ii_bit)
-        jj_bit = (np.random.rand(1, M) > ac).astype(int)
-        ijw[:2, :] = ijw[:2, :] + 2 ** ib * np.vstack((ii_bit, jj_bit))
-
-    ijw[2, :] = np.random.rand(1, M)
-    ijw[:2, :] = ijw[:2, :] - 1
-    q = range(M)
-    np.random.shuffle(q)
-    ijw = ijw[:, q]
-    edges = ijw[:2, :].astype(int).T
-    _g = nx.DiGraph()
-    _g.add_edges_from(edges)
-    return _g
+INITIATOR = (0.57, 0.19, 0.19)  # Initiator probabilities A, B, C of R-MAT (Graph500)
+DEFAULT_CHUNK_SIZE = 2 ** 22  # Number of edges generated at once
 
 
-def kronecker_generator_general(_n, _m):
-    # TODO: Accept general number of nodes and edges
-    A, B, C = (0.57, 0.19, 0.19)  # Initiator probabilities
-    ijw = np.ones((3, _m))  # Index arrays
+def rmat_edges(weights, num_edges, seed=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Generate R-MAT (Kronecker) edges chunk by chunk
+    Ported from octave code in https://graph500.org/?page_id=12#alg:generator
+    :param weights: Vertex ID increment of each recursion level (e.g. 1, 2, 4, ... for 2^scale vertices)
+    :param num_edges: Number of edges
+    :param seed: Seed for random number generator
+    :param chunk_size: Maximum number of edges in a chunk
+    :return: Generator of source and destination vertex ID arrays
+    """
+    A, B, C = INITIATOR
     ab = A + B
     c_norm = C / (1 - (A + B))
     a_norm = A / (A + B)
+    rng = np.random.RandomState(seed)
+
+    remaining = num_edges
+    while remaining > 0:
+        m = min(chunk_size, remaining)
+        src = np.zeros(m, dtype=np.int64)
+        dst = np.zeros(m, dtype=np.int64)
+        for w in weights:
+            ii_bit = rng.random_sample(m) > ab
+            ac = np.where(ii_bit, c_norm, a_norm)
+            jj_bit = rng.random_sample(m) > ac
+            src += ii_bit * w
+            dst += jj_bit * w
+        yield src, dst
+        remaining -= m
+
+
+def count_degrees(edges, num_vertices):
+    """Count in/out-degrees from edge chunks without constructing a graph
+    :param edges: Iterable of source and destination vertex ID arrays
+    :param num_vertices: Number of vertices
+    :return: In-degree and out-degree arrays of all vertices (including isolated vertices)
+    """
+    in_deg = np.zeros(num_vertices, dtype=np.int64)
+    out_deg = np.zeros(num_vertices, dtype=np.int64)
+    for src, dst in edges:
+        counts = np.bincount(src)  # Only up to the largest vertex ID of the chunk
+        out_deg[:len(counts)] += counts
+        counts = np.bincount(dst)
+        in_deg[:len(counts)] += counts
+    return in_deg, out_deg
+
+
+def kronecker_generator(scale, edge_factor, seed=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Kronecker graph generator (2^scale vertices)
+    Edges are generated in chunks and only degrees are kept. Multiple edges and self loops are counted.
+    :param scale: Logarithm (base 2) of the number of vertices
+    :param edge_factor: Number of edges per vertex
+    :param seed: Seed for random number generator
+    :param chunk_size: Maximum number of edges in a chunk
+    :return: In-degree and out-degree arrays
+    """
+    N = 2 ** scale  # Number of vertices
+    M = N * edge_factor  # Number of edges
+    weights = [2 ** ib for ib in range(scale)]
+    return count_degrees(rmat_edges(weights, M, seed, chunk_size), N)
+
+
+def kronecker_generator_general(_n, _m, seed=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Kronecker graph generator with general number of vertices and edges
+    Vertex IDs are the sum of (n // 2), (n // 4), ..., 1 weighted by random bits, so they are always less than n.
+    :param _n: Number of vertices
+    :param _m: Number of edges
+    :param seed: Seed for random number generator
+    :param chunk_size: Maximum number of edges in a chunk
+    :return: In-degree and out-degree arrays
+    """
+    weights = list()
     tmp = _n
     while tmp > 0:
         tmp //= 2
-        ii_bit = (np.random.rand(1, _m) > ab).astype(int)
-        ac = c_norm * ii_bit + a_norm * (1 - ii_bit)
-        jj_bit = (np.random.rand(1, _m) > ac).astype(int)
-        ijw[:2, :] = ijw[:2, :] + tmp * np.vstack((ii_bit, jj_bit))
-    ijw[2, :] = np.random.rand(1, _m)
-    ijw[:2, :] = ijw[:2, :] - 1
-    q = range(_m)
-    np.random.shuffle(q)
-    ijw = ijw[:, q]
-    edges = ijw[:2, :].astype(int).T
-    _g = nx.DiGraph()
-    _g.add_edges_from(edges)
-    return _g
+        weights.append(tmp)
+    return count_degrees(rmat_edges(weights, _m, seed, chunk_size), _n)
 
 
 def powerlaw_cluster_generator(_n, _edge_factor):
+    import networkx as nx  # Only this generator depends on networkx
     edges = nx.barabasi_albert_graph(_n, _edge_factor, seed=0).edges()  # Undirected edges
 
     # Swap the direction of half edges to diffuse degree
@@ -77,24 +104,32 @@ def powerlaw_cluster_generator(_n, _edge_factor):
 if __name__ == "__main__":
     argv = sys.argv
     if len(argv) < 4:
-        print("Usage: python3 %s [NumVertices] [EdgeFactor] [DegCSV]" % argv[0])
+        print("Usage: python3 %s [NumVertices] [EdgeFactor] [DegCSV] [Generator(powerlaw|kronecker)]" % argv[0])
         exit(1)
 
     n = int(argv[1])
     factor = int(argv[2])
-    g = powerlaw_cluster_generator(n, factor)
-
-    print("Number of vertices: %d" % g.number_of_nodes())  # Number of vertices (accounts)
-    print("Number of edges: %d" % g.number_of_edges())  # Number of edges (transactions)
-
-    in_deg = Counter(g.in_degree().values())
-    out_deg = Counter(g.out_degree().values())
+    deg_csv = argv[3]
+    generator = argv[4] if len(argv) >= 5 else "powerlaw"
+
+    if generator == "kronecker":
+        if n & (n - 1) == 0:  # Power of two
+            in_deg, out_deg = kronecker_generator(n.bit_length() - 1, factor, seed=0)
+        else:
+            in_deg, out_deg = kronecker_generator_general(n, n * factor, seed=0)
+        num_edges = int(in_deg.sum())
+    elif generator == "powerlaw":
+        g = powerlaw_cluster_generator(n, factor)
+        nodes = sorted(g.nodes())
+        in_deg = [g.in_degree(v) for v in nodes]
+        out_deg = [g.out_degree(v) for v in nodes]
+        num_edges = g.number_of_edges()
+    else:
+        print("Unknown generator name: %s" % generator)
+        exit(1)
 
-    keys = set(sorted(list(in_deg.keys()) + list(out_deg.keys())))
+    print("Number of vertices: %d" % len(in_deg))  # Number of vertices (accounts)
+    print("Number of edges: %d" % num_edges)  # Number of edges (transactions)
 
-    with open(argv[3], "w") as wf:
-        writer = csv.writer(wf)
-        writer.writerow(["Count", "In-degree", "Out-degree"])
-        for k in keys:
-            # Degree, number of vertices for in-degree, number of vertices for out-degree
-            writer.writerow([k, in_deg[k], out_deg[k]])
+    counts, in_values, out_values = count_joint_degrees(in_deg, out_deg)
+    write_degree_csv(deg_csv, counts, in_values, out_values)
@@ -16,6 +16,7 @@ SHELL_PROC=$$
 
 function failed() {
     echo "Failed: $1" >&2
+    [[ -n "${CONVERTER_PROC}" ]] && kill $CONVERTER_PROC 2>/dev/null  # Stop the converter following the log
     kill $SHELL_PROC  # Exit this script
 }
 
@@ -25,9 +26,27 @@ function run(){
 
 run "python3 scripts/transaction_graph_generator.py ${CONF_JSON} ${EDGE_RATIO}"
 
-run "sh scripts/run_AMLSim.sh ${CONF_JSON}"
-
-run "python3 scripts/convert_logs.py ${CONF_JSON}"
+if [[ -n "${FOLLOW}" ]]; then
+  # Remove the transaction and counter logs of the previous run, then convert the new log while it is appended
+  python3 - "${CONF_JSON}" <<'END'
+import json, os, sys
+conf = json.load(open(sys.argv[1]))
+out_dir = os.path.join(conf["output"]["directory"], conf["general"]["simulation_name"])
+for key in ("transaction_log", "counter_log"):
+    path = os.path.join(out_dir, conf["output"][key])
+    if os.path.exists(path):
+        os.remove(path)
+END
+  export FOLLOW
+  run "python3 scripts/convert_logs.py ${CONF_JSON}" &
+  CONVERTER_PROC=$!
+  run "sh scripts/run_AMLSim.sh ${CONF_JSON}"
+  wait $CONVERTER_PROC
+else
+  run "sh scripts/run_AMLSim.sh ${CONF_JSON}"
+
+  run "python3 scripts/convert_logs.py ${CONF_JSON}"
+fi
 
 #python3 scripts/validation/validate_alerts.py "${CONF_JSON}" 2>&1 | tee -a "${OUTPUT_LOG}"
 #python3 scripts/visualize/plot_distributions.py "${CONF_JSON}" 2>&1 | tee -a "${OUTPUT_LOG}"
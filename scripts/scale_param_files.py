@@ -0,0 +1,120 @@
+"""
+Scale a parameter directory (accounts, degree distribution, normal models and alert patterns)
+to an arbitrary number of accounts
+"""
+
+import os
+import sys
+import csv
+import shutil
+import numpy as np
+
+from amlsim.degree_sequence import load_degree_csv, write_degree_csv, merge_degree_rows, balance_degrees
+
+
+ACCOUNT_FILE = "accounts.csv"
+DEGREE_FILE = "degree.csv"
+NORMAL_MODEL_FILE = "normalModels.csv"
+ALERT_PATTERN_FILE = "alertPatterns.csv"
+SKIP_FILES = {"conf.json"}  # Configuration files refer to the base directory
+
+
+def scale_counts(counts, total):
+    """Scale counts proportionally so that their sum is exactly the given total (largest remainder method)
+    :param counts: Non-negative counts
+    :param total: Sum of the scaled counts
+    :return: Scaled counts as an int64 array
+    """
+    counts = np.asarray(counts, dtype=np.int64)
+    base_total = counts.sum()
+    if base_total <= 0:
+        raise ValueError("The sum of counts must be positive")
+    quotas = counts * (total / base_total)
+    scaled = np.floor(quotas).astype(np.int64)
+    remainder = total - scaled.sum()
+    if remainder > 0:
+        order = np.argsort(-(quotas - scaled), kind="stable")
+        scaled[order[:remainder]] += 1
+    return scaled
+
+
+def scale_degree_distribution(counts, in_deg, out_deg, num_accounts):
+    """Scale a degree distribution to the number of accounts with the same shape.
+    The total number of vertices is exactly the number of accounts,
+    so that `get_in_and_out_degrees` needs no repetitions of the degree sequence.
+    :return: Number of vertices, in-degree and out-degree arrays
+    """
+    scaled = scale_counts(counts, num_accounts)
+    scaled, in_deg, out_deg = merge_degree_rows(scaled, in_deg, out_deg)
+    return balance_degrees(scaled, in_deg, out_deg)
+
+
+def scale_csv_counts(in_csv, out_csv, ratio=None, total=None):
+    """Scale the "count" column of a parameter CSV file
+    :param in_csv: Input parameter CSV file
+    :param out_csv: Output parameter CSV file
+    :param ratio: Scale ratio (non-zero counts are kept at least one)
+    :param total: Sum of the scaled counts (overrides the ratio)
+    :return: Sum of the input counts and the scaled counts
+    """
+    with open(in_csv, "r") as rf:
+        reader = csv.reader(rf)
+        header = next(reader)
+        rows = [row for row in reader if len(row) > 0]
+
+    count_idx = header.index("count")
+    param_rows = [row for row in rows if not row[0].startswith("#")]
+    counts = np.array([int(row[count_idx]) for row in param_rows], dtype=np.int64)
+    if total is not None:
+        scaled = scale_counts(counts, total)
+    else:
+        scaled = np.where(counts > 0, np.maximum(np.rint(counts * ratio), 1), 0).astype(np.int64)
+    for row, count in zip(param_rows, scaled.tolist()):
+        row[count_idx] = str(count)
+
+    with open(out_csv, "w") as wf:
+        writer = csv.writer(wf, lineterminator="\n")
+        writer.writerow(header)
+        writer.writerows(rows)
+    return int(counts.sum()), int(scaled.sum())
+
+
+def scale_param_dir(base_dir, num_accounts, out_dir):
+    """Write a parameter directory scaled to the number of accounts
+    :param base_dir: Base parameter directory
+    :param num_accounts: Number of accounts of the output parameter directory
+    :param out_dir: Output parameter directory
+    """
+    os.makedirs(out_dir, exist_ok=True)
+
+    base_num, _ = scale_csv_counts(os.path.join(base_dir, ACCOUNT_FILE), os.path.join(out_dir, ACCOUNT_FILE),
+                                   total=num_accounts)
+    ratio = num_accounts / base_num
+    print("Scale %s from %d to %d accounts (ratio: %f)" % (base_dir, base_num, num_accounts, ratio))
+
+    counts, in_deg, out_deg = load_degree_csv(os.path.join(base_dir, DEGREE_FILE))
+    counts, in_deg, out_deg = scale_degree_distribution(counts, in_deg, out_deg, num_accounts)
+    write_degree_csv(os.path.join(out_dir, DEGREE_FILE), counts, in_deg, out_deg)
+    print("Degree distribution: %d rows, %d vertices, %d edges"
+          % (len(counts), counts.sum(), (counts * in_deg).sum()))
+
+    for param_file in (NORMAL_MODEL_FILE, ALERT_PATTERN_FILE):
+        in_csv = os.path.join(base_dir, param_file)
+        if os.path.isfile(in_csv):
+            base_count, count = scale_csv_counts(in_csv, os.path.join(out_dir, param_file), ratio=ratio)
+            print("%s: %d -> %d" % (param_file, base_count, count))
+
+    scaled_files = {ACCOUNT_FILE, DEGREE_FILE, NORMAL_MODEL_FILE, ALERT_PATTERN_FILE}
+    for name in os.listdir(base_dir):
+        path = os.path.join(base_dir, name)
+        if os.path.isfile(path) and name not in scaled_files and name not in SKIP_FILES:
+            shutil.copy(path, os.path.join(out_dir, name))
+
+
+if __name__ == "__main__":
+    argv = sys.argv
+    if len(argv) < 4:
+        print("Usage: python3 %s [BaseParamDir] [NumAccounts] [OutputParamDir]" % argv[0])
+        exit(1)
+
+    scale_param_dir(argv[1], int(argv[2]), argv[3])
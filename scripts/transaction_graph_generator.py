@@ -12,15 +12,13 @@ import os
 import sys
 import logging
 
-import cProfile
-
 
 from collections import Counter, defaultdict
 from amlsim.nominator import Nominator
 from amlsim.normal_model import NormalModel
 
-from amlsim.random_amount import RandomAmount
-from amlsim.rounded_amount import RoundedAmount
+from amlsim.amount_distribution import RoundedDistribution, UniformDistribution, compile_distribution
+from amlsim.instrumentation import StageProfiler
 
 
 logging.basicConfig(level=logging.INFO)
@@ -801,6 +799,8 @@ class TransactionGenerator:
         idx_max_period = None
         idx_bank = None
         idx_sar = None
+        idx_amt_dist = None
+        idx_amt_params = None
 
         with open(alert_file, "r") as rf:
             reader = csv.reader(rf)
@@ -829,6 +829,10 @@ class TransactionGenerator:
                     idx_bank = i
                 elif k == "is_sar":  # SAR flag
                     idx_sar = i
+                elif k == "amount_distribution":  # Amount distribution name (optional)
+                    idx_amt_dist = i
+                elif k == "amount_params":  # Amount distribution parameters (optional)
+                    idx_amt_params = i
                 else:
                     logger.warning("Unknown column name in %s: %s" % (alert_file, k))
 
@@ -854,15 +858,37 @@ class TransactionGenerator:
                                    % (typology_name, str(self.alert_types.keys())))
                     continue
 
+                # Compile the amount distribution once for all typologies of this row
+                dist_name = row[idx_amt_dist] if idx_amt_dist is not None else ""
+                if dist_name:
+                    dist_params = row[idx_amt_params] if idx_amt_params is not None else ""
+                    amount_dist = compile_distribution(dist_name, min_amount, max_amount, dist_params, self.input_dir)
+                else:
+                    amount_dist = self.get_default_amount_dist(typology_name, min_amount, max_amount)
+
                 for i in range(num_patterns):
                     num_accts = random.randrange(min_accts, max_accts + 1)
                     period = random.randrange(min_period, max_period + 1)
-                    self.add_aml_typology(is_sar, typology_name, num_accts, min_amount, max_amount, period, bank_id, schedule)
+                    self.add_aml_typology(is_sar, typology_name, num_accts, min_amount, max_amount, period, bank_id,
+                                          schedule, amount_dist)
                     count += 1
                     if count % 1000 == 0:
                         logger.info("Created %d alerts" % count)
 
-    def add_aml_typology(self, is_sar, typology_name, num_accounts, min_amount, max_amount, period, bank_id="", schedule=1):
+    @staticmethod
+    def get_default_amount_dist(typology_name, min_amount, max_amount):
+        """Get the default amount distribution of an AML typology
+        :param typology_name: Name of pattern type
+        :param min_amount: Minimum amount of the transaction
+        :param max_amount: Maximum amount of the transaction
+        :return: Rounded amounts for fan-in and fan-out typologies, otherwise uniform amounts
+        """
+        if typology_name in ("fan_in", "fan_out"):
+            return RoundedDistribution(min_amount, max_amount)
+        return UniformDistribution(min_amount, max_amount)
+
+    def add_aml_typology(self, is_sar, typology_name, num_accounts, min_amount, max_amount, period, bank_id="", schedule=1,
+                         amount_dist=None):
         """Add an AML typology transaction set
         :param is_sar: Whether the alerted transaction set is SAR (True) or false-alert (False)
         :param typology_name: Name of pattern type
@@ -873,7 +899,11 @@ class TransactionGenerator:
         :param period: Period (number of days) for all transactions
         :param bank_id: Bank ID which it chooses members from. If empty, it chooses members from all banks.
         :param schedule: AML pattern transaction schedule model ID
+        :param amount_dist: Amount distribution (see amlsim.amount_distribution).
+            If None, the default distribution of the typology is used.
         """
+        if amount_dist is None:
+            amount_dist = self.get_default_amount_dist(typology_name, min_amount, max_amount)
 
         def add_node(_acct, _bank_id):
             """Set an attribute of bank ID to a member account
@@ -928,7 +958,7 @@ class TransactionGenerator:
         if typology_name == "fan_in":  # fan_in pattern (multiple accounts --> single (main) account)
             main_acct, main_bank_id = add_main_acct()
             num_neighbors = num_accounts - 1
-            amount = RoundedAmount(min_amount, max_amount).getAmount()
+            amount = float(amount_dist.sample(1)[0])
 
             if is_external:
                 sub_bank_candidates = [b for b, nbs in self.bank_to_accts.items()
@@ -951,7 +981,7 @@ class TransactionGenerator:
         elif typology_name == "fan_out":  # fan_out pattern (single (main) account --> multiple accounts)
             main_acct, main_bank_id = add_main_acct()
             num_neighbors = num_accounts - 1
-            amount = RoundedAmount(min_amount, max_amount).getAmount()
+            amount = float(amount_dist.sample(1)[0])
 
             if is_external:
                 sub_bank_candidates = [b for b, nbs in self.bank_to_accts.items()
@@ -992,8 +1022,8 @@ class TransactionGenerator:
                 self.remove_typology_candidate(n)
                 add_node(n, bene_bank_id)
 
-            for orig, bene in itertools.product(orig_accts, bene_accts):  # All-to-all transaction edges
-                amount = RandomAmount(min_amount, max_amount).getAmount()
+            amounts = amount_dist.sample(num_orig_accts * num_bene_accts).tolist()
+            for (orig, bene), amount in zip(itertools.product(orig_accts, bene_accts), amounts):  # All-to-all edges
                 date = random.randrange(start_date, end_date + 1)
                 add_edge(orig, bene, amount, date)
 
@@ -1027,18 +1057,18 @@ class TransactionGenerator:
                 self.remove_typology_candidate(n)
                 add_node(n, bene_bank_id)
 
-            for orig, bene in itertools.product(orig_accts, mid_accts):  # all-to-all transactions
-                amount = RandomAmount(min_amount, max_amount).getAmount()
+            amounts = amount_dist.sample(num_orig_accts * num_mid_accts).tolist()
+            for (orig, bene), amount in zip(itertools.product(orig_accts, mid_accts), amounts):  # all-to-all
                 date = random.randrange(start_date, end_date + 1)
                 add_edge(orig, bene, amount, date)
 
-            for orig, bene in itertools.product(mid_accts, bene_accts):  # all-to-all transactions
-                amount = RandomAmount(min_amount, max_amount).getAmount()
+            amounts = amount_dist.sample(num_mid_accts * num_bene_accts).tolist()
+            for (orig, bene), amount in zip(itertools.product(mid_accts, bene_accts), amounts):  # all-to-all
                 date = random.randrange(start_date, end_date + 1)
                 add_edge(orig, bene, amount, date)
 
         elif typology_name == "random":  # Random transactions among members
-            amount = RandomAmount(min_amount, max_amount).getAmount()
+            amount = float(amount_dist.sample(1)[0])
             date = random.randrange(start_date, end_date + 1)
 
             if is_external:
@@ -1070,7 +1100,7 @@ class TransactionGenerator:
                     prev_acct = next_acct
 
         elif typology_name == "cycle":  # Cycle transactions
-            amount = RandomAmount(min_amount, max_amount).getAmount()
+            amount = float(amount_dist.sample(1)[0])
             dates = sorted([random.randrange(start_date, end_date + 1) for _ in range(num_accounts)])
 
             if is_external:
@@ -1132,9 +1162,10 @@ class TransactionGenerator:
             # The date of all scatter transactions must be performed before middle day
             mid_date = (start_date + end_date) // 2
 
+            scatter_amounts = amount_dist.sample(len(mid_accts)).tolist()
             for i in range(len(mid_accts)):
                 mid_acct = mid_accts[i]
-                scatter_amount = RandomAmount(min_amount, max_amount).getAmount()
+                scatter_amount = scatter_amounts[i]
                 margin = scatter_amount * self.margin_ratio  # Margin of the intermediate account
                 amount = scatter_amount - margin
                 scatter_date = random.randrange(start_date, mid_date)
@@ -1169,7 +1200,7 @@ class TransactionGenerator:
 
             accumulated_amount = 0.0
             mid_date = (start_date + end_date) // 2
-            amount = RandomAmount(min_amount, max_amount).getAmount()
+            amount = float(amount_dist.sample(1)[0])
 
             for i in range(num_orig_accts):
                 orig_acct = orig_accts[i]
@@ -1286,6 +1317,13 @@ class TransactionGenerator:
                     writer.writerow(values)
 
 
+    def get_counts(self):
+        """Get the numbers of generated elements for the instrumentation report
+        :return: dict of the numbers of nodes, edges, normal models and alerts
+        """
+        return {"nodes": self.g.number_of_nodes(), "edges": self.g.number_of_edges(),
+                "normal_models": len(self.normal_models), "alerts": len(self.alert_groups)}
+
     def count__patterns(self, threshold=2):
         """Count the number of fan-in and fan-out patterns in the generated transaction graph
         """
@@ -1329,24 +1367,48 @@ if __name__ == "__main__":
     with open(_conf_file, "r") as rf:
         conf = json.load(rf)
 
-    txg = TransactionGenerator(conf, _sim_name)
-    txg.set_num_accounts()
-    txg.generate_normal_transactions()  # Load a parameter CSV file for the base transaction types
-    txg.load_account_list()  # Load account list CSV file
+    # Stage-level instrumentation (PROFILE environment variable overrides the "profile" flag in the configuration)
+    profile_param = os.getenv("PROFILE")
+    if profile_param is None:
+        profile_param = conf["graph_generator"].get("profile", False)
+    profiler = StageProfiler(parse_flag(str(profile_param)))
+
+    with profiler.stage("init"):
+        txg = TransactionGenerator(conf, _sim_name)
+    profiler.counter = txg.get_counts
+    with profiler.stage("set_num_accounts"):
+        txg.set_num_accounts()
+    with profiler.stage("generate_normal_transactions"):
+        txg.generate_normal_transactions()  # Load a parameter CSV file for the base transaction types
+    with profiler.stage("load_account_list"):
+        txg.load_account_list()  # Load account list CSV file
     if degree_threshold > 0:
         logger.info("Generated normal transaction network")
         txg.count_fan_in_out_patterns(degree_threshold)
-    txg.load_normal_models() # Load a parameter CSV file for Normal Models
-    #cProfile.run('txg.build_normal_models()')
-    txg.build_normal_models()
-    txg.set_main_acct_candidates()
-    txg.load_alert_patterns()  # Load a parameter CSV file for AML typology subgraphs
-    txg.mark_active_edges()
+    with profiler.stage("load_normal_models"):
+        txg.load_normal_models()  # Load a parameter CSV file for Normal Models
+    with profiler.stage("build_normal_models"):
+        txg.build_normal_models()
+    with profiler.stage("set_main_acct_candidates"):
+        txg.set_main_acct_candidates()
+    with profiler.stage("load_alert_patterns"):
+        txg.load_alert_patterns()  # Load a parameter CSV file for AML typology subgraphs
+    with profiler.stage("mark_active_edges"):
+        txg.mark_active_edges()
 
     if degree_threshold > 0:
         logger.info("Added alert transaction patterns")
         txg.count_fan_in_out_patterns(degree_threshold)
-    txg.write_account_list()  # Export accounts to a CSV file
-    txg.write_transaction_list()  # Export transactions to a CSV file
-    txg.write_alert_account_list()  # Export alert accounts to a CSV file
-    txg.write_normal_models()
+    with profiler.stage("write_account_list"):
+        txg.write_account_list()  # Export accounts to a CSV file
+    with profiler.stage("write_transaction_list"):
+        txg.write_transaction_list()  # Export transactions to a CSV file
+    with profiler.stage("write_alert_account_list"):
+        txg.write_alert_account_list()  # Export alert accounts to a CSV file
+    with profiler.stage("write_normal_models"):
+        txg.write_normal_models()
+
+    profile_file = os.path.join(txg.output_dir, conf["temporal"].get("profile", "generator_profile.json"))
+    profiler.write(profile_file)
+    if profiler.enabled:
+        logger.info("Exported the instrumentation report to %s" % profile_file)
@@ -3,13 +3,15 @@ Load output files from AMLSim and create NetworkX graph for analytics
 """
 import os
 import sys
-import csv
 from datetime import datetime, timedelta
 from dateutil.parser import parse
 from collections import Counter
 import networkx as nx
 import json
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from amlsim.columnar import open_rows
+
 
 # Account (vertex) and transaction (edge) attribute keys
 ACCT_SAR = "sar"
@@ -69,8 +71,7 @@ def load_result_csv(acct_csv: str, tx_csv: str, schema_data) -> nx.MultiDiGraph:
     num_txs = 0
     # Load account list CSV
     print("Load account list CSV file", acct_csv)
-    with open(acct_csv, "r") as rf:
-        reader = csv.reader(rf)
+    with open_rows(acct_csv) as reader:  # CSV or Parquet
         next(reader)  # Skip header
         for row in reader:
             acct_id = row[acct_id_idx]  # Account ID
@@ -85,8 +86,7 @@ def load_result_csv(acct_csv: str, tx_csv: str, schema_data) -> nx.MultiDiGraph:
 
     # Load transaction list CSV
     print("Loading transaction list CSV file", tx_csv)
-    with open(tx_csv, "r") as rf:
-        reader = csv.reader(rf)
+    with open_rows(tx_csv) as reader:  # CSV or Parquet
         next(reader)  # Skip header
         for row in reader:
             src_id = row[tx_src_idx]  # Originator account ID
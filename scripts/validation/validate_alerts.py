@@ -7,6 +7,9 @@ import networkx as nx
 from datetime import datetime
 import logging
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from amlsim.columnar import open_rows
+
 
 def col2idx(cols):
     result = dict()  # Column name -> column index
@@ -84,8 +87,7 @@ def load_alert_tx(_alert_tx_schema, _alert_tx_csv):
             date_idx = i
 
     alert_graphs = defaultdict(nx.DiGraph)
-    with open(_alert_tx_csv, "r") as _rf:
-        reader = csv.reader(_rf)
+    with open_rows(_alert_tx_csv) as reader:  # CSV or Parquet
         next(reader)
         for row in reader:
             alert_id = row[alert_idx]
@@ -1,6 +1,5 @@
 import os
 import sys
-import csv
 import json
 import networkx as nx
 from collections import defaultdict
@@ -9,6 +8,9 @@ import matplotlib
 import matplotlib.pyplot as plt
 import warnings
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from amlsim.columnar import open_rows
+
 warnings.filterwarnings('ignore', category=matplotlib.cbook.deprecation.MatplotlibDeprecationWarning)
 
 
@@ -49,8 +51,7 @@ def load_alerts(_conf_json):
         elif col.get("dataType") == "timestamp":
             date_idx = i
 
-    with open(acct_csv, "r") as rf:
-        reader = csv.reader(rf)
+    with open_rows(acct_csv) as reader:  # CSV or Parquet
         next(reader)
         for row in reader:
             acct_id = row[acct_idx]
@@ -58,8 +59,7 @@ def load_alerts(_conf_json):
             _g.add_node(acct_id, bank_id=bank_id)
             _bank_accts[bank_id].append(acct_id)
 
-    with open(tx_csv, "r") as rf:
-        reader = csv.reader(rf)
+    with open_rows(tx_csv) as reader:  # CSV or Parquet
         next(reader)
         for row in reader:
             orig_id = row[orig_idx]
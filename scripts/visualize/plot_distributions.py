@@ -16,6 +16,9 @@ import matplotlib
 import matplotlib.pyplot as plt
 import warnings
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from amlsim.columnar import open_rows
+
 category = matplotlib.cbook.deprecation.MatplotlibDeprecationWarning
 warnings.filterwarnings('ignore', category=category)
 warnings.filterwarnings('ignore', category=UserWarning)
@@ -61,8 +64,7 @@ def construct_graph(_acct_csv, _tx_csv, _schema):
     amt_idx = None
     date_idx = None
 
-    with open(_acct_csv, "r") as _rf:
-        reader = csv.reader(_rf)
+    with open_rows(_acct_csv) as reader:  # CSV or Parquet
         next(reader)  # Skip header
 
         for row in reader:
@@ -87,8 +89,7 @@ def construct_graph(_acct_csv, _tx_csv, _schema):
         elif data_type == "sar_flag":
             sar_idx = i
 
-    with open(_tx_csv, "r") as _rf:
-        reader = csv.reader(_rf)
+    with open_rows(_tx_csv) as reader:  # CSV or Parquet
         next(reader)  # Skip header
 
         for row in reader:
@@ -273,8 +274,7 @@ def plot_alert_stat(_alert_acct_csv, _alert_tx_csv, _schema, _plot_img):
         elif data_type == "sar_flag":
             sar_idx = i
 
-    with open(_alert_acct_csv, "r") as _rf:
-        reader = csv.reader(_rf)
+    with open_rows(_alert_acct_csv) as reader:  # CSV or Parquet
         next(reader)
 
         for row in reader:
@@ -299,8 +299,7 @@ def plot_alert_stat(_alert_acct_csv, _alert_tx_csv, _schema, _plot_img):
         elif data_type == "timestamp":
             date_idx = i
 
-    with open(_alert_tx_csv, "r") as _rf:
-        reader = csv.reader(_rf)
+    with open_rows(_alert_tx_csv) as reader:  # CSV or Parquet
         next(reader)
 
         for row in reader:
@@ -156,6 +156,7 @@ public class AMLSim extends SimState {
         if(transactionLimit > 0){  // Set the limit only if the parameter is positive value
             txs.setLimit(transactionLimit);
         }
+        txs.setBinaryLog(simProp.isBinaryTxLog());
 
 		// Parameters of Cash Transactions
 		int norm_in_int = simProp.getCashTxInterval(true, false);  // Interval of cash-in transactions for normal account
@@ -410,6 +411,10 @@ public class AMLSim extends SimState {
 
 	private void initTxLogBufWriter(String logFileName) {
 		try {
+			if(simProp.isBinaryTxLog()){
+				txs.writeBinaryLogHeader(logFileName);
+				return;
+			}
 			FileWriter writer = new FileWriter(new File(logFileName));
 			this.bufWriter = new BufferedWriter(writer);
 			this.bufWriter.write("step,type,amount,nameOrig,oldbalanceOrig,newbalanceOrig,nameDest,oldbalanceDest,newbalanceDest,isSAR,alertID\n");
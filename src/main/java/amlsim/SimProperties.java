@@ -124,8 +124,14 @@ public class SimProperties {
         return workDir + inputProp.getString("normal_models");
     }
 
+    boolean isBinaryTxLog(){
+        // Transaction log format: "csv" (default) or "binary" (fixed-width records read by the Python converter)
+        return simProp.optString("log_format", "csv").equals("binary");
+    }
+
     String getOutputTxLogFile(){
-        return getOutputDir() + outputProp.getString("transaction_log");
+        String logFile = getOutputDir() + outputProp.getString("transaction_log");
+        return isBinaryTxLog() ? TransactionRepository.getBinaryLogFile(logFile) : logFile;
     }
 
     String getOutputDir(){
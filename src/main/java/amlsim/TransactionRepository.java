@@ -2,8 +2,12 @@ package amlsim;
 
 import java.io.BufferedWriter;
 import java.io.File;
+import java.io.FileOutputStream;
 import java.io.FileWriter;
 import java.io.IOException;
+import java.nio.ByteBuffer;
+import java.nio.ByteOrder;
+import java.nio.channels.FileChannel;
 import java.util.*;
 
 /**
@@ -11,6 +15,14 @@ import java.util.*;
  */
 public class TransactionRepository {
 
+    // Binary transaction log: a 16-byte header (magic, version and record size) and fixed-width little-endian records
+    // (see scripts/amlsim/binary_log.py). Transaction type names are stored in a string table file.
+    static final byte[] BINARY_LOG_MAGIC = {'A', 'M', 'L', 'T', 'X', 'L', 'O', 'G'};
+    static final int BINARY_LOG_VERSION = 1;
+    static final int BINARY_LOG_HEADER_SIZE = 16;
+    static final int BINARY_RECORD_SIZE = 56;
+    private static final int BINARY_WRITE_RECORDS = 8192;  // Number of records written at once
+
     public final int size;
     private int index = 0;
 //    private DecimalFormat amt_fmt;
@@ -34,6 +46,9 @@ public class TransactionRepository {
     private Map<Long, Integer> txCounter;
     private Map<Long, Integer> sarTxCounter;
 
+    private boolean binaryLog = false;  // Write the binary transaction log instead of CSV
+    private Map<String, Integer> typeIDs = new LinkedHashMap<>();  // Transaction type name --> String table index
+
     TransactionRepository(int size) {
         this.txCounter = new HashMap<>();
         this.sarTxCounter = new HashMap<>();
@@ -57,6 +72,20 @@ public class TransactionRepository {
         this.limit = limit;
     }
 
+    void setBinaryLog(boolean binaryLog){
+        this.binaryLog = binaryLog;
+    }
+
+    static String getBinaryLogFile(String csvLogFile){
+        // e.g. tx_log.csv --> tx_log.bin
+        String base = csvLogFile.endsWith(".csv") ? csvLogFile.substring(0, csvLogFile.length() - 4) : csvLogFile;
+        return base + ".bin";
+    }
+
+    static String getTypeTableFile(String binaryLogFile){
+        return binaryLogFile + ".types";
+    }
+
     void addTransaction(long step, String desc, double amt, String origID, String destID, float origBefore,
                         float origAfter, float destBefore, float destAfter, boolean isSAR, long aid){
         if(count >= limit){
@@ -115,7 +144,86 @@ public class TransactionRepository {
         }
     }
 
+    void writeBinaryLogHeader(String logFile) throws IOException {
+        ByteBuffer buf = ByteBuffer.allocate(BINARY_LOG_HEADER_SIZE).order(ByteOrder.LITTLE_ENDIAN);
+        buf.put(BINARY_LOG_MAGIC).putInt(BINARY_LOG_VERSION).putInt(BINARY_RECORD_SIZE);
+        try (FileOutputStream out = new FileOutputStream(logFile)) {
+            out.write(buf.array());
+        }
+        typeIDs.clear();
+        writeTypeTable(logFile);
+    }
+
+    private int getTypeID(String desc){
+        Integer id = typeIDs.get(desc);
+        if(id == null){
+            id = typeIDs.size();
+            typeIDs.put(desc, id);
+        }
+        return id;
+    }
+
+    private static long parseAccountID(String id){
+        try {
+            return Long.parseLong(id);
+        } catch (NumberFormatException e) {
+            throw new IllegalStateException("The binary transaction log requires integer account IDs: " + id);
+        }
+    }
+
+    private void writeTypeTable(String logFile) throws IOException {
+        // One transaction type name per line in the order of indices
+        try (BufferedWriter writer = new BufferedWriter(new FileWriter(getTypeTableFile(logFile)))) {
+            for(String desc : typeIDs.keySet()){
+                writer.write(desc + "\n");
+            }
+        }
+    }
+
+    private static void writeBuffer(FileChannel channel, ByteBuffer buf) throws IOException {
+        buf.flip();
+        while(buf.hasRemaining()){
+            channel.write(buf);
+        }
+        buf.clear();
+    }
+
+    private void flushBinaryLog(){
+        // Append fixed-width records without formatting numbers as strings
+        String logFile = AMLSim.getTxLogFileName();
+        ByteBuffer buf = ByteBuffer.allocate(BINARY_RECORD_SIZE * BINARY_WRITE_RECORDS).order(ByteOrder.LITTLE_ENDIAN);
+        try (FileOutputStream out = new FileOutputStream(logFile, true)) {
+            FileChannel channel = out.getChannel();
+            for(int i = 0; i < this.index; i++){
+                buf.putLong(parseAccountID(origIDs[i]));
+                buf.putLong(parseAccountID(destIDs[i]));
+                buf.putDouble(getDoublePrecision(amounts[i]));
+                buf.putLong(steps[i]);
+                buf.putFloat((float)getDoublePrecision(origBefore[i]));
+                buf.putFloat((float)getDoublePrecision(origAfter[i]));
+                buf.putFloat((float)getDoublePrecision(destBefore[i]));
+                buf.putFloat((float)getDoublePrecision(destAfter[i]));
+                buf.putInt((int)alertIDs[i]);
+                buf.putShort((short)getTypeID(descriptions[i]));
+                buf.put((byte)(isSAR[i] ? 1 : 0));
+                buf.put((byte)0);  // Padding
+                if(!buf.hasRemaining()){
+                    writeBuffer(channel, buf);
+                }
+            }
+            writeBuffer(channel, buf);
+            writeTypeTable(logFile);
+        } catch (IOException e) {
+            e.printStackTrace();
+        }
+    }
+
     void flushLog(){
+        if(binaryLog){
+            flushBinaryLog();
+            index = 0;
+            return;
+        }
         // Flush transaction logs to the CSV file
         try {
             FileWriter writer1 = new FileWriter(new File(AMLSim.getTxLogFileName()), true);
@@ -0,0 +1,59 @@
+import csv
+import os
+import tempfile
+import unittest
+
+from amlsim.account_index import AccountIndex, AccountIndexBuilder, index_dir, line_offsets
+
+class AccountIndexTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.csv_file = os.path.join(self.tmp_dir.name, 'transactions.csv')
+        self.rows = [[str(i), 'A%d' % (i % 3), 'A%d' % (i % 4), '%d.0' % i] for i in range(20)]
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def write_csv(self, rows):
+        with open(self.csv_file, 'w') as wf:
+            writer = csv.writer(wf)
+            writer.writerow(['tran_id', 'orig_acct', 'bene_acct', 'base_amt'])
+            writer.writerows(rows)
+
+    def test_lookup(self):
+        self.write_csv(self.rows)
+        builder = AccountIndexBuilder()
+        builder.add_rows([row[1] for row in self.rows[:5]], [row[2] for row in self.rows[:5]])
+        other = AccountIndexBuilder()  # Rows of a chunk converted by a worker process
+        other.add_rows([row[1] for row in self.rows[5:]], [row[2] for row in self.rows[5:]])
+        builder.merge(other)
+        self.assertEqual(builder.write(self.csv_file), index_dir(self.csv_file))
+        self.assertEqual(len(line_offsets(self.csv_file)), 20)
+
+        index = AccountIndex(self.csv_file)
+        self.assertEqual(index.header, ['tran_id', 'orig_acct', 'bene_acct', 'base_amt'])
+        self.assertEqual(index.accounts.tolist(), ['A0', 'A1', 'A2', 'A3'])
+        for acct in ['A0', 'A1', 'A2', 'A3']:
+            self.assertEqual(index.rows(acct), [row for row in self.rows if acct in row[1:3]])
+        self.assertEqual(len(index.row_offsets('A0')), 10)  # Self-transfers are indexed once
+        self.assertEqual(index.rows('A9'), [])
+
+    def test_removed_rows(self):
+        kept = [row for row in self.rows if int(row[0]) % 5 != 0]
+        self.write_csv(kept)
+        builder = AccountIndexBuilder()
+        other = AccountIndexBuilder()
+        other.add_rows([row[1] for row in self.rows], [row[2] for row in self.rows])
+        builder.merge(other, [True] * 10 + [False] * 10)
+        builder.add_rows([row[1] for row in self.rows[10:]], [row[2] for row in self.rows[10:]])
+        builder.write(self.csv_file, [0, 5, 10, 15])  # Removed by de-duplication
+
+        index = AccountIndex(self.csv_file)
+        self.assertEqual(index.rows('A1'), [row for row in kept if 'A1' in row[1:3]])
+        with self.assertRaises(ValueError):
+            builder.write(self.csv_file)  # Different number of rows
+
+
+if __name__ == ' main ':
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+
+import numpy as np
+
+from amlsim.amount_distribution import compile_distribution, parse_params
+from amlsim.amount_distribution import RoundedDistribution, UniformDistribution
+
+class AmountDistributionTests(unittest.TestCase):
+
+    def setUp(self):
+        np.random.seed(0)
+
+    def test_uniform_amounts(self):
+        amounts = UniformDistribution(2.0, 31.0).sample(1000)
+        self.assertEqual(len(amounts), 1000)
+        self.assertGreaterEqual(amounts.min(), 2.0)
+        self.assertLessEqual(amounts.max(), 31.0)
+
+    def test_rounded_amounts(self):
+        amounts = RoundedDistribution(42.0, 999.0).sample(1000)
+        self.assertGreaterEqual(amounts.min(), 100.0)
+        self.assertLessEqual(amounts.max(), 900.0)
+        self.assertTrue(np.all(amounts % 100 == 0.0))
+
+    def test_lognormal_amounts_within_range(self):
+        dist = compile_distribution("lognormal", 100.0, 200.0)
+        amounts = dist.sample(1000)
+        self.assertGreaterEqual(amounts.min(), 100.0)
+        self.assertLessEqual(amounts.max(), 200.0)
+
+    def test_structuring_amounts_below_threshold(self):
+        dist = compile_distribution("structuring", 100.0, 20000.0, "threshold=10000;ratio=0.05")
+        amounts = dist.sample(1000)
+        self.assertGreaterEqual(amounts.min(), 9500.0)
+        self.assertLess(amounts.max(), 10000.0)
+
+    def test_histogram_amounts(self):
+        dist = compile_distribution("histogram", 0.0, 0.0, "file=amount_histogram.csv", "tests/csv")
+        amounts = dist.sample(1000)
+        in_bins = ((amounts >= 100.0) & (amounts <= 200.0)) | ((amounts >= 500.0) & (amounts <= 600.0))
+        self.assertTrue(np.all(in_bins))
+        self.assertGreater(np.count_nonzero(amounts >= 500.0), np.count_nonzero(amounts <= 200.0))
+
+    def test_parse_params(self):
+        self.assertEqual(parse_params("mu=5.0; sigma=0.5"), {"mu": "5.0", "sigma": "0.5"})
+        self.assertEqual(parse_params(""), {})
+
+    def test_unknown_distribution_throws(self):
+        with self.assertRaises(KeyError):
+            compile_distribution("pareto", 100.0, 200.0)
+
+
+if __name__ == ' main ':
+    unittest.main()
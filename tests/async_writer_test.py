@@ -0,0 +1,46 @@
+import io
+import unittest
+
+from amlsim.async_writer import AsyncCSVWriter, CSVWriter, create_csv_writer
+
+class FailingFile:
+
+    def write(self, data):
+        raise IOError('disk full')
+
+
+class AsyncWriterTests(unittest.TestCase):
+
+    def setUp(self):
+        self.rows = [[i, 'TRANSFER', '%d.5' % i, 'a,b' if i % 7 == 0 else 'C_%d' % i, i % 2 == 0]
+                     for i in range(10000)]
+
+    def write_rows(self, writer, out_f):
+        writer.writerow(['id', 'type', 'amount', 'name', 'flag'])
+        writer.writerows(self.rows)
+        writer.close()
+        return out_f.getvalue()
+
+    def test_same_output(self):
+        sync_f = io.StringIO()
+        expected = self.write_rows(CSVWriter(sync_f), sync_f)
+        async_f = io.StringIO()
+        actual = self.write_rows(AsyncCSVWriter(async_f, buffer_size=1000, queue_size=2), async_f)
+        self.assertEqual(actual, expected)
+        self.assertIn('"a,b"', actual)
+
+    def test_error(self):
+        writer = AsyncCSVWriter(FailingFile(), buffer_size=100, queue_size=1)
+        with self.assertRaises(IOError):
+            writer.writerows(self.rows)
+            writer.close()
+
+    def test_create_csv_writer(self):
+        self.assertIsInstance(create_csv_writer(io.StringIO()), CSVWriter)
+        writer = create_csv_writer(io.StringIO(), True)
+        self.assertIsInstance(writer, AsyncCSVWriter)
+        writer.close()
+
+
+if __name__ == ' main ':
+    unittest.main()
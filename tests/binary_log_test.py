@@ -0,0 +1,63 @@
+import csv
+import os
+import tempfile
+import unittest
+
+from amlsim.binary_log import BinaryLogRows, HEADER_SIZE, RECORD_SIZE, binary_log_path, csv_to_binary_log, \
+    open_binary_log, read_type_table, split_record_chunks
+from amlsim.log_chunks import read_chunk, read_header
+from amlsim.tx_log_reader import TX_LOG_COLUMNS, count_rows, load_tx_log
+from convert_logs import parse_tx_log
+
+class BinaryLogTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.csv_log = os.path.join(self.tmp_dir.name, 'tx_log.csv')
+        with open(self.csv_log, 'w') as wf:
+            wf.write(','.join(TX_LOG_COLUMNS) + '\n')
+            for i in range(1000):
+                wf.write('%d,%s,%d.25,%d,100.5,0.0,%d,12.34,0.0,%d,%d\n'
+                         % (i // 10, 'CASH-IN' if i % 4 == 0 else 'TRANSFER', i, i % 30, i % 17, i % 2, i % 5 - 1))
+            wf.write('99,TRANSFER,1.0,2,0,0')  # Truncated last line
+        self.bin_log = binary_log_path(self.csv_log)
+        self.num_records = csv_to_binary_log(self.csv_log, self.bin_log)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_records(self):
+        self.assertEqual(self.bin_log, os.path.join(self.tmp_dir.name, 'tx_log.bin'))
+        self.assertEqual(self.num_records, 1000)
+        self.assertEqual(os.path.getsize(self.bin_log), HEADER_SIZE + 1000 * RECORD_SIZE)
+        self.assertEqual(read_type_table(self.bin_log), ['CASH-IN', 'TRANSFER'])
+        self.assertEqual(len(open_binary_log(self.bin_log)), 1000)
+        self.assertEqual(load_tx_log(self.bin_log).tolist(), load_tx_log(self.csv_log).tolist())
+        self.assertEqual(count_rows(self.bin_log), 1000)
+
+    def test_same_rows_as_csv(self):
+        with open(self.csv_log, 'r') as rf:
+            reader = csv.reader(rf)
+            expected = [tuple(tx[0]) for tx in parse_tx_log(reader, next(reader))]
+        rows = BinaryLogRows(self.bin_log)
+        self.assertEqual(rows.offset, HEADER_SIZE)
+        actual = [tx[0] for tx in parse_tx_log(rows, TX_LOG_COLUMNS)]
+        self.assertEqual(actual, expected)
+        self.assertEqual(rows.offset, HEADER_SIZE + 1000 * RECORD_SIZE)
+
+    def test_chunks(self):
+        self.assertEqual(read_header(self.bin_log), (TX_LOG_COLUMNS, HEADER_SIZE))
+        chunks = split_record_chunks(self.bin_log, 1000)
+        self.assertEqual(chunks[0][0], HEADER_SIZE)
+        self.assertEqual(chunks[-1][1], HEADER_SIZE + 1000 * RECORD_SIZE)
+        self.assertTrue(all((end - start) % RECORD_SIZE == 0 for start, end in chunks))
+        rows = [row for start, end in chunks for row in read_chunk(self.bin_log, start, end)]
+        self.assertEqual(rows, list(BinaryLogRows(self.bin_log)))
+
+        start = HEADER_SIZE + 600 * RECORD_SIZE  # Resume from a record
+        self.assertEqual(count_rows(self.bin_log, start), 400)
+        self.assertEqual(sum(1 for _ in BinaryLogRows(self.bin_log, start)), 400)
+
+
+if __name__ == ' main ':
+    unittest.main()
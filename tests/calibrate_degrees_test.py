@@ -0,0 +1,45 @@
+import os
+import csv
+import tempfile
+import unittest
+
+import numpy as np
+
+from calibrate_degrees import count_degrees_csv, calibrate_degrees
+from generate_scalefree import rmat_edges
+from amlsim.degree_sequence import load_degree_csv
+
+class CalibrateDegreesTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.tx_csv = os.path.join(self.tmp_dir.name, 'transactions.csv')
+        src, dst = next(rmat_edges([2 ** i for i in range(10)], 16 * 1024, seed=0))
+        with open(self.tx_csv, 'w') as wf:
+            writer = csv.writer(wf)
+            writer.writerow(['id', 'src', 'dst', 'ttype'])
+            writer.writerows([i, s, d, 'TRANSFER'] for i, (s, d) in enumerate(zip(src.tolist(), dst.tolist())))
+        self.src, self.dst = src, dst
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_count_degrees_csv(self):
+        in_deg, out_deg, num_edges = count_degrees_csv(self.tx_csv, chunk_rows=1000)
+        self.assertEqual(num_edges, len(self.src))
+        self.assertEqual(in_deg.sum(), num_edges)
+        self.assertEqual(out_deg.sum(), num_edges)
+        self.assertEqual(len(in_deg), len(np.union1d(self.src, self.dst)))
+
+    def test_calibrate_degrees(self):
+        deg_csv = os.path.join(self.tmp_dir.name, 'degree.csv')
+        report = calibrate_degrees(self.tx_csv, deg_csv)
+        counts, in_deg, out_deg = load_degree_csv(deg_csv)
+        self.assertEqual(counts.sum(), report['num_vertices'])
+        self.assertEqual((counts * in_deg).sum(), (counts * out_deg).sum())
+        self.assertTrue(report['in_degree']['fitted'])
+        self.assertIn(report['out_degree']['best'], ('power_law', 'lognormal'))
+
+
+if __name__ == ' main ':
+    unittest.main()
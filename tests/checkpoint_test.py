@@ -0,0 +1,69 @@
+import csv
+import os
+import tempfile
+import unittest
+
+from amlsim.checkpoint import Checkpoint, OffsetLineReader
+
+class CheckpointTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.log_file = os.path.join(self.tmp_dir.name, 'tx_log.csv')
+        with open(self.log_file, 'w') as wf:
+            wf.write('step,type,amount\n')
+            for i in range(100):
+                wf.write('%d,TRANSFER,%d.5\n' % (i, i))
+        self.out_file = os.path.join(self.tmp_dir.name, 'transactions.csv')
+        self.checkpoint = Checkpoint(os.path.join(self.tmp_dir.name, 'checkpoint'), self.log_file,
+                                     {'dedupe': 'exact'})
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_offset_line_reader(self):
+        with open(self.log_file, 'rb') as rf:
+            lines = OffsetLineReader(rf)
+            reader = csv.reader(lines)
+            next(reader)
+            for _ in range(10):
+                next(reader)
+            offset = lines.offset
+        with open(self.log_file, 'rb') as rf:
+            rf.seek(offset)
+            self.assertEqual(rf.readline(), b'10,TRANSFER,10.5\n')
+
+    def test_save_and_load(self):
+        with open(self.out_file, 'w') as out_f:
+            out_f.write('header\nrow1\n')
+            out_f.flush()
+            self.checkpoint.save(100, 5, {self.out_file: out_f}, {'keys': {('1', '2')}})
+            out_f.write('row2\n')
+            out_f.flush()
+            self.checkpoint.save(200, 9, {self.out_file: out_f}, {'keys': {('1', '2'), ('3', '4')}})
+            out_f.write('row3\n')  # Written after the last checkpoint
+
+        manifest, state = self.checkpoint.load()
+        self.assertEqual((manifest['offset'], manifest['tx_id']), (200, 9))
+        self.assertEqual(state, {'keys': {('1', '2'), ('3', '4')}})
+        self.checkpoint.truncate_outputs(manifest)
+        with open(self.out_file) as rf:
+            self.assertEqual(rf.read(), 'header\nrow1\nrow2\n')
+        self.assertEqual(sorted(os.listdir(self.checkpoint.checkpoint_dir)), ['checkpoint.json', 'state_2.pkl'])
+
+    def test_invalid_checkpoint(self):
+        self.assertIsNone(self.checkpoint.load())
+        self.checkpoint.save(100, 5, {}, {})
+        other = Checkpoint(self.checkpoint.checkpoint_dir, self.log_file, {'dedupe': 'bloom'})
+        self.assertIsNone(other.load())  # Different settings
+
+        with open(self.log_file, 'r+') as f:
+            f.write('0')  # The log file has been replaced
+        self.assertIsNone(self.checkpoint.load())
+
+        self.checkpoint.clear()
+        self.assertFalse(os.path.exists(self.checkpoint.checkpoint_dir))
+
+
+if __name__ == ' main ':
+    unittest.main()
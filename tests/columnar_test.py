@@ -0,0 +1,62 @@
+import os
+import tempfile
+import unittest
+
+from amlsim.columnar import csv_to_parquet, find_string_columns, open_rows, parquet_path, read_rows, pa
+
+@unittest.skipIf(pa is None, 'pyarrow is not installed')
+class ColumnarTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.csv_file = os.path.join(self.tmp_dir.name, 'transactions.csv')
+        self.parquet_file = parquet_path(self.csv_file)
+        with open(self.csv_file, 'w') as wf:
+            wf.write('tran_id,base_amt,tran_timestamp,is_sar,bank_id,name\n')
+            for i in range(2500):
+                wf.write('%d,%d.50,2017-01-%02dT00:00:00Z,%s,bank%d,%s\n'
+                         % (i, i, i % 28 + 1, 'True' if i % 3 == 0 else 'false', i % 2, '"A,B"' if i == 7 else ''))
+        self.value_types = {'tran_id': 'int', 'base_amt': 'float', 'tran_timestamp': 'date', 'is_sar': 'boolean',
+                            'bank_id': 'int'}
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_csv_to_parquet(self):
+        schema = csv_to_parquet(self.csv_file, self.parquet_file, self.value_types, row_group_size=1000)
+        self.assertEqual(schema.field('tran_id').type, pa.int64())
+        self.assertEqual(schema.field('base_amt').type, pa.float64())
+        self.assertEqual(schema.field('is_sar').type, pa.bool_())
+        self.assertEqual(schema.field('tran_timestamp').type, pa.timestamp('s', tz='UTC'))
+        self.assertEqual(schema.field('bank_id').type, pa.string())  # "bank0" is not an integer
+
+        import pyarrow.parquet as pq
+        parquet_file = pq.ParquetFile(self.parquet_file)
+        self.assertEqual([parquet_file.metadata.row_group(i).num_rows for i in range(parquet_file.num_row_groups)],
+                         [1000, 1000, 500])
+
+    def test_find_string_columns(self):
+        header = ['tran_id', 'base_amt', 'tran_timestamp', 'is_sar', 'bank_id', 'name']
+        self.assertEqual(find_string_columns(self.csv_file, header, self.value_types), {'bank_id'})
+        with open(self.csv_file, 'a') as wf:  # Invalid amount in the last row
+            wf.write('2500,unknown,2017-01-01T00:00:00Z,false,bank0,\n')
+        self.assertEqual(find_string_columns(self.csv_file, header, self.value_types), {'bank_id', 'base_amt'})
+        schema = csv_to_parquet(self.csv_file, self.parquet_file, self.value_types, row_group_size=1000)
+        self.assertEqual(schema.field('base_amt').type, pa.string())
+        self.assertEqual(schema.field('tran_id').type, pa.int64())
+
+    def test_read_rows(self):
+        csv_to_parquet(self.csv_file, self.parquet_file, self.value_types)
+        csv_rows = list(read_rows(self.csv_file))
+        os.remove(self.csv_file)
+        with open_rows(self.csv_file) as reader:  # Read the Parquet file instead
+            parquet_rows = list(reader)
+
+        self.assertEqual(parquet_rows[0], csv_rows[0])
+        self.assertEqual(len(parquet_rows), len(csv_rows))
+        self.assertEqual(parquet_rows[1], ['0', '0.5', '2017-01-01T00:00:00Z', 'true', 'bank0', ''])
+        self.assertEqual(parquet_rows[8], ['7', '7.5', '2017-01-08T00:00:00Z', 'false', 'bank1', 'A,B'])
+
+
+if __name__ == ' main ':
+    unittest.main()
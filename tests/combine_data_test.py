@@ -0,0 +1,73 @@
+import csv
+import io
+import os
+import tempfile
+import unittest
+
+from combine_data import OffsetRows, append_shard, csv_field, next_offsets
+
+class OffsetRowsTests(unittest.TestCase):
+
+    def setUp(self):
+        # Transaction ID, amount, originator, beneficiary, memo, alert ID
+        self.rows = [[1, "10.00", 5, 6, "a,b", -1], [2, "20.00", 6, 5, 'say "hi"', 0], [3, "", 5, 5, None, 1]]
+        self.table = OffsetRows(self.rows, [(5, [-1, 0, 1]), (0, [1, 2, 3]), (2, [5, 6, 5]), (3, [6, 5, 5])])
+
+    def test_csv_field(self):
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator="\n").writerow(["a,b", 'c"d', "e\nf", "", None, 1.5, True])
+        self.assertEqual(",".join(map(csv_field, ["a,b", 'c"d', "e\nf", "", None, 1.5, True])) + "\n",
+                         buffer.getvalue())
+
+    def test_write(self):
+        wf = io.StringIO()
+        alert_ids, tx_ids, orig_ids, bene_ids = self.table.write(wf, [10, 100, 1000, 1000])
+        expected = io.StringIO()
+        csv.writer(expected, lineterminator="\n").writerows([
+            [101, "10.00", 1005, 1006, "a,b", -1], [102, "20.00", 1006, 1005, 'say "hi"', 10],
+            [103, "", 1005, 1005, None, 11]])
+        self.assertEqual(wf.getvalue(), expected.getvalue())
+        self.assertEqual(alert_ids.tolist(), [-1, 10, 11])
+        self.assertEqual(tx_ids.tolist(), [101, 102, 103])
+        self.assertEqual(len(self.table), 3)
+
+        # Repetitions with other offsets
+        wf = io.StringIO()
+        self.table.write(wf, [0, 0, 0, 0])
+        self.table.write(wf, [0, 0, 0, 0])
+        expected = io.StringIO()
+        csv.writer(expected, lineterminator="\n").writerows(self.rows * 2)
+        self.assertEqual(wf.getvalue(), expected.getvalue())
+
+    def test_id_bounds(self):
+        self.assertEqual(self.table.id_bounds(), [(1, -1), (3, None), (6, None), (6, None)])
+        self.assertEqual(OffsetRows([], [(0, [])]).id_bounds(), [(None, None)])
+
+    def test_next_offsets(self):
+        # Bounds of accounts, transactions, cash transactions, alert members and alert transactions
+        bounds = [[(9, None)], [(20, None), (9, None), (9, None), (3, -1)],
+                  [(25, None), (9, None), (9, None), (None, -1)], [(3, None), (9, None), (9, None)],
+                  [(2, None), (20, None), (9, None), (9, None)]]
+        self.assertEqual(next_offsets(bounds, (0, 0, 0)), (10, 26, 4))
+        self.assertEqual(next_offsets(bounds, (10, 26, 4)), (20, 52, 8))
+        empty = [[(None, None)], [(None, None)] * 4, [(None, None)] * 4, [(None, None)] * 3, [(None, None)] * 4]
+        self.assertEqual(next_offsets(empty, (10, 26, 4)), (1, 1, 1))
+
+    def test_append_shard(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            out_path = os.path.join(tmp_dir, "out.csv")
+            shard_path = os.path.join(tmp_dir, "shard.csv")
+            with open(out_path, "w") as wf:
+                wf.write("header\n")
+            with open(shard_path, "w") as wf:
+                wf.write("1,a\n2,b\n")
+            with open(out_path, "r+b", buffering=0) as out_f:
+                out_f.seek(0, os.SEEK_END)
+                append_shard(out_f, shard_path)
+            with open(out_path, "r") as rf:
+                self.assertEqual(rf.read(), "header\n1,a\n2,b\n")
+            self.assertFalse(os.path.exists(shard_path))
+
+
+if __name__ == ' main ':
+    unittest.main()
@@ -1,6 +1,13 @@
+import csv
+import json
+import os
+import tempfile
 import unittest
 
-from convert_logs import AMLTypology, LogConverter
+from dateutil.parser import parse
+from faker import Faker
+
+from convert_logs import AMLTypology, LogConverter, Schema
 
 class LogConverterTests(unittest.TestCase):
 
@@ -121,6 +128,93 @@ class LogConverterTests(unittest.TestCase):
             (1, 183, 'C_183', '20170102', 'fan_in', 'INDIVIDUAL', 'YES'),
         ])
 
+    def test_add_alert_tx(self):
+        converter = LogConverter(self.conf)
+        typology = AMLTypology('fan_out')
+        typology.add_member(1302, True)
+        converter.reports[0] = typology
+        converter.org_types = {1302: "I", 44: "I"}
+
+        header = ['step','type','amount','nameOrig','oldbalanceOrig','newbalanceOrig','nameDest','oldbalanceDest','newbalanceDest','isSAR','alertID']
+        indices = {name: index for index, name in enumerate(header)}
+        converter.add_alert_tx(['0','TRANSFER','397.08','47','71052.47','70655.39','41','74678.89','75075.97','0','-1'], indices)
+        converter.add_alert_tx(['2','TRANSFER','374.96','1302','79080.81','78705.84','44','66260.21','66635.18','1','0'], indices)
+        converter.add_alert_tx(['x','TRANSFER','374.96','1302','79080.81','78705.84','44','66260.21','66635.18','1','0'], indices)
+        self.assertEqual(typology.count, 1)
+        self.assertEqual(converter.extract_sar_accounts(), [
+            (0, 1302, 'C_1302', '20170103', 'fan_out', 'INDIVIDUAL', 'YES'),
+            (0, 44, 'C_44', '20170103', 'fan_out', 'INDIVIDUAL', 'YES')
+        ])
+
+    def test_account_index_needs_csv(self):
+        self.conf["converter"] = {"output_format": "parquet", "account_index": True}
+        with self.assertRaises(ValueError):
+            LogConverter(self.conf)
+        self.conf["converter"]["keep_csv"] = True  # Indexed CSV files are kept next to the Parquet files
+        self.assertTrue(LogConverter(self.conf).account_index)
+
+    def test_resolved_entities_opt_in(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            self.conf["temporal"]["directory"] = os.path.join(tmp_dir, "tmp")
+            self.conf["output"]["directory"] = os.path.join(tmp_dir, "outputs")
+            os.makedirs(os.path.join(tmp_dir, "tmp", "sample"))
+            os.makedirs(os.path.join(tmp_dir, "outputs", "sample"))
+            with open(os.path.join(tmp_dir, "tmp", "sample", "accounts.csv"), "w") as wf:
+                writer = csv.writer(wf)
+                writer.writerow(["ACCOUNT_ID", "CUSTOMER_ID", "INIT_BALANCE", "COUNTRY", "ACCOUNT_TYPE", "IS_SAR",
+                                 "BANK_ID", "TX_BEHAVIOR_ID"])
+                writer.writerows([[i, "C_%d" % i, "100.00", "US", "I", "false", "bank", 1] for i in range(6)])
+            with open(os.path.join(tmp_dir, "outputs", "sample", "tx_log.csv"), "w") as wf:
+                wf.write("step,type,amount,nameOrig,oldbalanceOrig,newbalanceOrig,nameDest,oldbalanceDest,"
+                         "newbalanceDest,isSAR,alertID\n0,TRANSFER,100.00,0,1000.00,900.00,1,500.00,600.00,0,-1\n")
+            self.conf["converter"] = {"identity_pool_size": 2}  # Unrelated parties draw the same identities
+
+            def resolved_entities():
+                fake = Faker(['en_US'])
+                Faker.seed(0)
+                LogConverter(self.conf, fake=fake).convert_acct_tx()
+                with open(os.path.join(tmp_dir, "outputs", "sample", "resolvedentities.csv")) as rf:
+                    return list(csv.reader(rf))
+
+            self.assertEqual(len(resolved_entities()), 1)  # Only the header by default
+            self.conf["converter"]["party"] = {"block_keys": [["ssn"]]}
+            self.assertGreater(len(resolved_entities()), 1)
+
+
+class SchemaTests(unittest.TestCase):
+
+    def setUp(self):
+        with open('tests/json/schema.json', 'r') as rf:
+            self.schema = Schema(json.load(rf), parse('2017-01-01'))
+
+    def test_tx_plan(self):
+        row = self.schema.get_tx_row(1, '2', '100.0', 'TRANSFER', '10', '20', False, -1)
+        self.assertEqual(row, [1, '10', '20', 'TRANSFER', '100.0', '2017-01-03T00:00:00Z', False, -1])
+
+        plan = self.schema.tx_plan.bind(['step', 'base_amt', 'nameOrig'])
+        row = plan.build((1, '2', '100.0', 'TRANSFER', '10', '20', False, -1), ['0', '200.0', '10'])
+        self.assertEqual(row, [1, '10', '20', 'TRANSFER', '200.0', '2017-01-03T00:00:00Z', False, -1])
+
+    def test_acct_plan(self):
+        header = ['ACCOUNT_ID', 'CUSTOMER_ID', 'INIT_BALANCE', 'START_DATE', 'END_DATE', 'COUNTRY',
+                  'ACCOUNT_TYPE', 'IS_SAR', 'TX_BEHAVIOR_ID', 'BANK_ID']
+        identity = {'first_name': 'John', 'last_name': 'Smith', 'street_addr': '1 Main St', 'city': 'Springfield',
+                    'state': 'IL', 'zip': '12345', 'gender': 'Male', 'birth_date': '1980-01-01',
+                    'ssn': '123-45-6789', 'lat': 1.0, 'lon': 2.0}
+        plan = self.schema.compile_acct_plan(header)
+        row = plan.build(['5', 'C_5', '100.00', '-1', '10', 'JP', 'I', 'false', '1', 'bank'], identity)
+        self.assertEqual(row[:12], ['5', 'C_5', 'I', 'A', 'USD', 'false', 1, '2017-01-01T00:00:00Z',
+                                    '2017-01-11T00:00:00Z', '100.00', '1', 'bank'])
+        self.assertEqual(row[12:], ['John', 'Smith', '1 Main St', 'Springfield', 'IL', 'US', '12345', 'Male',
+                                    '1980-01-01', '123-45-6789', 2.0, 1.0])
+        self.assertEqual((plan.id_idx, plan.type_idx), (0, 6))
+
+    def test_build_rows(self):
+        plan = self.schema.acct_party_plan
+        rows = list(plan.build_rows((range(1, 3), ['10', '11'], ['10', '10'])))
+        self.assertEqual([list(row) for row in rows], [plan.build((1, '10', '10')), plan.build((2, '11', '10'))])
+        self.assertEqual(list(plan.build_rows(([], [], []))), [])
+
 
 if __name__ == ' main ':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,42 @@
+import datetime
+import unittest
+
+from amlsim.date_table import DateTable, compact_format
+
+class DateTableTests(unittest.TestCase):
+
+    def setUp(self):
+        self.base_date = datetime.datetime(2017, 1, 1)
+        self.table = DateTable(self.base_date, 720)
+
+    def test_lookup(self):
+        for days in (0, 1, 59, 365, 720):
+            expected = (self.base_date + datetime.timedelta(days)).isoformat() + "Z"
+            self.assertEqual(self.table.lookup(days), expected)
+            self.assertEqual(self.table.lookup(str(days)), expected)
+        self.assertEqual(self.table.lookup("31"), "2017-02-01T00:00:00Z")
+
+    def test_out_of_range(self):
+        self.assertEqual(self.table.lookup("-1"), "2016-12-31T00:00:00Z")
+        self.assertEqual(self.table.lookup(1000), "2019-09-28T00:00:00Z")
+        self.assertEqual(self.table.lookup(" 2"), "2017-01-03T00:00:00Z")
+        self.assertEqual(self.table.lookup("1000"), "2019-09-28T00:00:00Z")  # Memoized
+
+    def test_invalid(self):
+        self.assertEqual(self.table.lookup(""), "")
+        self.assertEqual(self.table.lookup("N/A"), "")
+
+    def test_step_of(self):
+        self.assertEqual(self.table.step_of("2017-02-01T00:00:00Z"), 31)
+        self.assertEqual(self.table.step_of("2019-09-28T00:00:00Z"), 1000)  # Not in the table
+        self.assertEqual(self.table.step_of("15"), 15)
+        self.assertIsNone(self.table.step_of("N/A"))
+
+    def test_formatter(self):
+        table = DateTable(self.base_date, formatter=compact_format)
+        self.assertEqual(table.lookup(0), "20170101")
+        self.assertEqual(table.lookup(400), "20180205")
+
+
+if __name__ == ' main ':
+    unittest.main()
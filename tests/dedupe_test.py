@@ -0,0 +1,74 @@
+import os
+import pickle
+import tempfile
+import unittest
+
+from amlsim.dedupe import ExactDedupe, FingerprintDedupe, BloomDedupe, ExternalDedupe, create_dedupe
+
+class DedupeTests(unittest.TestCase):
+
+    def setUp(self):
+        self.keys = [(str(i % 700), str(i % 300), 'TRANSFER', '100.0', '0') for i in range(5000)]
+        seen = set()
+        self.expected = list()
+        for key in self.keys:
+            self.expected.append(key not in seen)
+            seen.add(key)
+
+    def filter_batches(self, dedupe, batch_size=999):
+        flags = list()
+        for i in range(0, len(self.keys), batch_size):
+            flags.extend(dedupe.filter(self.keys[i:i + batch_size]))
+        return flags
+
+    def test_exact(self):
+        self.assertEqual(self.filter_batches(ExactDedupe()), self.expected)
+
+    def test_fingerprint(self):
+        dedupe = FingerprintDedupe(initial_capacity=16)  # The table grows from 16 slots
+        self.assertEqual(self.filter_batches(dedupe), self.expected)
+        self.assertEqual(dedupe.num_keys, sum(self.expected))
+
+    def test_fingerprint_memory_limit(self):
+        dedupe = FingerprintDedupe(max_memory_mb=0.001)
+        with self.assertRaises(MemoryError):
+            self.filter_batches(dedupe)
+
+    def test_bloom(self):
+        self.assertEqual(self.filter_batches(BloomDedupe(max_memory_mb=1)), self.expected)
+
+    def test_external(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            csv_file = os.path.join(tmp_dir, 'tx.csv')
+            dedupe = ExternalDedupe(max_memory_mb=0.01, tmp_dir=tmp_dir)  # Spill every 655 rows
+            self.assertTrue(all(self.filter_batches(dedupe)))
+            with open(csv_file, 'w') as wf:
+                wf.write('orig,dest\n')
+                for key in self.keys:
+                    wf.write('%s,%s\n' % key[:2])
+            dedupe.finalize(csv_file)
+            with open(csv_file, 'r') as rf:
+                lines = rf.read().splitlines()
+            expected = ['%s,%s' % key[:2] for key, is_new in zip(self.keys, self.expected) if is_new]
+            self.assertEqual(lines, ['orig,dest'] + expected)
+            self.assertEqual(os.listdir(tmp_dir), ['tx.csv'])
+
+    def test_external_checkpoint(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            dedupe = ExternalDedupe(max_memory_mb=0.01, tmp_dir=tmp_dir)
+            dedupe.filter(self.keys[:2000])
+            state = pickle.dumps(dedupe)
+            dedupe.filter(self.keys[2000:3000])  # Spilled after the checkpoint and discarded on restore
+            dedupe = pickle.loads(state)
+            dedupe.filter(self.keys[2000:])
+            duplicated = set(dedupe.duplicated_rows().tolist())
+            self.assertEqual([seq not in duplicated for seq in range(len(self.keys))], self.expected)
+
+    def test_create_dedupe(self):
+        self.assertIsInstance(create_dedupe('fingerprint', 16), FingerprintDedupe)
+        with self.assertRaises(KeyError):
+            create_dedupe('unknown')
+
+
+if __name__ == ' main ':
+    unittest.main()
@@ -0,0 +1,56 @@
+import csv
+import json
+import os
+import pickle
+import tempfile
+import unittest
+
+from amlsim.degree_census import DegreeCensus
+
+class DegreeCensusTests(unittest.TestCase):
+
+    def setUp(self):
+        # "a" sends to "b", "c" and "d" (fan-out), and "b", "c" and "d" send to "e" (fan-in)
+        self.origs = ["a", "a", "a", "a", "b", "c", "d", "d"]
+        self.dests = ["b", "c", "d", "b", "e", "e", "e", "e"]
+
+    def test_degrees(self):
+        census = DegreeCensus(compact_pairs=3)
+        census.add_pairs(self.origs[:5], self.dests[:5])
+        census.add_pairs(self.origs[5:], self.dests[5:])
+        census.add_pairs([], [])
+        self.assertEqual(census.num_pairs(), 6)
+        in_deg, out_deg = census.degrees()
+        degrees = {acct: (in_deg[idx], out_deg[idx]) for acct, idx in census.accounts.items()}
+        self.assertEqual(degrees, {"a": (0, 3), "b": (1, 1), "c": (1, 1), "d": (1, 1), "e": (3, 0)})
+        self.assertEqual(census.fan_counts(4), [(2, 1, 1), (3, 1, 1), (4, 0, 0)])
+
+    def test_merge(self):
+        census = DegreeCensus()
+        census.add_pairs(self.origs[:4], self.dests[:4])
+        other = pickle.loads(pickle.dumps(DegreeCensus()))  # Census of a worker process
+        other.add_pairs(self.origs[3:], self.dests[3:])
+        census.merge(other)
+        expected = DegreeCensus()
+        expected.add_pairs(self.origs, self.dests)
+        self.assertEqual(census.num_pairs(), 6)
+        self.assertEqual(census.fan_counts(3), expected.fan_counts(3))
+
+    def test_write_report(self):
+        census = DegreeCensus()
+        census.add_pairs(self.origs, self.dests)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            csv_file = os.path.join(tmp_dir, "degree_census.csv")
+            census.write_report(csv_file, 3)
+            with open(csv_file, "r") as rf:
+                self.assertEqual(list(csv.reader(rf)), [["threshold", "fan_in", "fan_out"], ["2", "1", "1"],
+                                                        ["3", "1", "1"]])
+            json_file = os.path.join(tmp_dir, "degree_census.json")
+            census.write_report(json_file, 2)
+            with open(json_file, "r") as rf:
+                self.assertEqual(json.load(rf), {"accounts": 5, "pairs": 6,
+                                                 "fan_in_out": [{"threshold": 2, "fan_in": 1, "fan_out": 1}]})
+
+
+if __name__ == ' main ':
+    unittest.main()
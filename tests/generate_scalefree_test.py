@@ -0,0 +1,54 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from generate_scalefree import kronecker_generator, kronecker_generator_general, count_degrees
+from amlsim.degree_sequence import count_joint_degrees, write_degree_csv, load_degree_csv
+
+class GenerateScaleFreeTests(unittest.TestCase):
+
+    def test_kronecker_generator_degrees(self):
+        in_deg, out_deg = kronecker_generator(8, 4, seed=0, chunk_size=100)
+        self.assertEqual(len(in_deg), 256)
+        self.assertEqual(len(out_deg), 256)
+        self.assertEqual(in_deg.sum(), 256 * 4)
+        self.assertEqual(out_deg.sum(), 256 * 4)
+
+    def test_kronecker_generator_deterministic(self):
+        result1 = kronecker_generator(6, 8, seed=1, chunk_size=50)
+        result2 = kronecker_generator(6, 8, seed=1, chunk_size=50)
+        np.testing.assert_array_equal(result1[0], result2[0])
+        np.testing.assert_array_equal(result1[1], result2[1])
+
+    def test_kronecker_generator_general_vertex_range(self):
+        in_deg, out_deg = kronecker_generator_general(100, 1000, seed=0)
+        self.assertEqual(len(in_deg), 100)
+        self.assertEqual(in_deg.sum(), 1000)
+        self.assertEqual(out_deg.sum(), 1000)
+
+    def test_count_degrees(self):
+        edges = [(np.array([0, 0, 1]), np.array([1, 2, 2])), (np.array([3]), np.array([0]))]
+        in_deg, out_deg = count_degrees(edges, 5)
+        self.assertEqual(in_deg.tolist(), [1, 1, 2, 0, 0])
+        self.assertEqual(out_deg.tolist(), [2, 1, 0, 1, 0])
+
+    def test_count_joint_degrees(self):
+        counts, in_deg, out_deg = count_joint_degrees([1, 1, 2, 0, 0], [2, 1, 0, 1, 0])
+        self.assertEqual(list(zip(counts.tolist(), in_deg.tolist(), out_deg.tolist())), [
+            (1, 0, 0), (1, 0, 1), (1, 1, 1), (1, 1, 2), (1, 2, 0)
+        ])
+
+    def test_write_and_load_degree_csv(self):
+        counts, in_deg, out_deg = count_joint_degrees(*kronecker_generator(6, 4, seed=0))
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            deg_csv = os.path.join(tmp_dir, "degree.csv")
+            write_degree_csv(deg_csv, counts, in_deg, out_deg)
+            loaded = load_degree_csv(deg_csv)
+        self.assertEqual(loaded[0].sum(), 64)
+        self.assertEqual((loaded[0] * loaded[1]).sum(), (loaded[0] * loaded[2]).sum())
+
+
+if __name__ == ' main ':
+    unittest.main()
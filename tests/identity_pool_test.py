@@ -0,0 +1,47 @@
+import unittest
+
+from faker import Faker
+
+from amlsim.identity_pool import IdentityPool, parse_address, unique_ssn
+
+class IdentityPoolTests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        fake = Faker(['en_US'])
+        Faker.seed(0)
+        cls.fake = fake['en_US']
+
+    def test_parse_address(self):
+        self.assertEqual(parse_address("123 Main St\nSpringfield, IL 12345"),
+                         ("123 Main St", "Springfield", "IL", "12345"))
+        self.assertIsNone(parse_address("PSC 1234, Box 5678\nAPO AP 12345"))
+
+    def test_unique_ssn(self):
+        ssns = unique_ssn(range(100000), 7)
+        self.assertEqual(len(set(ssns)), 100000)
+        for ssn in ssns[:100]:
+            area, group, serial = ssn.split("-")
+            self.assertNotIn(area, ("000", "666"))
+            self.assertLess(int(area), 900)
+            self.assertNotEqual(group, "00")
+            self.assertNotEqual(serial, "0000")
+
+    def test_draw(self):
+        pool = IdentityPool(self.fake, size=50, seed=0)
+        block = pool.draw(200)
+        self.assertEqual(len(block["ssn"]), 200)
+        self.assertTrue(set(block["gender"]) <= {"Male", "Female"})
+        for street, city, state, zip_code in zip(block["street_addr"], block["city"], block["state"], block["zip"]):
+            self.assertIn((street, city, state, zip_code),
+                          set(zip(pool.street_addrs, pool.cities, pool.states, pool.zips)))
+
+    def test_identities_unique_ssn(self):
+        pool = IdentityPool(self.fake, size=10, seed=1, unique_ssn=True)
+        identities = pool.identities(block_size=7)
+        ssns = [next(identities)["ssn"] for _ in range(30)]
+        self.assertEqual(len(set(ssns)), 30)
+
+
+if __name__ == ' main ':
+    unittest.main()
@@ -0,0 +1,46 @@
+import os
+import json
+import tempfile
+import tracemalloc
+import unittest
+
+from amlsim.instrumentation import StageProfiler
+
+class StageProfilerTests(unittest.TestCase):
+
+    def tearDown(self):
+        tracemalloc.stop()
+
+    def test_disabled(self):
+        profiler = StageProfiler(False)
+        with profiler.stage('noop'):
+            pass
+        self.assertEqual(profiler.stages, [])
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            report_file = os.path.join(tmp_dir, 'profile.json')
+            profiler.write(report_file)
+            self.assertFalse(os.path.exists(report_file))
+
+    def test_stage_report(self):
+        profiler = StageProfiler(True, top_n=3, counter=lambda: {'nodes': 10})
+        with profiler.stage('allocate'):
+            data = [list(range(100)) for _ in range(100)]
+        self.assertEqual(len(data), 100)
+
+        stage = profiler.stages[0]
+        self.assertEqual(stage['name'], 'allocate')
+        self.assertGreaterEqual(stage['wall_time_sec'], 0.0)
+        self.assertGreater(stage['traced_peak_mb'], 0.0)
+        self.assertLessEqual(len(stage['top_allocators']), 3)
+        self.assertEqual(stage['counts'], {'nodes': 10})
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            report_file = os.path.join(tmp_dir, 'sim', 'profile.json')
+            profiler.write(report_file)
+            with open(report_file, 'r') as rf:
+                report = json.load(rf)
+            self.assertEqual(report['stages'][0]['name'], 'allocate')
+
+
+if __name__ == ' main ':
+    unittest.main()
@@ -0,0 +1,47 @@
+import os
+import tempfile
+import unittest
+
+from amlsim.log_chunks import read_header, split_chunks, read_chunk
+
+class LogChunksTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.csv_file = os.path.join(self.tmp_dir.name, 'tx_log.csv')
+        self.rows = [[str(i), 'TRANSFER', '%d.5' % (i * 37), 'A%d' % i, 'B%d' % (i * 7)] for i in range(1000)]
+        with open(self.csv_file, 'w') as wf:
+            wf.write('step,type,amount,nameOrig,nameDest\n')
+            for row in self.rows:
+                wf.write(','.join(row) + '\n')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_read_header(self):
+        header, offset = read_header(self.csv_file)
+        self.assertEqual(header, ['step', 'type', 'amount', 'nameOrig', 'nameDest'])
+        self.assertEqual(offset, len('step,type,amount,nameOrig,nameDest\n'))
+
+    def test_split_chunks(self):
+        _, offset = read_header(self.csv_file)
+        chunks = split_chunks(self.csv_file, 1000)
+        self.assertGreater(len(chunks), 10)
+        self.assertEqual(chunks[0][0], offset)
+        self.assertEqual(chunks[-1][1], os.path.getsize(self.csv_file))
+        for (_, end), (start, _) in zip(chunks, chunks[1:]):
+            self.assertEqual(end, start)
+
+        rows = list()
+        for start, end in chunks:
+            rows.extend(read_chunk(self.csv_file, start, end))  # Each chunk has only complete rows
+        self.assertEqual(rows, self.rows)
+
+    def test_single_chunk(self):
+        chunks = split_chunks(self.csv_file)
+        self.assertEqual(len(chunks), 1)
+        self.assertEqual(list(read_chunk(self.csv_file, *chunks[0])), self.rows)
+
+
+if __name__ == ' main ':
+    unittest.main()
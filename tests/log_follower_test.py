@@ -0,0 +1,49 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from amlsim.log_follower import follow_lines, counter_log_written
+
+class LogFollowerTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.log_file = os.path.join(self.tmp_dir.name, 'tx_log.csv')
+        self.counter_file = os.path.join(self.tmp_dir.name, 'tx_count.csv')
+        self.lines = ['step,amount\n'] + ['%d,%d.5\n' % (i, i * 10) for i in range(500)]
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def append_blocks(self, block_size=777):
+        data = ''.join(self.lines)
+        with open(self.log_file, 'w') as wf:
+            for i in range(0, len(data), block_size):  # Blocks split lines in the middle
+                wf.write(data[i:i + block_size])
+                wf.flush()
+                time.sleep(0.005)
+        time.sleep(0.01)
+        with open(self.counter_file, 'w') as wf:
+            wf.write('step,normal,SAR\n')
+
+    def test_follow_lines(self):
+        done = counter_log_written(self.log_file, self.counter_file)
+        self.assertFalse(done())
+        writer = threading.Thread(target=self.append_blocks)
+        writer.start()
+        lines = list(follow_lines(self.log_file, done, poll_interval=0.01, timeout=10))
+        writer.join()
+        self.assertTrue(done())
+        self.assertEqual(lines, self.lines)
+
+    def test_timeout(self):
+        with open(self.log_file, 'w') as wf:
+            wf.write(self.lines[0])
+        with self.assertRaises(TimeoutError):
+            list(follow_lines(self.log_file, lambda: False, poll_interval=0.01, timeout=0.05))
+
+
+if __name__ == ' main ':
+    unittest.main()
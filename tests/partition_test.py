@@ -0,0 +1,74 @@
+import csv
+import os
+import tempfile
+import unittest
+
+from amlsim.partition import PartitionedCSVWriter, TransactionPartitionWriter, partition_key
+
+class PartitionTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_partition_key(self):
+        self.assertEqual(partition_key('bank_a'), 'orig_bank=bank_a')
+        self.assertEqual(partition_key('bank_a', 'bank_b'), 'orig_bank=bank_a/bene_bank=bank_b')
+        self.assertEqual(partition_key('bank_a', step=45, step_window=30), 'orig_bank=bank_a/steps=30-59')
+        self.assertEqual(partition_key('bank_a', step=None, step_window=30), 'orig_bank=bank_a/steps=unknown')
+
+    def test_bounded_open_files(self):
+        header = ['id', 'bank']
+        writer = PartitionedCSVWriter(self.tmp_dir.name, 'tx.csv', header, max_open_files=2)
+        rows = [[str(i), 'bank%d' % (i % 5)] for i in range(100)]
+        for row in rows:
+            writer.writerow(partition_key(row[1]), row)
+            self.assertLessEqual(len(writer.handles), 2)
+        writer.close()
+
+        self.assertEqual(len(writer.partitions()), 5)
+        self.assertEqual(writer.num_opens, 100)  # Round robin over 5 partitions with 2 open files
+        for bank in range(5):
+            with open(os.path.join(self.tmp_dir.name, 'orig_bank=bank%d' % bank, 'tx.csv')) as rf:
+                written = list(csv.reader(rf))
+            self.assertEqual(written[0], header)  # Header is written only once
+            self.assertEqual(written[1:], [row for row in rows if row[1] == 'bank%d' % bank])
+
+    def test_transaction_partitions(self):
+        header = ['id', 'orig', 'dest', 'time']
+        acct_banks = {'1': 'bank_a', '2': 'bank_b'}
+        writer = TransactionPartitionWriter(self.tmp_dir.name, 'tx.csv', header, acct_banks, (1, 2, 3), True, 30,
+                                            lambda timestamp: int(timestamp) if timestamp else None)
+        writer.write_txs([[1, 1, 2, '5'], [2, 2, 1, '45'], [3, 1, 3, '']])
+        writer.close()
+        self.assertEqual(writer.partitions(), ['orig_bank=bank_a/bene_bank=bank_b/steps=0-29',
+                                               'orig_bank=bank_a/bene_bank=unknown/steps=unknown',
+                                               'orig_bank=bank_b/bene_bank=bank_a/steps=30-59'])
+
+    def test_resume(self):
+        writer = PartitionedCSVWriter(self.tmp_dir.name, 'tx.csv', ['id'], max_open_files=1)
+        writer.writerow('bank=a', ['1'])
+        writer.writerow('bank=b', ['2'])
+        sizes = writer.sync()  # Checkpoint
+        writer.writerow('bank=a', ['3'])
+        writer.writerow('bank=c', ['4'])
+        writer.close()
+        self.assertEqual(len(sizes), 2)
+        for path, size in sizes.items():  # Restart from the checkpoint
+            with open(path, 'r+b') as f:
+                f.truncate(size)
+
+        writer = PartitionedCSVWriter(self.tmp_dir.name, 'tx.csv', ['id'])
+        writer.resume(sizes)
+        self.assertEqual(writer.partitions(), ['bank=a', 'bank=b'])  # Partition created after it is removed
+        writer.writerow('bank=a', ['5'])
+        writer.close()
+        with open(os.path.join(self.tmp_dir.name, 'bank=a', 'tx.csv')) as rf:
+            self.assertEqual(list(csv.reader(rf)), [['id'], ['1'], ['5']])
+        self.assertFalse(os.path.exists(os.path.join(self.tmp_dir.name, 'bank=c', 'tx.csv')))
+
+
+if __name__ == ' main ':
+    unittest.main()
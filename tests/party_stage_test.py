@@ -0,0 +1,41 @@
+import unittest
+
+import numpy as np
+
+from amlsim.party_stage import assign_parties, assign_kinds, block_codes, resolve_entities
+
+class PartyStageTests(unittest.TestCase):
+
+    def test_assign_parties(self):
+        self.assertEqual(assign_parties(4, np.random.RandomState(0)).tolist(), [0, 1, 2, 3])
+        party_of = assign_parties(10000, np.random.RandomState(0), 4.0)
+        self.assertEqual(len(party_of), 10000)
+        self.assertEqual(party_of[0], 0)
+        self.assertTrue(set(np.diff(party_of).tolist()) <= {0, 1})  # Runs of consecutive accounts
+        self.assertAlmostEqual(10000 / (party_of[-1] + 1), 4.0, delta=0.3)
+        self.assertEqual(party_of.tolist(), assign_parties(10000, np.random.RandomState(0), 4.0).tolist())
+
+    def test_assign_kinds(self):
+        kinds = assign_kinds(10000, np.random.RandomState(0), 0.8)
+        self.assertAlmostEqual(kinds.mean(), 0.8, delta=0.02)
+        self.assertTrue(assign_kinds(10, np.random.RandomState(0), 1.0).all())
+
+    def test_block_codes(self):
+        keys = {"first_name": ["A", "B", "A", "A"], "last_name": ["X", "Y", "X", "Z"]}
+        self.assertEqual(block_codes(keys, ["first_name"]).tolist(), [0, 1, 0, 0])
+        self.assertEqual(block_codes(keys, ["first_name", "last_name"]).tolist(), [0, 1, 0, 2])
+        self.assertEqual(len(block_codes({"ssn": []}, ["ssn"])), 0)
+
+    def test_resolve_entities(self):
+        keys = {"ssn": ["1", "2", "1", "3", "1", "2"], "last_name": ["X", "Y", "Z", "Z", "W", "V"]}
+        firsts, seconds = resolve_entities(keys, [["ssn"]])
+        self.assertEqual(list(zip(firsts.tolist(), seconds.tolist())), [(0, 2), (0, 4), (1, 5)])
+        # Links of all blocking keys without duplicates
+        firsts, seconds = resolve_entities(keys, [["ssn"], ["last_name"], ["ssn"]])
+        self.assertEqual(list(zip(firsts.tolist(), seconds.tolist())), [(0, 2), (0, 4), (1, 5), (2, 3)])
+        firsts, seconds = resolve_entities(keys, [])
+        self.assertEqual(len(firsts), 0)
+
+
+if __name__ == ' main ':
+    unittest.main()
@@ -0,0 +1,40 @@
+import os
+import csv
+import tempfile
+import unittest
+
+import numpy as np
+
+from scale_param_files import scale_counts, scale_degree_distribution, scale_param_dir
+from amlsim.degree_sequence import load_degree_csv
+
+class ScaleParamFilesTests(unittest.TestCase):
+
+    def test_scale_counts_exact_total(self):
+        scaled = scale_counts([200, 200, 100, 3], 1001)
+        self.assertEqual(scaled.sum(), 1001)
+        self.assertEqual(scaled.tolist(), [398, 398, 199, 6])
+
+    def test_scale_degree_distribution_balanced(self):
+        counts, in_deg, out_deg = load_degree_csv('tests/csv/degree.csv')
+        counts, in_deg, out_deg = scale_degree_distribution(counts, in_deg, out_deg, 1234)
+        self.assertEqual(counts.sum(), 1234)
+        self.assertEqual((counts * in_deg).sum(), (counts * out_deg).sum())
+        self.assertTrue(np.all(counts > 0))
+
+    def test_scale_param_dir(self):
+        with tempfile.TemporaryDirectory() as out_dir:
+            scale_param_dir('paramFiles/1K', 3333, out_dir)
+            counts, in_deg, out_deg = load_degree_csv(os.path.join(out_dir, 'degree.csv'))
+            self.assertEqual(counts.sum(), 3333)
+            self.assertEqual((counts * in_deg).sum(), (counts * out_deg).sum())
+
+            with open(os.path.join(out_dir, 'accounts.csv'), 'r') as rf:
+                reader = csv.DictReader(rf)
+                self.assertEqual(sum(int(row['count']) for row in reader), 3333)
+            self.assertTrue(os.path.isfile(os.path.join(out_dir, 'schema.json')))
+            self.assertFalse(os.path.isfile(os.path.join(out_dir, 'conf.json')))
+
+
+if __name__ == ' main ':
+    unittest.main()
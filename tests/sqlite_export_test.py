@@ -0,0 +1,50 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from amlsim.sqlite_export import export_sqlite
+
+class SqliteExportTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.tx_csv = os.path.join(self.tmp_dir.name, 'transactions.csv')
+        with open(self.tx_csv, 'w') as wf:
+            wf.write('tran_id,orig_acct,bene_acct,base_amt,tran_timestamp,alert_id\n')
+            for i in range(1, 251):
+                wf.write('%d,%d,%d,%d.5,2017-01-%02dT00:00:00Z,%d\n' % (i, i % 10, i % 7, i, i % 28 + 1, i % 5 - 1))
+        self.columns = [
+            {'name': 'tran_id', 'dataType': 'transaction_id', 'valueType': 'int'},
+            {'name': 'orig_acct', 'dataType': 'orig_id', 'valueType': 'string'},
+            {'name': 'bene_acct', 'dataType': 'dest_id', 'valueType': 'string'},
+            {'name': 'base_amt', 'dataType': 'amount', 'valueType': 'float'},
+            {'name': 'tran_timestamp', 'dataType': 'timestamp', 'valueType': 'date'},
+            {'name': 'alert_id', 'dataType': 'alert_id'},
+        ]
+        self.db_file = os.path.join(self.tmp_dir.name, 'amlsim.db')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_export(self):
+        tables = [('transactions', self.tx_csv, self.columns),
+                  ('missing', os.path.join(self.tmp_dir.name, 'missing.csv'), self.columns)]
+        self.assertEqual(export_sqlite(self.db_file, tables, batch_rows=100), {'transactions': 250})
+        self.assertEqual(export_sqlite(self.db_file, tables), {'transactions': 250})  # Replace the table
+
+        conn = sqlite3.connect(self.db_file)
+        self.assertEqual(conn.execute('SELECT COUNT(*) FROM transactions').fetchone()[0], 250)
+        row = conn.execute('SELECT tran_id, base_amt, orig_acct FROM transactions WHERE tran_id = 3').fetchone()
+        self.assertEqual(row, (3, 3.5, '3'))
+        indexes = {name for name, in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        self.assertEqual(indexes, {'idx_transactions_orig_acct', 'idx_transactions_bene_acct',
+                                   'idx_transactions_tran_timestamp', 'idx_transactions_alert_id'})
+        plan = conn.execute("EXPLAIN QUERY PLAN SELECT * FROM transactions WHERE orig_acct = '3'").fetchall()
+        self.assertIn('idx_transactions_orig_acct', str(plan))
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM transactions WHERE orig_acct = '3'").fetchone()[0], 25)
+        conn.close()
+
+
+if __name__ == ' main ':
+    unittest.main()
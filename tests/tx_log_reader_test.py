@@ -0,0 +1,58 @@
+import csv
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from amlsim.tx_log_reader import TX_LOG_COLUMNS, count_rows, load_tx_log, parse_block, read_blocks
+from convert_logs import parse_tx_log
+
+class TxLogReaderTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.log_file = os.path.join(self.tmp_dir.name, 'tx_log.csv')
+        with open(self.log_file, 'w') as wf:
+            wf.write(','.join(TX_LOG_COLUMNS) + '\n')
+            for i in range(1000):
+                wf.write('%d,%s,%d.5,%d,100.0,0.0,%d,1.0E7,0.0,%d,%d\n'
+                         % (i // 10, 'CASH-IN' if i % 4 == 0 else 'TRANSFER', i, i % 30, i % 17, i % 2, i % 5 - 1))
+                if i == 500:
+                    wf.write('\n')  # Empty line
+                    wf.write('50,TRANSFER,1.0,2,0,0,3,0,0,0,x\n')  # Invalid alert ID
+            wf.write('99,TRANSFER,1.0,2,0,0')  # Truncated last line
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_same_as_csv_parser(self):
+        with open(self.log_file, 'r') as rf:
+            reader = csv.reader(rf)
+            expected = list(parse_tx_log(reader, next(reader)))
+        rows = load_tx_log(self.log_file, block_bytes=4096)
+        self.assertEqual(len(rows), len(expected))
+        self.assertEqual(rows['step'].tolist(), [int(tx[0][0]) for tx in expected])
+        self.assertEqual(rows['type'].tolist(), [tx[4].encode() for tx in expected])
+        self.assertEqual(rows['amount'].tolist(), [float(tx[3]) for tx in expected])
+        self.assertEqual(rows['nameOrig'].tolist(), [int(tx[5]) for tx in expected])
+        self.assertEqual(rows['isSAR'].tolist(), [int(tx[7]) for tx in expected])
+        self.assertEqual(rows['alertID'].tolist(), [tx[8] for tx in expected])
+        self.assertEqual(rows['oldbalanceDest'][0], 1.0e7)
+        self.assertEqual(count_rows(self.log_file), len(expected))
+
+    def test_columns(self):
+        blocks = list(read_blocks(self.log_file, ['nameOrig', 'nameDest'], block_bytes=1000))
+        self.assertGreater(len(blocks), 1)
+        self.assertEqual(blocks[0].dtype.names, ('nameOrig', 'nameDest'))
+        self.assertEqual(sum(len(block) for block in blocks), 1000)
+
+    def test_irregular_block(self):
+        rows = parse_block(b'1,TRANSFER,2.5,3,0,0,4,0,0,1,7,extra\n2,TRANSFER,abc,x,0,0,4,0,0,0,-1\n')
+        self.assertEqual(rows['step'].tolist(), [1, 2])
+        self.assertEqual(rows['nameOrig'].tolist(), [3, -1])
+        self.assertTrue(np.isnan(rows['amount'][1]))
+
+
+if __name__ == ' main ':
+    unittest.main()